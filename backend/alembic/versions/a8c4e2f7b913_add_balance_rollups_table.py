@@ -0,0 +1,53 @@
+"""add_balance_rollups_table
+
+Revision ID: a8c4e2f7b913
+Revises: f3a9d1c6b208
+Create Date: 2026-10-19 17:42:10.604217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f7b913'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d1c6b208'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('balance_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column(
+        'transaction_type',
+        postgresql.ENUM('EARNED', 'SPENT', 'BONUS', name='transactiontype', create_type=False).with_variant(
+            sa.Enum('EARNED', 'SPENT', 'BONUS', name='transactiontype'), 'sqlite'
+        ),
+        nullable=False,
+    ),
+    sa.Column('transactions_count', sa.Integer(), nullable=False),
+    sa.Column('amount_total', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'transaction_type')
+    )
+
+    op.create_table('balance_rollup_cutoff',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Историю заполняет scripts/backfill_balance_rollups.py после выкатки версии,
+    # которая ведет итоги: без остановки приложения, по границе id журнала
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('balance_rollup_cutoff')
+    op.drop_table('balance_rollups')
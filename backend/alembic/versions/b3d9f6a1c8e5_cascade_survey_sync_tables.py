@@ -0,0 +1,56 @@
+"""cascade_survey_sync_tables
+
+Revision ID: b3d9f6a1c8e5
+Revises: e7a3c5d9f1b2
+Create Date: 2026-10-19 23:14:37.205816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f6a1c8e5'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c5d9f1b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблицы синхронизации, которые ссылаются на surveys.id (имена ограничений - по умолчанию PostgreSQL)
+TABLES = ('synced_form_responses', 'survey_questions', 'survey_answers')
+
+
+def _replace_survey_fk(table: str, ondelete: Union[str, None]) -> None:
+    name = f'{table}_survey_id_fkey'
+    op.drop_constraint(name, table, type_='foreignkey')
+    op.create_foreign_key(name, table, 'surveys', ['survey_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Удаление опроса удаляет его индекс ответов, каталог вопросов и ответы
+    for table in TABLES:
+        _replace_survey_fk(table, 'CASCADE')
+
+    # Отредактированный ответ перекодируется: его ответы удаляются по synced_response_id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_survey_answers_synced_response_id',
+            'survey_answers',
+            ['synced_response_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_survey_answers_synced_response_id',
+            table_name='survey_answers',
+            postgresql_concurrently=True,
+        )
+    for table in TABLES:
+        _replace_survey_fk(table, None)
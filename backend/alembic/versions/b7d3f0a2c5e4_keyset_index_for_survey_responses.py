@@ -0,0 +1,54 @@
+"""keyset_index_for_survey_responses
+
+Revision ID: b7d3f0a2c5e4
+Revises: a8c4e2f7b913
+Create Date: 2026-10-19 19:10:27.390451
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3f0a2c5e4'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e2f7b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "Мои ответы" сортируются по (started_at, id) DESC и листаются keyset
+    # курсором - индекс покрывает весь ключ сортировки и заменяет (respondent_id, started_at).
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_survey_responses_respondent_id_started_at_id',
+            'survey_responses',
+            ['respondent_id', sa.text('started_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_survey_responses_respondent_id_started_at',
+            table_name='survey_responses',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_survey_responses_respondent_id_started_at',
+            'survey_responses',
+            ['respondent_id', 'started_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_survey_responses_respondent_id_started_at_id',
+            table_name='survey_responses',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,29 @@
+"""survey_sync_attempt_time
+
+Revision ID: c6e2a9d4f7b3
+Revises: b3d9f6a1c8e5
+Create Date: 2026-10-19 23:52:18.640129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2a9d4f7b3'
+down_revision: Union[str, Sequence[str], None] = 'b3d9f6a1c8e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable колонка без значения по умолчанию - без перезаписи таблицы
+    op.add_column('surveys', sa.Column('last_sync_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('surveys', 'last_sync_attempt_at')
@@ -0,0 +1,47 @@
+"""survey_slot_reservations
+
+Revision ID: c9e1a4b6d2f8
+Revises: b7d3f0a2c5e4
+Create Date: 2026-10-19 20:05:41.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a4b6d2f8'
+down_revision: Union[str, Sequence[str], None] = 'b7d3f0a2c5e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Начатые до миграции ответы слотов не держат: reserved_slots = 0, reserved_until = NULL
+    op.add_column('surveys', sa.Column('reserved_slots', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('survey_responses', sa.Column('reserved_until', sa.DateTime(timezone=True), nullable=True))
+    # Sweeper ищет истекшие слоты; в частичном индексе только ответы, держащие слот
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_survey_responses_reserved_until',
+            'survey_responses',
+            ['reserved_until'],
+            unique=False,
+            postgresql_where=sa.text('reserved_until IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_survey_responses_reserved_until',
+            table_name='survey_responses',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('survey_responses', 'reserved_until')
+    op.drop_column('surveys', 'reserved_slots')
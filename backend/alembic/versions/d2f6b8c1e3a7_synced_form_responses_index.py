@@ -0,0 +1,65 @@
+"""synced_form_responses_index
+
+Revision ID: d2f6b8c1e3a7
+Revises: c9e1a4b6d2f8
+Create Date: 2026-10-19 20:48:13.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8c1e3a7'
+down_revision: Union[str, Sequence[str], None] = 'c9e1a4b6d2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('surveys', sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('surveys', sa.Column('sync_watermark', sa.DateTime(timezone=True), nullable=True))
+    # Таблица новая и пустая - индексы создаются обычным образом
+    op.create_table(
+        'synced_form_responses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('survey_id', sa.Integer(), nullable=False),
+        sa.Column('google_response_id', sa.String(length=255), nullable=False),
+        sa.Column('respondent_email', sa.String(length=255), nullable=True),
+        sa.Column('respondent_code', sa.String(length=20), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['survey_id'], ['surveys.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_synced_form_responses_survey_id_google_response_id',
+        'synced_form_responses',
+        ['survey_id', 'google_response_id'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_synced_form_responses_survey_id_respondent_email',
+        'synced_form_responses',
+        ['survey_id', 'respondent_email'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_synced_form_responses_survey_id_respondent_code',
+        'synced_form_responses',
+        ['survey_id', 'respondent_code'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_synced_form_responses_survey_id_respondent_code', table_name='synced_form_responses')
+    op.drop_index('ix_synced_form_responses_survey_id_respondent_email', table_name='synced_form_responses')
+    op.drop_index('ix_synced_form_responses_survey_id_google_response_id', table_name='synced_form_responses')
+    op.drop_table('synced_form_responses')
+    op.drop_column('surveys', 'sync_watermark')
+    op.drop_column('surveys', 'last_synced_at')
@@ -0,0 +1,31 @@
+"""add_expiry_indexes_for_cleanup
+
+Revision ID: d4e8a1f0c3b7
+Revises: b1261121ac7e
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a1f0c3b7'
+down_revision: Union[str, Sequence[str], None] = 'b1261121ac7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы для пакетной очистки истекших записей (MaintenanceService)
+    op.create_index(op.f('ix_oauth_temporary_tokens_expires_at'), 'oauth_temporary_tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_email_verifications_token_expires_at'), 'email_verifications', ['token_expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_email_verifications_token_expires_at'), table_name='email_verifications')
+    op.drop_index(op.f('ix_oauth_temporary_tokens_expires_at'), table_name='oauth_temporary_tokens')
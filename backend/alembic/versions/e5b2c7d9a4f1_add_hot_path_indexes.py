@@ -0,0 +1,46 @@
+"""add_hot_path_indexes
+
+Revision ID: e5b2c7d9a4f1
+Revises: 7a3f9c2d5b61
+Create Date: 2026-10-19 14:21:07.532918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7d9a4f1'
+down_revision: Union[str, Sequence[str], None] = '7a3f9c2d5b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Индексы под фильтры ленты, участия, "моих опросов/ответов" и истории транзакций
+HOT_PATH_INDEXES = [
+    ('ix_survey_responses_survey_id_respondent_id', 'survey_responses', ['survey_id', 'respondent_id']),
+    ('ix_survey_responses_respondent_id_started_at', 'survey_responses', ['respondent_id', 'started_at']),
+    ('ix_surveys_status_created_at', 'surveys', ['status', 'created_at']),
+    ('ix_surveys_google_account_id_created_at', 'surveys', ['google_account_id', 'created_at']),
+    ('ix_balance_transactions_user_id_created_at', 'balance_transactions', ['user_id', 'created_at']),
+    ('ix_google_account_user_id_is_primary', 'google_account', ['user_id', 'is_primary']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицы, но не может
+    # выполняться внутри транзакции. Если миграция прервется, в PostgreSQL
+    # может остаться невалидный индекс - его нужно удалить вручную и повторить.
+    with op.get_context().autocommit_block():
+        for name, table, columns in HOT_PATH_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(HOT_PATH_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,75 @@
+"""question_catalog_and_answers
+
+Revision ID: e7a3c5d9f1b2
+Revises: d2f6b8c1e3a7
+Create Date: 2026-10-19 21:32:06.417395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c5d9f1b2'
+down_revision: Union[str, Sequence[str], None] = 'd2f6b8c1e3a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+question_kind = sa.Enum('choice', 'checkbox', 'scale', 'text', 'date', 'time', 'other', name='questionkind')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Каталог существующих опросов заполнится при следующей синхронизации
+    # (ответы с неизвестными вопросами перечитывают форму)
+    op.create_table(
+        'survey_questions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('survey_id', sa.Integer(), nullable=False),
+        sa.Column('google_question_id', sa.String(length=64), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=1000), nullable=False),
+        sa.Column('kind', question_kind, nullable=False),
+        sa.Column('options', sa.JSON(), nullable=True),
+        sa.Column('has_other', sa.Boolean(), nullable=False),
+        sa.Column('required', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['survey_id'], ['surveys.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_survey_questions_survey_id_google_question_id',
+        'survey_questions',
+        ['survey_id', 'google_question_id'],
+        unique=True,
+    )
+    op.create_table(
+        'survey_answers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('survey_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('synced_response_id', sa.Integer(), nullable=False),
+        sa.Column('choice', sa.Integer(), nullable=True),
+        sa.Column('number', sa.Float(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['survey_id'], ['surveys.id'], ),
+        sa.ForeignKeyConstraint(['question_id'], ['survey_questions.id'], ),
+        sa.ForeignKeyConstraint(['synced_response_id'], ['synced_form_responses.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_survey_answers_survey_id_question_id',
+        'survey_answers',
+        ['survey_id', 'question_id', 'synced_response_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_answers_survey_id_question_id', table_name='survey_answers')
+    op.drop_table('survey_answers')
+    op.drop_index('ix_survey_questions_survey_id_google_question_id', table_name='survey_questions')
+    op.drop_table('survey_questions')
+    question_kind.drop(op.get_bind(), checkfirst=True)
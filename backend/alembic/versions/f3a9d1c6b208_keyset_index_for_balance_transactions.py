@@ -0,0 +1,55 @@
+"""keyset_index_for_balance_transactions
+
+Revision ID: f3a9d1c6b208
+Revises: e5b2c7d9a4f1
+Create Date: 2026-10-19 16:05:42.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d1c6b208'
+down_revision: Union[str, Sequence[str], None] = 'e5b2c7d9a4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # История транзакций сортируется по (created_at, id) DESC и листается
+    # keyset курсором - индекс покрывает весь ключ сортировки. Старый индекс
+    # (user_id, created_at) становится его префиксом и удаляется.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_balance_transactions_user_id_created_at_id',
+            'balance_transactions',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_balance_transactions_user_id_created_at',
+            table_name='balance_transactions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_balance_transactions_user_id_created_at',
+            'balance_transactions',
+            ['user_id', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_balance_transactions_user_id_created_at_id',
+            table_name='balance_transactions',
+            postgresql_concurrently=True,
+        )
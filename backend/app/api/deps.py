@@ -1,14 +1,19 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core import database
 from app.core.database import SessionLocal
 from app.core.exceptions import AuthenticationException
+from app.core.principal_cache import CACHEABLE_METHODS
+from app.core.replica_router import replica_router
 from app.models import User
-from app.services.auth_service import AuthService
+from app.services.auth_service import AsyncAuthService, AuthService
 from app.services.google_accounts_service import GoogleAccountsService
 from app.services.user_service import UserService
-from app.services.survey_service import SurveyService
+from app.services.survey_service import AsyncSurveyService, SurveyService
+from app.services.survey_analytics import SurveyAnalyticsService
 from app.services.balance_service import BalanceService
 from app.services.participation_service import ParticipationService
 from app.services.google_auth_service import GoogleAuthService
@@ -22,7 +27,7 @@ optional_security = HTTPBearer(auto_error=False)
 
 
 def get_db() -> Generator[Session, None, None]:
-    """Dependency для получения сессии базы данных"""
+    """Dependency для получения сессии базы данных (primary)"""
     db = SessionLocal()
     try:
         yield db
@@ -30,14 +35,53 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_read_db(db: Session = Depends(get_db)) -> Generator[Session, None, None]:
+    """
+    Dependency для read-only эндпоинтов: сессия реплики, если она доступна
+
+    Возвращает primary сессию, если реплики не настроены, все нездоровы или
+    клиент недавно выполнял запись (X-DB-Pin-Until). Primary сессия не
+    открывает соединение, пока к ней не обратились.
+    """
+    replica_db = replica_router.read_session()
+    if replica_db is None:
+        yield db
+        return
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+async def get_async_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """Dependency для async сессии БД (None, если DB_ASYNC_ENABLED выключен)"""
+    if database.AsyncSessionLocal is None:
+        yield None
+        return
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
 def get_participation_service(db: Session = Depends(get_db)) -> ParticipationService:
     return ParticipationService(db)
 
 
+def get_read_participation_service(db: Session = Depends(get_read_db)) -> ParticipationService:
+    return ParticipationService(db)
+
+
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
     return UserService(db)
 
 
+def get_read_user_service(db: Session = Depends(get_read_db)) -> UserService:
+    return UserService(db)
+
+
+def get_read_balance_service(db: Session = Depends(get_read_db)) -> BalanceService:
+    return BalanceService(db)
+
+
 def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
     return AuthService(db)
 
@@ -47,15 +91,42 @@ def get_survey_service(db: Session = Depends(get_db)) -> SurveyService:
     return SurveyService(db)
 
 
+def get_read_survey_service(db: Session = Depends(get_read_db)) -> SurveyService:
+    return SurveyService(db)
+
+
+def get_read_survey_analytics_service(db: Session = Depends(get_read_db)) -> SurveyAnalyticsService:
+    return SurveyAnalyticsService(db)
+
+
+def get_async_survey_service(
+    db: Optional[AsyncSession] = Depends(get_async_db),
+) -> Optional[AsyncSurveyService]:
+    return AsyncSurveyService(db) if db is not None else None
+
+
+def get_async_auth_service(
+    db: Optional[AsyncSession] = Depends(get_async_db),
+) -> Optional[AsyncAuthService]:
+    return AsyncAuthService(db) if db is not None else None
+
+
 def get_google_auth_service(db: Session = Depends(get_db)) -> GoogleAuthService:
     return GoogleAuthService(db)
 
 
 def get_current_user(
+    request: Request,
     auth_service: AuthService = Depends(get_auth_service),
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
-    """Dependency для получения текущего авторизованного пользователя"""
+    """
+    Dependency для получения текущего авторизованного пользователя
+
+    Запросы на изменение не берут пользователя из principal cache: is_active и
+    баланс проверяются по строке users, даже если другой инстанс еще держит
+    устаревший снимок.
+    """
     if credentials is None:
         logger.warning("No credentials provided")
         raise HTTPException(
@@ -65,8 +136,8 @@ def get_current_user(
         )
 
     token = credentials.credentials
-    user = auth_service.get_current_user(token)
-    logger.info(f"User authorized: {user.id}")
+    user = auth_service.get_current_user(token, use_cache=request.method in CACHEABLE_METHODS)
+    logger.debug("User authorized: %s", user.id)
     return user
 
 
@@ -97,6 +168,7 @@ def get_google_forms_service_for_account(google_account):
 
 # Опциональная авторизация (может быть None)
 def get_current_user_optional(
+    request: Request,
     auth_service: AuthService = Depends(get_auth_service),
     credentials: HTTPAuthorizationCredentials = Depends(optional_security),
 ) -> User | None:
@@ -105,7 +177,24 @@ def get_current_user_optional(
         return None
     try:
         token = credentials.credentials
-        user = auth_service.get_current_user(token)
+        user = auth_service.get_current_user(token, use_cache=request.method in CACHEABLE_METHODS)
+        return user if (user.is_active is True) else None
+    except AuthenticationException:
+        return None
+
+
+async def get_current_user_optional_async(
+    request: Request,
+    auth_service: Optional[AsyncAuthService] = Depends(get_async_auth_service),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_security),
+) -> User | None:
+    """get_current_user_optional на AsyncSession: промах principal cache не блокирует event loop"""
+    if not credentials or auth_service is None:
+        return None
+    try:
+        user = await auth_service.get_current_user(
+            credentials.credentials, use_cache=request.method in CACHEABLE_METHODS
+        )
         return user if (user.is_active is True) else None
     except AuthenticationException:
         return None
@@ -42,7 +42,7 @@ async def register(user_data: UserRegister, auth_service=Depends(get_auth_servic
     Creates a pending registration (data stored temporarily in email_verifications table).
     User must verify their email to complete registration and create the account.
     """
-    verification_token, masked_email = auth_service.register_user(
+    verification_token, masked_email = await auth_service.register_user(
         email=user_data.email,
         password=user_data.password,
         full_name=user_data.full_name,
@@ -66,7 +66,7 @@ async def register(user_data: UserRegister, auth_service=Depends(get_auth_servic
 )
 async def login(credentials: UserLogin, auth_service=Depends(get_auth_service)):
     """Вход в систему"""
-    user = auth_service.authenticate_user(
+    user = await auth_service.authenticate_user(
         email=credentials.email, password=credentials.password
     )
     access_token, refresh_token = auth_service.create_tokens(user)
@@ -213,7 +213,7 @@ async def reset_password(request: PasswordResetRequest, db: Session = Depends(ge
     Maximum 5 attempts allowed per reset request.
     """
     password_reset_service = PasswordResetService(db)
-    user_data = password_reset_service.reset_password(
+    user_data = await password_reset_service.reset_password(
         email=request.email, code=request.code, new_password=request.new_password
     )
 
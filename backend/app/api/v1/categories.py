@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.api.deps import get_db
+from app.api.deps import get_read_db
 from app.repositories.category_repository import category_repository
 from app.schemas import CategoryResponse, CategoryListResponse
 
@@ -17,7 +17,7 @@ router = APIRouter(prefix="/categories", tags=["categories"])
     description="Получить список всех активных категорий, отсортированных по имени. Публичный эндпоинт, не требует авторизации.",
 )
 async def get_categories(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> CategoryListResponse:
     """
     Получить список всех активных категорий.
@@ -2,14 +2,14 @@
 API endpoints для участия в опросах
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from app.api.deps import get_current_active_user, get_participation_service
+from app.api.deps import get_current_active_user, get_participation_service, get_read_participation_service
 from app.models import User
 from app.services.participation_service import ParticipationService
-from app.schemas import SurveyStartResponse, SurveyVerifyResponse, ErrorResponse
+from app.schemas import ParticipationStatusBatchRequest, SurveyStartResponse, SurveyVerifyResponse, ErrorResponse
 
 
 router = APIRouter(tags=["Participation"], prefix="/surveys")
@@ -36,7 +36,7 @@ async def start_survey_participation(
     
     Возвращает ссылку на Google Form и инструкции для участия
     """
-    result = participation_service.start_participation(survey_id, current_user.id)
+    result = participation_service.start_participation(survey_id, current_user)
     return result
 
 
@@ -61,7 +61,7 @@ async def verify_survey_completion(
     
     Вызывается после того, как пользователь заполнил Google Form
     """
-    result = participation_service.verify_and_reward(survey_id, current_user.id)
+    result = await participation_service.verify_and_reward(survey_id, current_user)
     return result
 
 
@@ -81,44 +81,40 @@ async def get_my_participation_status(
     }
 
 
+@router.post("/my-status:batch")
+async def get_my_participation_statuses(
+    request: ParticipationStatusBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    participation_service: ParticipationService = Depends(get_read_participation_service)
+) -> Dict[str, Any]:
+    """
+    Получить статусы моего участия сразу для нескольких опросов (до 100)
+
+    data - словарь survey_id -> статус в формате GET /surveys/{survey_id}/my-status
+    """
+    return {
+        "success": True,
+        "data": participation_service.get_participation_statuses(request.survey_ids, current_user.id)
+    }
+
+
 @router.get("/my-responses")
 async def get_my_responses(
-    page: int = 1,
-    per_page: int = 20,
+    per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="data.next_cursor from the previous page"),
+    page: int = Query(1, ge=1, deprecated=True),
     current_user: User = Depends(get_current_active_user),
-    participation_service: ParticipationService = Depends(get_participation_service)
+    participation_service: ParticipationService = Depends(get_read_participation_service)
 ):
     """
-    Получить мои ответы на опросы
+    Получить мои ответы на опросы (новые первыми)
+
+    Следующая страница - по data.next_cursor (null - последняя страница).
+    data.total точен, пока data.total_exact = true; для больших историй это оценка.
     """
-    offset = (page - 1) * per_page
-    responses = participation_service.response_repo.get_user_responses(
-        participation_service.db, current_user.id, per_page, offset
-    )
-    
-    # Подготовить данные для ответа
-    response_data = []
-    for response in responses:
-        survey = response.survey
-        response_data.append({
-            "id": response.id,
-            "survey": {
-                "id": survey.id,
-                "title": survey.title,
-                "reward_per_response": survey.reward_per_response
-            },
-            "started_at": response.started_at,
-            "completed_at": response.completed_at,
-            "reward_earned": survey.reward_per_response if response.reward_paid else 0,
-            "status": "completed" if response.is_verified else "in_progress"
-        })
-    
     return {
         "success": True,
-        "data": {
-            "items": response_data,
-            "page": page,
-            "per_page": per_page,
-            "total": len(response_data)
-        }
-    }
\ No newline at end of file
+        "data": participation_service.get_my_responses(
+            current_user.id, limit=per_page, cursor=cursor, page=page
+        ),
+    }
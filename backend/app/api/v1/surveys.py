@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Body, Depends, status, Query
+from fastapi import APIRouter, Body, Depends, Response, status, Query
 from typing import List, Optional
 
 from pydantic import HttpUrl
 from app.api.deps import (
     get_current_active_user,
     get_current_user_optional,
+    get_current_user_optional_async,
     get_google_accounts_service,
 )
-from app.api.deps import get_survey_service
+from app.api.deps import (
+    get_async_survey_service,
+    get_read_survey_analytics_service,
+    get_read_survey_service,
+    get_survey_service,
+)
 from app.schemas import (
     GoogleForm,
     SurveyCreate,
@@ -15,32 +21,28 @@ from app.schemas import (
     SurveyListItem,
     SurveyDetail,
     MySurveyDetail,
+    SurveyAnalytics,
     ApiResponse,
     ErrorResponse,
     SurveyValidationResponse,
 )
+from app.core import database
+from app.core.responses import FastJSONResponse
 from app.models import User
 from app.services.google_forms_service import GoogleFormsService
-from app.services.survey_service import SurveyService
+from app.services.survey_analytics import SurveyAnalyticsService
+from app.services.survey_service import AsyncSurveyService, SurveyService
 from app.services.google_accounts_service import GoogleAccountsService
 
 
 router = APIRouter(prefix="/surveys", tags=["Surveys"])
 
 
-@router.get(
-    "", 
-    response_model=List[SurveyListItem],
-    responses={
-        400: {"model": ErrorResponse, "description": "Validation error"},
-        500: {"model": ErrorResponse, "description": "Internal server error"},
-    }
-)
 async def get_surveys_feed(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None, min_length=1),
-    survey_service: SurveyService = Depends(get_survey_service),
+    survey_service: SurveyService = Depends(get_read_survey_service),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     """Получить ленту активных опросов"""
@@ -48,11 +50,41 @@ async def get_surveys_feed(
 
     if search:
         # TODO: Реализовать поиск через survey_service
-        surveys = survey_service.get_surveys_feed(current_user_id, skip, limit)
+        feed = survey_service.get_surveys_feed(current_user_id, skip, limit)
     else:
-        surveys = survey_service.get_surveys_feed(current_user_id, skip, limit)
+        feed = survey_service.get_surveys_feed(current_user_id, skip, limit)
 
-    return surveys
+    # Лента уже закодирована сервисом (склейка кэшированных фрагментов опросов)
+    return Response(feed, media_type="application/json")
+
+
+async def get_surveys_feed_async(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    search: Optional[str] = Query(None, min_length=1),
+    survey_service: AsyncSurveyService = Depends(get_async_survey_service),
+    current_user: Optional[User] = Depends(get_current_user_optional_async),
+):
+    """Получить ленту активных опросов через AsyncSession (DB_ASYNC_ENABLED)"""
+    current_user_id = current_user.id if current_user else None
+    feed = await survey_service.get_surveys_feed(current_user_id, skip, limit)
+    return Response(feed, media_type="application/json")
+
+
+# FastAPI разрешает все объявленные зависимости маршрута, поэтому вариант ленты
+# выбирается при регистрации: при DB_ASYNC_ENABLED ни sync сессия, ни sync
+# проверка токена (threadpool, чтение users) не создаются
+router.add_api_route(
+    "",
+    get_surveys_feed_async if database.async_engine is not None else get_surveys_feed,
+    methods=["GET"],
+    name="get_surveys_feed",
+    response_model=List[SurveyListItem],
+    responses={
+        400: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
 
 
 @router.get(
@@ -66,7 +98,7 @@ async def get_surveys_feed(
 async def get_survey_detail(
     survey_id: int,
     current_user: Optional[User] = Depends(get_current_user_optional),
-    survey_service: SurveyService = Depends(get_survey_service),
+    survey_service: SurveyService = Depends(get_read_survey_service),
 ):
     """Получить детали конкретного опроса"""
     current_user_id = current_user.id if current_user else None
@@ -97,7 +129,7 @@ async def get_my_surveys(
         skip=skip, 
         limit=limit
     )
-    return surveys
+    return FastJSONResponse(surveys)
 
 
 @router.post(
@@ -258,4 +290,33 @@ async def delete_survey(
         survey_id=survey_id, 
         user_id=current_user.id,
     )
-    return ApiResponse(success=success, message="Survey deleted successfully")
\ No newline at end of file
+    return ApiResponse(success=success, message="Survey deleted successfully")
+
+
+@router.get(
+    "/my/{survey_id}/analytics",
+    response_model=SurveyAnalytics,
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        403: {"model": ErrorResponse, "description": "Access denied"},
+        404: {"model": ErrorResponse, "description": "Survey not found"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    }
+)
+async def get_my_survey_analytics(
+    survey_id: int,
+    row_question_id: Optional[int] = Query(None, description="ID вопроса строк перекрестной таблицы"),
+    column_question_id: Optional[int] = Query(None, description="ID вопроса столбцов перекрестной таблицы"),
+    current_user: User = Depends(get_current_active_user),
+    analytics_service: SurveyAnalyticsService = Depends(get_read_survey_analytics_service),
+):
+    """Аналитика ответов моего опроса: распределения вариантов, числовые сводки, перекрестная таблица"""
+    analytics = analytics_service.get_analytics(
+        survey_id=survey_id,
+        user_id=current_user.id,
+        row_question_id=row_question_id,
+        column_question_id=column_question_id,
+    )
+    # Аналитика уже закодирована сервисом (кэш по survey_id + last_synced_at)
+    return Response(analytics, media_type="application/json")
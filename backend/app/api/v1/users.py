@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends
-from typing import List
-from app.api.deps import get_current_active_user, get_user_service
-from app.schemas import UserProfile, UserUpdate, TransactionItem, ErrorResponse
-from app.models import User
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from app.api.deps import get_current_active_user, get_read_balance_service, get_read_user_service, get_user_service
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import FastJSONResponse
+from app.schemas import BalanceMonthItem, BalanceSummary, UserProfile, UserUpdate, TransactionItem, ErrorResponse
+from app.models import TransactionType, User
 import logging
 
+from app.services.balance_service import BalanceService
 from app.services.user_service import UserService
 
 logger = logging.getLogger(__name__)
@@ -55,10 +58,52 @@ async def update_my_profile(
     }
 )
 async def get_my_transactions(
-    skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    transaction_type: Optional[TransactionType] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
     current_user: User = Depends(get_current_active_user),
-    user_service=Depends(get_user_service),
+    user_service=Depends(get_read_user_service),
 ):
-    """Get user transaction history"""
-    return user_service.get_transactions(current_user, skip=skip, limit=limit)
+    """Get user transaction history (newest first, cursor in X-Next-Cursor header)"""
+    items, next_cursor = user_service.get_transactions(
+        current_user, limit=limit, cursor=cursor, transaction_type=transaction_type, skip=skip
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(items, headers=headers)
+
+
+@router.get(
+    "/me/balance",
+    response_model=BalanceSummary,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    }
+)
+async def get_my_balance_summary(
+    current_user: User = Depends(get_current_active_user),
+    balance_service: BalanceService = Depends(get_read_balance_service),
+):
+    """Get current balance with lifetime totals per transaction type"""
+    return BalanceSummary(**balance_service.get_balance_summary(current_user.id))
+
+
+@router.get(
+    "/me/balance/history",
+    response_model=List[BalanceMonthItem],
+    responses={
+        400: {"model": ErrorResponse, "description": "Validation error"},
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    }
+)
+async def get_my_balance_history(
+    months: int = Query(12, ge=1, le=120),
+    current_user: User = Depends(get_current_active_user),
+    balance_service: BalanceService = Depends(get_read_balance_service),
+):
+    """Get monthly earnings/spending totals per transaction type (newest month first)"""
+    return FastJSONResponse([
+        BalanceMonthItem(**row) for row in balance_service.get_monthly_history(current_user.id, months=months)
+    ])
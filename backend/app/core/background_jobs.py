@@ -0,0 +1,125 @@
+"""
+Периодические фоновые задачи приложения
+
+Задача - синхронная функция, принимающая сессию БД. Она выполняется в пуле
+потоков (asyncio.to_thread) с собственной сессией, чтобы не блокировать event
+loop. Запуск и остановка - в lifespan приложения (BACKGROUND_JOBS_ENABLED).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Задача, которая выполняется раз в interval_seconds"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Session], Any],
+        interval_seconds: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self.runs = 0
+        self.failures = 0
+        self.last_result: Any = None
+        self.last_duration_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop_ref: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def run_once(self) -> Any:
+        """Выполнить задачу синхронно в текущем потоке"""
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            result = self.func(db)
+        except Exception:
+            db.rollback()
+            self.failures += 1
+            logger.exception(f"Background job {self.name} failed")
+            raise
+        finally:
+            db.close()
+            self.last_duration_seconds = time.perf_counter() - started
+        self.runs += 1
+        self.last_result = result
+        return result
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                pass  # уже залогировано, повторим на следующей итерации
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop_ref = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name=f"job:{self.name}")
+
+    def wake(self) -> None:
+        """Запустить задачу раньше срока (можно вызывать из любого потока)"""
+        if self._task is not None and self._loop_ref is not None:
+            self._loop_ref.call_soon_threadsafe(self._wakeup.set)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop_ref = None
+
+
+class BackgroundJobs:
+    """Реестр фоновых задач"""
+
+    def __init__(self):
+        self.jobs: List[PeriodicJob] = []
+
+    def add(self, job: PeriodicJob) -> PeriodicJob:
+        self.jobs.append(job)
+        return job
+
+    def get(self, name: str) -> Optional[PeriodicJob]:
+        return next((job for job in self.jobs if job.name == name), None)
+
+    def wake(self, name: str) -> None:
+        job = self.get(name)
+        if job is not None:
+            job.wake()
+
+    def start(self) -> None:
+        for job in self.jobs:
+            job.start()
+        logger.info(f"Background jobs started: {[job.name for job in self.jobs]}")
+
+    async def stop(self) -> None:
+        for job in self.jobs:
+            await job.stop()
+
+
+# Singleton instance
+background_jobs = BackgroundJobs()
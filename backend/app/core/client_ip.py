@@ -0,0 +1,36 @@
+"""
+Адрес клиента за обратными прокси
+
+Cloud Run (Google Front End) и балансировщики дописывают адрес, с которого к
+ним пришел запрос, в конец X-Forwarded-For, а приложение видит TCP соединение
+от прокси. Левые элементы заголовка клиент может подставить сам, поэтому
+доверяем только TRUSTED_PROXY_HOPS последним элементам: адрес клиента -
+hops-й элемент с конца. При hops=0 (запуск без прокси) используется адрес
+TCP соединения, X-Forwarded-For игнорируется.
+"""
+from typing import List, Optional
+
+from starlette.types import Scope
+
+from app.core.config import settings
+
+
+def _forwarded_for(scope: Scope) -> List[str]:
+    """Адреса из всех заголовков X-Forwarded-For по порядку"""
+    addresses = []
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            addresses.extend(part.strip() for part in value.decode("latin-1").split(","))
+    return [address for address in addresses if address]
+
+
+def client_ip(scope: Scope, trusted_hops: Optional[int] = None) -> str:
+    """IP клиента с учетом доверенных прокси"""
+    hops = settings.TRUSTED_PROXY_HOPS if trusted_hops is None else trusted_hops
+    if hops > 0:
+        addresses = _forwarded_for(scope)
+        if addresses:
+            # Записей меньше, чем прокси: самая левая все равно добавлена доверенным прокси
+            return addresses[-min(hops, len(addresses))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
@@ -20,18 +20,66 @@ class Settings(BaseSettings):
     # Database - Unix Socket Connection (GCP Cloud SQL)
     DB_INSTANCE_CONNECTION_NAME: Optional[str] = None  # Format: project:region:instance
     DB_SOCKET_DIR: str = "/cloudsql"
+
+    # Database - async сессии (asyncpg) для горячих read-путей API
+    DB_ASYNC_ENABLED: bool = False
+
+    # Database - пул соединений (на процесс; async engine получает такой же пул)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30  # ожидание свободного соединения
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_PRE_PING_IDLE_SECONDS: int = 0  # >0 - проверять только простаивавшие дольше N секунд
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # PostgreSQL statement_timeout, 0 - без ограничения
+
+    # Database - реплики для read-only эндпоинтов (URL через запятую, пусто - только primary)
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_HEALTH_CHECK_SECONDS: int = 10
+    DB_REPLICA_MAX_LAG_SECONDS: int = 30  # отстающая реплика исключается из ротации
+    DB_REPLICA_PIN_SECONDS: int = 5  # после записи чтения клиента идут в primary
     
     # Application
     PROJECT_NAME: str = "Felend API"
     VERSION: str = "1.0.0"
     DEBUG: bool = True
+    SERVER_TIMING_ENABLED: bool = False  # заголовок Server-Timing с временем БД
+    METRICS_ENABLED: bool = False  # эндпоинты /metrics (Prometheus) и /health/details
+    METRICS_TOKEN: Optional[str] = None  # Bearer токен для них; без токена эндпоинты отвечают 404
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_QUEUE_SIZE: int = 10000  # записи сверх очереди отбрасываются
+    LOG_SAMPLING: str = ""  # доли INFO/DEBUG по логгерам: "app.core.middleware=0.1,httpx=0"
+    REQUEST_LOG_SAMPLE_RATE_2XX: float = 1.0  # доля логируемых успешных запросов (0..1)
+    REQUEST_LOG_SLOW_SECONDS: float = 1.0  # запросы дольше логируются всегда
     
     # Security
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    
+
+    # Хеширование паролей (bcrypt) в отдельном пуле процессов
+    PASSWORD_HASH_WORKERS: int = 2  # 0 - хешировать синхронно в текущем процессе
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # максимум ожидающих задач, дальше 503
+
+    # Кэш авторизованных пользователей (claims JWT + снимок users)
+    # Сброс локален для процесса: другие инстансы отдают старый снимок на чтениях
+    # до TTL, запросы на изменение всегда перечитывают users
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30  # 0 - кэш отключен
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Кэш JSON фрагментов опросов для ленты (ключ - id + updated_at опроса)
+    SURVEY_FRAGMENT_CACHE_TTL_SECONDS: int = 60  # 0 - кэш отключен
+    SURVEY_FRAGMENT_CACHE_MAX_ENTRIES: int = 5000
+
+    # Кэш аналитики опросов (ключ - id + last_synced_at опроса, TTL только ограничивает память)
+    SURVEY_ANALYTICS_CACHE_TTL_SECONDS: int = 600  # 0 - кэш отключен
+    SURVEY_ANALYTICS_CACHE_MAX_ENTRIES: int = 256
+
+    # "Мои ответы": до скольких ответов total считается точно (дальше - оценка PostgreSQL)
+    MY_RESPONSES_EXACT_COUNT_LIMIT: int = 1000
+
     # Google API    
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -46,10 +94,55 @@ class Settings(BaseSettings):
     # Frontend allowed origins for Google OAuth redirect
     ALLOWED_FRONTEND_ORIGINS: str = "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000"
     
-    # Rate limiting
+    # Rate limiting (GCRA, лимит на IP клиента)
+    RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 200
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_AUTH_REQUESTS: int = 20  # /api/v1/auth/*
+    RATE_LIMIT_AUTH_WINDOW: int = 60
+    RATE_LIMIT_VERIFY_REQUESTS: int = 10  # проверка прохождения опроса
+    RATE_LIMIT_VERIFY_WINDOW: int = 60
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # общий лимит для нескольких воркеров
+
+    # Сколько прокси перед приложением дописывают адрес в X-Forwarded-For
+    # (Cloud Run - 1, Cloud Run за внешним балансировщиком - 2; 0 - адрес TCP соединения)
+    TRUSTED_PROXY_HOPS: int = 0
     
+    # Email (SMTP). Без SMTP_USER/SMTP_PASSWORD коды только пишутся в лог
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 587
+    SMTP_USER: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = True  # STARTTLS
+    SMTP_TIMEOUT_SECONDS: int = 10
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100  # после этого соединение переоткрывается
+    SMTP_MAX_IDLE_SECONDS: int = 60  # простаивающее соединение закрывается
+    FROM_EMAIL: Optional[str] = None  # по умолчанию SMTP_USER
+    FROM_NAME: str = "Felend"
+
+    # Очередь исходящих писем (email_outbox)
+    EMAIL_OUTBOX_POLL_SECONDS: int = 2
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6
+    EMAIL_OUTBOX_BACKOFF_BASE_SECONDS: int = 30  # 30s, 60s, 120s, ...
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: int = 3600
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300  # захваченное, но не отправленное письмо вернется в очередь
+    EMAIL_OUTBOX_RETENTION_MINUTES: int = 15  # срок жизни кода; отправленные и неудачные письма затем удаляются
+
+    # Фоновые задачи (запускаются в каждом воркере)
+    BACKGROUND_JOBS_ENABLED: bool = True  # false - задачи выполняет отдельный процесс python -m app.worker
+    MAINTENANCE_INTERVAL_SECONDS: int = 300  # очистка истекших токенов и верификаций
+    MAINTENANCE_BATCH_SIZE: int = 1000  # строк за один DELETE
+    MAINTENANCE_MAX_BATCHES: int = 50  # пачек каждого вида за запуск
+
+    # Резервирование слотов опроса при старте участия
+    SURVEY_RESERVATION_TTL_SECONDS: int = 1800  # столько слот держится за начавшим опрос
+    SURVEY_RESERVATION_SWEEP_SECONDS: int = 60  # период возврата истекших слотов
+    SURVEY_RESERVATION_SWEEP_BATCH_SIZE: int = 1000  # резервов за один UPDATE
+
+    # Синхронизация ответов Google Forms
+    SURVEY_SYNC_MIN_INTERVAL_SECONDS: int = 15  # попытки синхронизации по промаху при подтверждении (и неудачные) - не чаще
+
     # Система баллов
     WELCOME_BONUS_POINTS: int = 10
     MIN_REWARD_PER_RESPONSE: int = 1
@@ -60,6 +153,11 @@ class Settings(BaseSettings):
         """Parse CORS_ORIGINS string into list"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
+    @property
+    def replica_urls_list(self) -> list[str]:
+        """Parse DB_REPLICA_URLS string into list"""
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+    
     @property
     def allowed_frontend_origins_list(self) -> list[str]:
         """Parse ALLOWED_FRONTEND_ORIGINS string into list for OAuth validation"""
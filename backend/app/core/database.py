@@ -1,16 +1,46 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.db_pool import async_db_pool_metrics, configure_pool, db_pool_metrics, engine_options
 
 # Get database URL from settings
 DATABASE_URL = settings.get_database_url
 
-# Create engine with appropriate settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_recycle=3600,   # Recycle connections after 1 hour
-)
+# Create engine with pool settings from Settings (DB_POOL_*)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure_pool(engine, db_pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+# Async driver для каждого синхронного диалекта
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Заменить синхронный драйвер в URL на async (asyncpg / aiosqlite)"""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ASYNC_DRIVERS.values():
+        return url
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL scheme '{scheme}'")
+    return f"{ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+
+# Async engine создается только при DB_ASYNC_ENABLED, чтобы не требовать asyncpg без необходимости
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.DB_ASYNC_ENABLED:
+    async_url = to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    configure_pool(async_engine.sync_engine, async_db_pool_metrics)
+    # expire_on_commit=False: после commit атрибуты нельзя догружать неявно (нет lazy IO)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,225 @@
+"""
+Пул соединений с БД: параметры из Settings и метрики через pool events
+
+Метрики собираются обработчиками событий пула (connect, checkout, checkin,
+invalidate, soft_invalidate, close). Время ожидания соединения измеряется
+подклассом QueuePool: у пула нет события "начало checkout". Те же обработчики
+обновляют метрики Prometheus (app.core.metrics) с меткой pool=<name>.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import metrics as prom
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Счетчики событий пула и время ожидания соединения"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pool: Optional[QueuePool] = None
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._checkouts = 0
+        self._connects = 0
+        self._closes = 0
+        self._invalidations = 0
+        self._soft_invalidations = 0
+        self._timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._wait_seconds_total += seconds
+            self._wait_seconds_max = max(self._wait_seconds_max, seconds)
+        prom.DB_POOL_CHECKOUT_WAIT.labels(self.name).observe(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+        prom.DB_POOL_EVENTS.labels(self.name, "timeout").inc()
+
+    def _export_state(self) -> None:
+        """Обновить gauge пула (вызывается на checkout/checkin под self._lock)"""
+        prom.DB_POOL_CHECKED_OUT.labels(self.name).set(self._checked_out)
+        pool = self._pool
+        if isinstance(pool, QueuePool):
+            prom.DB_POOL_SIZE.labels(self.name).set(pool.size())
+            prom.DB_POOL_OVERFLOW.labels(self.name).set(max(pool.overflow(), 0))
+
+    def instrument(self, engine: Engine) -> None:
+        """Подписаться на события пула engine"""
+        pool = engine.pool
+        self._pool = pool
+        if isinstance(pool, _TimedCheckoutMixin):
+            pool.metrics = self
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self._connects += 1
+            prom.DB_POOL_EVENTS.labels(self.name, "connect").inc()
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self._checkouts += 1
+                self._checked_out += 1
+                self._export_state()
+            prom.DB_POOL_EVENTS.labels(self.name, "checkout").inc()
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            connection_record.info["checked_in_at"] = time.monotonic()
+            with self._lock:
+                self._checked_out = max(self._checked_out - 1, 0)
+                self._export_state()
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self._invalidations += 1
+            prom.DB_POOL_EVENTS.labels(self.name, "invalidate").inc()
+            logger.warning(f"DB connection invalidated ({self.name}): {exception}")
+
+        @event.listens_for(pool, "soft_invalidate")
+        def on_soft_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self._soft_invalidations += 1
+            prom.DB_POOL_EVENTS.labels(self.name, "soft_invalidate").inc()
+
+        @event.listens_for(pool, "close")
+        def on_close(dbapi_connection, connection_record):
+            with self._lock:
+                self._closes += 1
+            prom.DB_POOL_EVENTS.labels(self.name, "close").inc()
+
+    def stats(self) -> Dict[str, Any]:
+        """Снимок метрик пула"""
+        pool = self._pool
+        with self._lock:
+            return {
+                "pool_size": pool.size() if isinstance(pool, QueuePool) else None,
+                "checked_out": self._checked_out,
+                "overflow": max(pool.overflow(), 0) if isinstance(pool, QueuePool) else 0,
+                "checkouts": self._checkouts,
+                "connects": self._connects,
+                "closes": self._closes,
+                "invalidations": self._invalidations,
+                "soft_invalidations": self._soft_invalidations,
+                "checkout_timeouts": self._timeouts,
+                "checkout_wait_seconds_total": self._wait_seconds_total,
+                "checkout_wait_seconds_max": self._wait_seconds_max,
+                "avg_checkout_wait_seconds": (
+                    self._wait_seconds_total / self._checkouts if self._checkouts else 0.0
+                ),
+            }
+
+
+class _TimedCheckoutMixin:
+    """Измеряет время получения соединения (ожидание в очереди + connect + pre-ping)"""
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() пересоздает пул - метрики переносятся в новый экземпляр
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics._pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def ping_idle_connections(engine: Engine, idle_seconds: int) -> None:
+    """
+    Pre-ping только для соединений, простоявших в пуле дольше idle_seconds
+
+    Встроенный pool_pre_ping делает SELECT 1 на каждый checkout. Соединение,
+    только что вернувшееся в пул, почти наверняка живо, поэтому проверяются
+    лишь простаивавшие. DisconnectionError заставляет пул открыть новое соединение.
+    """
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed pre-ping: {e}") from e
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Параметры create_engine / create_async_engine из Settings
+
+    Для SQLite (тесты, локальная разработка) размер и класс пула не задаются.
+    """
+    options: Dict[str, Any] = {
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # При DB_POOL_PRE_PING_IDLE_SECONDS > 0 используется ping_idle_connections
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_IDLE_SECONDS <= 0,
+    }
+    if url.startswith("sqlite"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql"):
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+
+def configure_pool(engine: Engine, metrics: PoolMetrics) -> None:
+    """Подключить политику pre-ping и метрики к engine (для async - engine.sync_engine)"""
+    # Pre-ping регистрируется первым: отброшенное соединение не учитывается как checkout
+    if settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_IDLE_SECONDS > 0:
+        ping_idle_connections(engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+    metrics.instrument(engine)
+
+
+# Singleton instances
+db_pool_metrics = PoolMetrics("sync")
+async_db_pool_metrics = PoolMetrics("async")
@@ -62,6 +62,8 @@ class ErrorCodes:
     RESOURCE_NOT_FOUND = "GENERAL001"
     CONFLICT = "GENERAL002"
     INTERNAL_ERROR = "GENERAL003"
+    SERVICE_OVERLOADED = "GENERAL004"
+    RATE_LIMIT_EXCEEDED = "GENERAL005"
 
 
 class FelendException(Exception):
@@ -138,6 +140,23 @@ class GoogleAPIException(FelendException):
         super().__init__(message, status.HTTP_502_BAD_GATEWAY, error_code, context)
 
 
+class ServiceOverloadedException(FelendException):
+    """Сервис временно перегружен (503)"""
+    def __init__(self, message: str = "Service is temporarily overloaded", error_code: str = ErrorCodes.SERVICE_OVERLOADED, context: Optional[Dict[str, Any]] = None):
+        super().__init__(message, status.HTTP_503_SERVICE_UNAVAILABLE, error_code, context)
+
+
+class RateLimitExceededException(FelendException):
+    """Превышен лимит запросов (429)"""
+    def __init__(self, retry_after_seconds: int, policy: str):
+        super().__init__(
+            f"Too many requests. Retry after {retry_after_seconds} seconds",
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            ErrorCodes.RATE_LIMIT_EXCEEDED,
+            {"retry_after_seconds": retry_after_seconds, "policy": policy}
+        )
+
+
 class GoogleAccountAlreadyConnectedException(ConflictException):
     """Google account already connected to this user"""
     def __init__(self, google_email: str, context: Optional[Dict[str, Any]] = None):
@@ -0,0 +1,167 @@
+"""
+Кэш JSON фрагментов опросов для ленты
+
+SurveyListItem опроса в ленте у разных пользователей отличается только полями
+can_participate и my_responses_count. Кэш хранит заранее закодированную часть
+объекта без этих полей ('{"id":1,...,"categories":[...]' без закрывающей
+скобки), а лента собирается склейкой байтов: фрагмент + per-user хвост
+',"can_participate":true,"my_responses_count":0}'. При попадании в кэш автор и
+категории опроса не загружаются из БД.
+
+Ключ - (survey_id, updated_at): updated_at меняется при любом UPDATE строки
+опроса (в т.ч. счетчика ответов), поэтому запись другого воркера не отдается
+устаревшей. Изменения, не затрагивающие строку опроса (категории, имя автора),
+сбрасывают записи через событие after_flush сессии - локально для процесса;
+в других воркерах такие записи живут не дольше TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.responses import dumps
+from app.models import Category, GoogleAccount, Survey
+from app.schemas import CategoryResponse
+
+
+@dataclass
+class _Fragment:
+    version: Optional[datetime]
+    google_account_id: int
+    data: bytes
+    expires_at: float
+
+
+def _overlay(can_participate: bool, my_responses_count: int) -> bytes:
+    return b',"can_participate":%s,"my_responses_count":%d}' % (
+        b"true" if can_participate else b"false",
+        my_responses_count,
+    )
+
+
+def render_fragment(survey: Survey) -> bytes:
+    """Поля SurveyListItem, не зависящие от пользователя (JSON объект без '}')"""
+    static = {
+        "id": survey.id,
+        "title": survey.title,
+        "description": survey.description,
+        "author_name": survey.google_account.name,
+        "reward_per_response": survey.reward_per_response,
+        "total_responses": survey.total_responses,
+        "responses_needed": survey.responses_needed,
+        "questions_count": survey.questions_count,
+        "categories": [CategoryResponse.model_validate(cat, from_attributes=True) for cat in survey.categories],
+    }
+    return dumps(static)[:-1]
+
+
+class SurveyFragmentCache:
+    """Потокобезопасный LRU кэш фрагментов с TTL"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Fragment]" = OrderedDict()
+        self._surveys_by_account: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def fragment(self, survey: Survey) -> bytes:
+        """Фрагмент опроса из кэша или свежеотрендеренный"""
+        if not self.enabled:
+            return render_fragment(survey)
+
+        version = survey.updated_at
+        with self._lock:
+            entry = self._entries.get(survey.id)
+            if entry is not None and entry.version == version and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(survey.id)
+                self.hits += 1
+                record_cache_lookup("survey_fragment", hit=True)
+                return entry.data
+            self.misses += 1
+        record_cache_lookup("survey_fragment", hit=False)
+
+        data = render_fragment(survey)
+        entry = _Fragment(
+            version=version,
+            google_account_id=survey.google_account_id,
+            data=data,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._remove(survey.id)
+            self._entries[survey.id] = entry
+            self._surveys_by_account.setdefault(entry.google_account_id, set()).add(survey.id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return data
+
+    def render_feed(self, items: Iterable[Tuple[Survey, bool, int]]) -> bytes:
+        """JSON массив SurveyListItem из (опрос, can_participate, my_responses_count)"""
+        return b"[" + b",".join(
+            self.fragment(survey) + _overlay(can_participate, my_responses_count)
+            for survey, can_participate, my_responses_count in items
+        ) + b"]"
+
+    def invalidate(self, survey_id: int) -> None:
+        with self._lock:
+            self._remove(survey_id)
+
+    def invalidate_account(self, google_account_id: int) -> None:
+        """Сбросить опросы Google аккаунта (изменилось имя автора)"""
+        with self._lock:
+            for survey_id in list(self._surveys_by_account.get(google_account_id, ())):
+                self._remove(survey_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._surveys_by_account.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, survey_id: int) -> None:
+        entry = self._entries.pop(survey_id, None)
+        if entry is None:
+            return
+        surveys = self._surveys_by_account.get(entry.google_account_id)
+        if surveys is not None:
+            surveys.discard(survey_id)
+            if not surveys:
+                del self._surveys_by_account[entry.google_account_id]
+
+
+# Singleton instance
+survey_fragment_cache = SurveyFragmentCache(
+    ttl_seconds=settings.SURVEY_FRAGMENT_CACHE_TTL_SECONDS,
+    max_entries=settings.SURVEY_FRAGMENT_CACHE_MAX_ENTRIES,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_surveys(session: Session, flush_context) -> None:
+    """Сбрасывать фрагменты измененных опросов, их авторов и категорий"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Survey):
+            survey_fragment_cache.invalidate(obj.id)
+        elif isinstance(obj, GoogleAccount):
+            if obj in session.deleted or inspect(obj).attrs.name.history.has_changes():
+                survey_fragment_cache.invalidate_account(obj.id)
+        elif isinstance(obj, Category):
+            # Категории меняются редко - проще сбросить весь кэш
+            survey_fragment_cache.clear()
@@ -0,0 +1,198 @@
+"""
+Неблокирующее структурированное логирование
+
+Обработчики логгеров только кладут запись в ограниченную очередь
+(BoundedQueueHandler); форматирование в JSON и запись в stderr выполняет
+QueueListener в отдельном потоке, поэтому event loop не ждет I/O. При
+переполнении очереди запись отбрасывается и учитывается в счетчике - лучше
+потерять строку лога, чем задержать запрос.
+
+INFO/DEBUG записи отдельных логгеров можно сэмплировать (LOG_SAMPLING,
+"app.core.middleware=0.1,httpx=0"); WARNING и выше проходят всегда.
+
+request id текущего запроса хранится в contextvar (его выставляет
+RequestContextMiddleware) и добавляется ко всем записям, в т.ч. из
+синхронных зависимостей, выполняемых в пуле потоков.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Атрибуты LogRecord, которые не являются полями extra
+_RESERVED_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id"}
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет request_id текущего запроса (если он не передан явно в extra)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю INFO/DEBUG записей логгера (и его потомков)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Более длинные префиксы проверяются первыми
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.labels("sampled").inc()
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler с ограниченной очередью: при переполнении запись отбрасывается"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+        self._lock_dropped = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_dropped:
+                self.dropped += 1
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение подставляется сразу (аргументы могут измениться), traceback
+        # сохраняется текстом; остальное форматирование - в потоке QueueListener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.queue.qsize(), "capacity": self.queue.maxsize, "dropped": self.dropped}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON строка на запись (поля severity/message понимает Cloud Logging)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat().replace('+00:00', 'Z'),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            payload["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """'app.core.middleware=0.1,httpx=0' -> {'app.core.middleware': 0.1, 'httpx': 0.0}"""
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class LoggingPipeline:
+    """Корневой логгер -> BoundedQueueHandler -> QueueListener -> stderr"""
+
+    def __init__(self):
+        self.handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+
+    def setup(
+        self,
+        level: str,
+        json_format: bool,
+        queue_size: int,
+        sampling: Dict[str, float],
+        stream=None,
+    ) -> None:
+        """Настроить корневой логгер (повторный вызов заменяет прежнюю конфигурацию)"""
+        self.stop()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(
+            JsonFormatter() if json_format
+            else logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+        )
+
+        handler = BoundedQueueHandler(queue_size)
+        handler.addFilter(SamplingFilter(sampling))
+        handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+
+        self.handler = handler
+        self.listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Дописать записи из очереди и остановить поток"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return self.handler.stats() if self.handler is not None else {}
+
+
+def setup_logging() -> None:
+    """Настроить логирование приложения из Settings"""
+    logging_pipeline.setup(
+        level=settings.LOG_LEVEL,
+        json_format=settings.LOG_FORMAT == "json",
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sampling=parse_sampling(settings.LOG_SAMPLING),
+    )
+
+
+# Singleton instance
+logging_pipeline = LoggingPipeline()
+atexit.register(logging_pipeline.stop)
@@ -0,0 +1,199 @@
+"""
+Метрики приложения (prometheus_client), отдаются в /metrics
+
+Метки маршрутов - шаблоны путей ("/api/v1/surveys/{survey_id}"), а не сами
+пути, чтобы количество временных рядов оставалось ограниченным.
+
+Несколько воркеров uvicorn: переменная окружения PROMETHEUS_MULTIPROC_DIR
+(пустой каталог, очищается перед запуском) включает multiprocess режим
+prometheus_client - каждый процесс пишет значения в свои файлы, а /metrics
+любого воркера отдает сумму по всем. Переменная должна быть задана до импорта
+этого модуля. Gauge используют режим livesum - значения умерших процессов
+не учитываются.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import Scope
+
+from app.core.query_stats import QueryStats
+
+
+# Метка для запросов, не попавших ни в один маршрут (404, сканеры)
+UNMATCHED_ROUTE = "unmatched"
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# HTTP
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Total database time per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Пул соединений с БД (обновляются обработчиками событий PoolMetrics)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened above pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "db_pool_events",
+    "Pool events: checkout, connect, close, invalidate, soft_invalidate, timeout",
+    ["pool", "event"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+# Пул процессов bcrypt (обновляются PasswordHasher)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "Password hashing tasks running or waiting for a worker process",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing tasks waiting for a free worker process",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_MAX_QUEUE_DEPTH = Gauge(
+    "password_hash_max_queue_depth",
+    "Highest password hashing queue depth since start",
+    ["pool"],
+    multiprocess_mode="max",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "Password hashing tasks rejected because the queue was full",
+    ["pool"],
+)
+
+# Google API
+GOOGLE_API_CALLS = Counter(
+    "google_api_calls",
+    "Google API calls by operation and outcome",
+    ["operation", "outcome"],
+)
+GOOGLE_API_DURATION = Histogram(
+    "google_api_call_duration_seconds",
+    "Google API call latency",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# Кэши (hit ratio = hit / (hit + miss))
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+
+# Логирование
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped",
+    "Log records dropped by sampling or because the log queue was full",
+    ["reason"],
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон пути маршрута, обработавшего запрос (роутер кладет маршрут в scope)"""
+    route = scope.get("route")
+    path: Optional[str] = getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def observe_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(seconds)
+
+
+def observe_request_db(method: str, route: str, stats: QueryStats) -> None:
+    REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+    REQUEST_DB_SECONDS.labels(method, route).observe(stats.duration_seconds)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def track_google_api(operation: str) -> Iterator[None]:
+    """Учесть вызов Google API: время и исход (success/error)"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        GOOGLE_API_DURATION.labels(operation).observe(time.perf_counter() - started)
+        GOOGLE_API_CALLS.labels(operation, outcome).inc()
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics() -> bytes:
+    """Метрики в текстовом формате Prometheus"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Убрать livesum gauge текущего процесса (при остановке воркера)"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,124 +1,208 @@
 """
 Middleware для FastAPI приложения
 """
-from fastapi import Request
-from fastapi.responses import JSONResponse
 from datetime import datetime, timezone
-import time
+from urllib.parse import parse_qsl
 import logging
+import random
+import time
 import traceback
 import uuid
 
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.client_ip import client_ip
 from app.core.config import settings
+from app.core.logging_config import request_id_var
+from app.core.metrics import HTTP_REQUESTS_IN_PROGRESS, observe_request, observe_request_db, route_template
+from app.core.query_stats import QueryStats, track_queries
 from app.schemas import ErrorResponse, ErrorDetail
 
 
 logger = logging.getLogger(__name__)
 
+REQUEST_ID_HEADER = "X-Request-ID"
+# Принимаем request id от прокси/клиента только разумной длины
+MAX_REQUEST_ID_LENGTH = 128
 
-async def error_handling_middleware(request: Request, call_next):
+
+class RequestContextMiddleware:
     """
-    Middleware для перехвата неожиданных исключений и логирования
-    
-    - Генерирует уникальный request_id для трейсинга
-    - Логирует все входящие запросы и время выполнения
-    - Перехватывает неожиданные исключения
-    - В dev режиме показывает stack trace, в prod скрывает детали
-    - Добавляет структурированное логирование с контекстом
+    ASGI middleware: request id, время выполнения, логирование и перехват ошибок
+
+    - Берет request id из X-Request-ID или генерирует новый, возвращает его в ответе
+      и кладет в request.state.request_id и contextvar для всех записей лога
+    - Считает время выполнения, число SQL запросов и время БД
+    - Пишет метрики Prometheus: латентность по шаблону маршрута и статусу, запросы в обработке
+    - Логирует одну запись на запрос; 2xx ответы сэмплируются (REQUEST_LOG_SAMPLE_RATE_2XX),
+      ошибки и медленные запросы логируются всегда. Поля записи собираются только
+      если она будет записана
+    - Перехватывает неожиданные исключения: в dev режиме показывает stack trace, в prod скрывает детали
+
+    В отличие от @app.middleware("http") (BaseHTTPMiddleware) не создает отдельную
+    задачу и поток ответа на каждый запрос.
     """
-    start_time = time.time()
-    request_id = str(uuid.uuid4())
-    
-    # Извлекаем дополнительную информацию о запросе
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("User-Agent", "unknown")
-    content_type = request.headers.get("Content-Type", "unknown")
-    
-    # Логируем входящий запрос с контекстом
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = _request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        method = scope["method"]
+        status_code = 500
+        response_size = None
+        response_started = False
+
+        def on_response_start(message: Message, query_stats: QueryStats) -> None:
+            nonlocal status_code, response_size, response_started
+            response_started = True
+            status_code = message["status"]
+            headers = MutableHeaders(scope=message)
+            response_size = headers.get("content-length")
+            headers.append(REQUEST_ID_HEADER, request_id)
+            if settings.SERVER_TIMING_ENABLED:
+                headers.append("Server-Timing", query_stats.server_timing())
+
+        request_id_token = request_id_var.set(request_id)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            with track_queries() as query_stats:
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        on_response_start(message, query_stats)
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                except Exception as exc:
+                    if response_started:
+                        # Заголовки уже отправлены - корректный ответ 500 отдать нельзя
+                        _log_exception(scope, request_id, exc, time.perf_counter() - start_time)
+                        raise
+                    status_code = 500
+                    process_time = time.perf_counter() - start_time
+                    _log_exception(scope, request_id, exc, process_time)
+                    response = _error_response(scope, request_id, exc, process_time)
+                    await response(scope, receive, send)
+
+            process_time = time.perf_counter() - start_time
+            route = route_template(scope)
+            observe_request(method, route, status_code, process_time)
+            observe_request_db(method, route, query_stats)
+            _log_completed(scope, request_id, status_code, process_time, query_stats, response_size)
+        finally:
+            in_progress.dec()
+            request_id_var.reset(request_id_token)
+
+
+def _request_id(scope: Scope) -> str:
+    incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+    if incoming and len(incoming) <= MAX_REQUEST_ID_LENGTH and incoming.isprintable():
+        return incoming
+    return str(uuid.uuid4())
+
+
+def _should_log(status_code: int, process_time: float) -> bool:
+    if not logger.isEnabledFor(logging.INFO):
+        return False
+    if status_code >= 300 or process_time >= settings.REQUEST_LOG_SLOW_SECONDS:
+        return True
+    rate = settings.REQUEST_LOG_SAMPLE_RATE_2XX
+    return rate >= 1.0 or random.random() < rate
+
+
+def _log_completed(
+    scope: Scope,
+    request_id: str,
+    status_code: int,
+    process_time: float,
+    query_stats: QueryStats,
+    response_size,
+) -> None:
+    if not _should_log(status_code, process_time):
+        return
+    headers = Headers(scope=scope)
     logger.info(
-        f"[{request_id}] {request.method} {request.url}",
+        "[%s] %s %s completed %s in %.4fs (%d queries, %.1fms db)",
+        request_id, scope["method"], scope["path"], status_code, process_time,
+        query_stats.statements, query_stats.duration_seconds * 1000,
         extra={
             "request_id": request_id,
-            "method": request.method,
-            "path": str(request.url.path),
-            "query_params": dict(request.query_params) if request.query_params else {},
-            "client_ip": client_ip,
-            "user_agent": user_agent,
-            "content_type": content_type,
-            "event": "request_start"
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_params": dict(parse_qsl(scope["query_string"].decode("latin-1"))),
+            "client_ip": client_ip(scope),
+            "user_agent": headers.get("user-agent", "unknown"),
+            "status_code": status_code,
+            "process_time": process_time,
+            "db_statements": query_stats.statements,
+            "db_time": query_stats.duration_seconds,
+            "response_size": response_size or "unknown",
+            "event": "request_completed"
         }
     )
-    
-    try:
-        response = await call_next(request)
-        
-        # Логируем успешное завершение
-        process_time = time.time() - start_time
-        logger.info(
-            f"[{request_id}] Completed {response.status_code} in {process_time:.4f}s",
-            extra={
-                "request_id": request_id,
-                "status_code": response.status_code,
-                "process_time": process_time,
-                "response_size": response.headers.get("content-length", "unknown"),
-                "event": "request_completed"
-            }
-        )
-        
-        return response
-        
-    except Exception as exc:
-        # Перехватываем все неожиданные исключения
-        process_time = time.time() - start_time
-        
-        # Структурированное логирование ошибки
-        logger.error(
-            f"[{request_id}] Unhandled {type(exc).__name__}: {exc}",
-            extra={
-                "request_id": request_id,
-                "exception_type": type(exc).__name__,
+
+
+def _log_exception(scope: Scope, request_id: str, exc: Exception, process_time: float) -> None:
+    logger.error(
+        "[%s] Unhandled %s: %s",
+        request_id, type(exc).__name__, exc,
+        extra={
+            "request_id": request_id,
+            "exception_type": type(exc).__name__,
+            "exception_message": str(exc),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_params": dict(parse_qsl(scope["query_string"].decode("latin-1"))),
+            "client_ip": client_ip(scope),
+            "user_agent": Headers(scope=scope).get("user-agent", "unknown"),
+            "process_time": process_time,
+            "event": "unhandled_exception"
+        },
+        exc_info=settings.DEBUG  # Добавляем traceback только в DEBUG режиме
+    )
+
+
+def _error_response(scope: Scope, request_id: str, exc: Exception, process_time: float) -> JSONResponse:
+    if settings.DEBUG:
+        # В dev режиме показываем детали ошибки и stack trace
+        error_detail = ErrorDetail(
+            message=f"Internal server error: {str(exc)}",
+            code="INTERNAL_ERROR",
+            type=type(exc).__name__,
+            details={
                 "exception_message": str(exc),
-                "method": request.method,
-                "path": str(request.url.path),
-                "query_params": dict(request.query_params) if request.query_params else {},
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "process_time": process_time,
-                "event": "unhandled_exception"
+                "traceback": traceback.format_exc().split('\n'),
+                "request_id": request_id,
+                "process_time": f"{process_time:.4f}s"
             },
-            exc_info=settings.DEBUG  # Добавляем traceback только в DEBUG режиме
+            timestamp=datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            path=scope["path"]
         )
-        
-        # Создаем ответ с ошибкой
-        if settings.DEBUG:
-            # В dev режиме показываем детали ошибки и stack trace
-            error_detail = ErrorDetail(
-                message=f"Internal server error: {str(exc)}",
-                code="INTERNAL_ERROR", 
-                type=type(exc).__name__,
-                details={
-                    "exception_message": str(exc),
-                    "traceback": traceback.format_exc().split('\n'),
-                    "request_id": request_id,
-                    "process_time": f"{process_time:.4f}s"
-                },
-                timestamp=datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-                path=str(request.url.path)
-            )
-        else:
-            # В production скрываем детали для безопасности
-            error_detail = ErrorDetail(
-                message="Internal server error",
-                code="INTERNAL_ERROR",
-                type="InternalServerError", 
-                details={
-                    "request_id": request_id  # Оставляем только request_id для debugging
-                },
-                timestamp=datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-                path=str(request.url.path)
-            )
-        
-        return JSONResponse(
-            status_code=500,
-            content=ErrorResponse(error=error_detail).model_dump()
+    else:
+        # В production скрываем детали для безопасности
+        error_detail = ErrorDetail(
+            message="Internal server error",
+            code="INTERNAL_ERROR",
+            type="InternalServerError",
+            details={
+                "request_id": request_id  # Оставляем только request_id для debugging
+            },
+            timestamp=datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            path=scope["path"]
         )
+
+    return JSONResponse(
+        status_code=500,
+        content=ErrorResponse(error=error_detail).model_dump(),
+        headers={REQUEST_ID_HEADER: request_id},
+    )
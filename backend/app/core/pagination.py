@@ -0,0 +1,34 @@
+"""
+Keyset (cursor) пагинация
+
+Курсор - непрозрачная для клиента строка с ключом сортировки последней
+строки страницы (created_at, id). Следующая страница выбирается условием
+(created_at, id) < (курсор) по индексу, без OFFSET: глубина страницы не
+влияет на стоимость запроса.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+from app.core.exceptions import ValidationException
+
+
+# Заголовок ответа с курсором следующей страницы (нет заголовка - последняя)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Курсор на строку с ключом (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Ключ (created_at, id) из курсора; ValidationException для чужих строк"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationException("Invalid pagination cursor", context={"cursor": cursor})
@@ -0,0 +1,140 @@
+"""
+Асинхронное хеширование и проверка паролей в пуле процессов
+
+bcrypt с 12 раундами занимает ~250ms CPU на вызов. Если выполнять его прямо
+в async эндпоинте, event loop блокируется и воркер перестает обслуживать
+остальные запросы. Поэтому вычисления отправляются в отдельный пул процессов
+ограниченного размера, а очередь ожидающих задач тоже ограничена.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core import metrics as prom
+from app.core.config import settings
+from app.core.exceptions import ServiceOverloadedException
+from app.core.security import get_password_hash, verify_password
+
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Пул процессов для bcrypt с awaitable API и метриками очереди
+
+    Args:
+        max_workers: Количество процессов (0 - выполнять синхронно в текущем процессе)
+        max_queue: Максимальное количество задач, ожидающих свободный процесс
+        name: Метка pool метрик Prometheus
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "password"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Метрики
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_queue_depth = 0
+        self._total_wait_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Лениво создать пул процессов (spawn - одинаково ведет себя на всех ОС)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Password hashing pool started with {self.max_workers} workers")
+            return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество задач, ожидающих свободный процесс"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._in_flight - self.max_workers >= self.max_queue:
+                self._rejected += 1
+                prom.PASSWORD_HASH_REJECTED.labels(self.name).inc()
+                raise ServiceOverloadedException(
+                    "Too many concurrent authentication requests, please retry later",
+                    context={"queue_depth": self.queue_depth},
+                )
+            self._in_flight += 1
+            self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+            self._export_state()
+
+    def _release_slot(self, started_at: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._total_wait_seconds += time.perf_counter() - started_at
+            self._export_state()
+
+    def _export_state(self) -> None:
+        """Обновить gauge пула (вызывается под self._lock)"""
+        prom.PASSWORD_HASH_IN_FLIGHT.labels(self.name).set(self._in_flight)
+        prom.PASSWORD_HASH_QUEUE_DEPTH.labels(self.name).set(self.queue_depth)
+        prom.PASSWORD_HASH_MAX_QUEUE_DEPTH.labels(self.name).set(self._max_queue_depth)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.max_workers <= 0:
+            return func(*args)
+
+        self._acquire_slot()
+        started_at = time.perf_counter()
+        try:
+            future: Future = self._get_executor().submit(func, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            self._release_slot(started_at)
+
+    async def hash(self, password: str) -> str:
+        """Захешировать пароль, не блокируя event loop"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверить пароль, не блокируя event loop"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Снимок метрик пула"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_latency_seconds": (
+                    self._total_wait_seconds / self._completed if self._completed else 0.0
+                ),
+            }
+
+    def shutdown(self) -> None:
+        """Остановить пул процессов (вызывается при остановке приложения)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Password hashing pool stopped")
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,210 @@
+"""
+Кэш аутентифицированных пользователей (principal cache)
+
+Каждый авторизованный запрос декодирует JWT и читает строку users. Кэш хранит
+по хэшу токена декодированные claims и легкий снимок пользователя, чтобы
+повторные запросы с тем же токеном не делали ни того, ни другого.
+
+Записи живут недолго (PRINCIPAL_CACHE_TTL_SECONDS) и сбрасываются при изменении
+баланса, профиля или is_active пользователя (событие after_flush сессии), а
+ORM UPDATE/DELETE по users (update(User) через сессию) очищает кэш целиком.
+Между flush и commit параллельный запрос читает еще старую закоммиченную
+строку (READ COMMITTED) и может положить ее обратно в кэш, поэтому после
+commit те же записи сбрасываются повторно (событие after_commit).
+
+Сброс локален для процесса: в других воркерах и инстансах снимок (в том числе
+is_active деактивированного пользователя) остается устаревшим до
+PRINCIPAL_CACHE_TTL_SECONDS. Поэтому кэш используется только для чтений
+(GET/HEAD/OPTIONS): запросы на изменение всегда перечитывают строку users и
+проверяют is_active. SQL в обход сессии (raw connection, другие сервисы) кэш не
+видит - после него остается то же окно TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.models import User
+
+
+# Поля пользователя, которые попадают в снимок (без hashed_password)
+SNAPSHOT_FIELDS = (
+    "id",
+    "email",
+    "full_name",
+    "balance",
+    "respondent_code",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+
+# Изменение этих полей делает снимок невалидным
+INVALIDATING_FIELDS = ("email", "full_name", "balance", "is_active")
+
+# Ключи session.info: что сбросить повторно после commit
+_PENDING_USERS_KEY = "principal_cache_pending_users"
+_PENDING_CLEAR_KEY = "principal_cache_pending_clear"
+
+# Методы, для которых можно отдать закэшированный снимок
+CACHEABLE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass
+class Principal:
+    """Закэшированный пользователь: claims токена + снимок строки users"""
+    claims: Dict[str, Any]
+    snapshot: Dict[str, Any]
+    expires_at: float
+
+    @property
+    def user_id(self) -> int:
+        return self.snapshot["id"]
+
+
+class PrincipalCache:
+    """Потокобезопасный TTL-кэш с ограничением размера"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        """Получить пользователя по токену (None если нет или истек)"""
+        if not self.enabled:
+            return None
+        key = self._key(token)
+        with self._lock:
+            principal = self._entries.get(key)
+            if principal is None:
+                self.misses += 1
+                record_cache_lookup("principal", hit=False)
+                return None
+            if principal.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                record_cache_lookup("principal", hit=False)
+                return None
+            self.hits += 1
+            record_cache_lookup("principal", hit=True)
+            return principal
+
+    def put(self, token: str, claims: Dict[str, Any], user: User) -> None:
+        """Сохранить claims и снимок пользователя"""
+        if not self.enabled:
+            return
+        ttl = float(self.ttl_seconds)
+        # Запись не должна пережить сам токен
+        exp = claims.get("exp")
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+            if ttl <= 0:
+                return
+
+        principal = Principal(
+            claims=claims,
+            snapshot={field: getattr(user, field) for field in SNAPSHOT_FIELDS},
+            expires_at=time.monotonic() + ttl,
+        )
+        key = self._key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = principal
+            self._keys_by_user.setdefault(principal.user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Удалить все записи пользователя"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key: str) -> None:
+        principal = self._entries.pop(key, None)
+        if principal is None:
+            return
+        keys = self._keys_by_user.get(principal.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[principal.user_id]
+
+
+# Singleton instance
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+
+def _invalidate_user(session: Session, user_id: int) -> None:
+    """Сбросить записи пользователя сейчас и запомнить его для сброса после commit"""
+    principal_cache.invalidate_user(user_id)
+    session.info.setdefault(_PENDING_USERS_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_users(session: Session, flush_context) -> None:
+    """Сбрасывать кэш пользователей, у которых изменились баланс, профиль или is_active"""
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in INVALIDATING_FIELDS):
+            _invalidate_user(session, obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            _invalidate_user(session, obj.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_user_write(orm_execute_state) -> None:
+    """update(User)/delete(User) не проходят через after_flush: затронутые строки неизвестны"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        principal_cache.clear()
+        orm_execute_state.session.info[_PENDING_CLEAR_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    """Повторный сброс: снимки, закэшированные между flush и commit, устарели"""
+    if session.info.pop(_PENDING_CLEAR_KEY, False):
+        principal_cache.clear()
+    for user_id in session.info.pop(_PENDING_USERS_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    """Изменения откатились - закэшированная строка снова актуальна"""
+    session.info.pop(_PENDING_CLEAR_KEY, None)
+    session.info.pop(_PENDING_USERS_KEY, None)
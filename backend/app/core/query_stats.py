@@ -0,0 +1,76 @@
+"""
+Учет SQL запросов в рамках HTTP запроса
+
+Обработчики before/after_cursor_execute, подписанные на все Engine (в т.ч. async
+engine и реплики), увеличивают счетчик запросов и суммарное время БД в объекте
+QueryStats текущего запроса. Объект хранится в contextvar: он виден и в
+синхронных зависимостях, выполняемых в пуле потоков. Вне HTTP запроса
+(фоновые задачи, скрипты) учет не ведется и обработчики почти ничего не стоят.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_STARTED_AT_INFO = "query_stats_started_at"
+
+
+@dataclass
+class QueryStats:
+    """Количество SQL запросов и суммарное время БД за HTTP запрос"""
+    statements: int = 0
+    duration_seconds: float = 0.0
+
+    def server_timing(self) -> str:
+        """Значение для заголовка Server-Timing (время в миллисекундах)"""
+        return f'db;dur={self.duration_seconds * 1000:.1f};desc="{self.statements} queries"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считать SQL запросы, выполненные внутри блока (и в порожденных задачах/потоках)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_STARTED_AT_INFO, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Запрос с ошибкой тоже занял время БД; after_cursor_execute для него не вызывается
+    if exception_context.connection is not None:
+        _record(exception_context.connection)
+
+
+def _record(conn) -> None:
+    stats = _current_stats.get()
+    started = conn.info.get(_STARTED_AT_INFO)
+    if stats is None or not started:
+        return
+    stats.statements += 1
+    stats.duration_seconds += time.perf_counter() - started.pop()
@@ -0,0 +1,266 @@
+"""
+Ограничение частоты запросов (rate limiting)
+
+Алгоритм GCRA (Generic Cell Rate Algorithm): для каждого ключа хранится одно
+число - теоретическое время прибытия (TAT) следующего запроса. Это дает тот же
+результат, что и скользящее окно, но без хранения истории запросов.
+
+Лимиты задаются политиками по пути запроса (строже для /auth и подтверждения
+участия). Состояние хранится в памяти процесса или, если задан
+RATE_LIMIT_REDIS_URL, в Redis - тогда лимит общий для всех воркеров.
+"""
+import logging
+import math
+from abc import ABC, abstractmethod
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.client_ip import client_ip as get_client_ip
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededException
+from app.schemas import ErrorDetail, ErrorResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Погрешность сравнения float (накопление интервалов)
+_EPSILON = 1e-6
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Лимит limit запросов за window секунд для путей, подходящих под pattern"""
+    name: str
+    limit: int
+    window: int
+    pattern: Pattern[str]
+
+    @property
+    def interval(self) -> float:
+        """Интервал между запросами при равномерной нагрузке"""
+        return self.window / self.limit
+
+    @property
+    def tolerance(self) -> float:
+        """Допустимый всплеск: limit запросов подряд"""
+        return self.window - self.interval
+
+    def matches(self, path: str) -> bool:
+        return self.pattern.match(path) is not None
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+def _gcra(tat: Optional[float], now: float, interval: float, tolerance: float) -> Tuple[RateLimitResult, Optional[float]]:
+    """Один шаг GCRA. Возвращает результат и новый TAT (None если запрос отклонен)"""
+    tat = max(tat if tat is not None else now, now)
+    diff = tat - now
+    if diff > tolerance + _EPSILON:
+        return RateLimitResult(allowed=False, remaining=0, retry_after=diff - tolerance), None
+    remaining = int((tolerance - diff) / interval + _EPSILON)
+    return RateLimitResult(allowed=True, remaining=remaining, retry_after=0.0), tat + interval
+
+
+class RateLimitBackend(ABC):
+    """Хранилище TAT"""
+
+    @abstractmethod
+    async def hit(self, key: str, interval: float, tolerance: float) -> RateLimitResult:
+        """Учесть запрос по ключу: один шаг GCRA"""
+
+    def clear(self) -> None:
+        """Сбросить локальное состояние (используется в тестах)"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Лимиты в памяти процесса - каждый воркер считает свои запросы"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    async def hit(self, key: str, interval: float, tolerance: float) -> RateLimitResult:
+        # Без await внутри - атомарно в рамках event loop
+        now = time.monotonic()
+        result, new_tat = _gcra(self._tats.get(key), now, interval, tolerance)
+        if new_tat is not None:
+            if key not in self._tats and len(self._tats) >= self.max_keys:
+                self._evict(now)
+            self._tats[key] = new_tat
+        return result
+
+    def clear(self) -> None:
+        self._tats.clear()
+
+    def _evict(self, now: float) -> None:
+        """Удалить ключи, у которых лимит уже полностью восстановился"""
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        if len(self._tats) >= self.max_keys:
+            # Все ключи активны - жертвуем самыми старыми
+            for key in list(self._tats)[: len(self._tats) // 10 or 1]:
+                del self._tats[key]
+
+
+# TAT хранится строкой: Redis обрезает дробные числа из Lua до целых
+_GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local epsilon = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local diff = tat - now
+if diff > tolerance + epsilon then
+  return {0, tostring(diff - tolerance)}
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(tolerance - diff)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Общие лимиты в Redis для нескольких воркеров/инстансов
+
+    Шаг GCRA выполняется Lua-скриптом атомарно, время берется с сервера Redis,
+    чтобы расхождение часов между инстансами не влияло на лимит.
+    При недоступности Redis запросы пропускаются (fail open).
+    """
+
+    def __init__(self, client, key_prefix: str = "felend:ratelimit:"):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(_GCRA_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        import redis.asyncio as redis  # опциональная зависимость
+
+        return cls(redis.from_url(url))
+
+    async def hit(self, key: str, interval: float, tolerance: float) -> RateLimitResult:
+        try:
+            allowed, value = await self._script(
+                keys=[self.key_prefix + key], args=[interval, tolerance, _EPSILON]
+            )
+        except Exception as exc:
+            logger.warning(f"Rate limit backend unavailable, request allowed: {exc}")
+            return RateLimitResult(allowed=True, remaining=0, retry_after=0.0)
+
+        value = float(value)
+        if not allowed:
+            return RateLimitResult(allowed=False, remaining=0, retry_after=value)
+        return RateLimitResult(allowed=True, remaining=int(value / interval + _EPSILON), retry_after=0.0)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware ограничения частоты запросов
+
+    Для запроса выбирается первая подходящая политика, ключ - имя политики + IP
+    клиента (за прокси - из X-Forwarded-For, см. app.core.client_ip). При
+    превышении лимита возвращается 429 с заголовком Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: RateLimitBackend,
+        policies: List[RateLimitPolicy],
+        trusted_proxy_hops: Optional[int] = None,
+    ):
+        self.app = app
+        self.backend = backend
+        self.policies = policies
+        self.trusted_proxy_hops = trusted_proxy_hops
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        policy = next((p for p in self.policies if p.matches(path)), None)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = get_client_ip(scope, self.trusted_proxy_hops)
+        result = await self.backend.hit(f"{policy.name}:{client_ip}", policy.interval, policy.tolerance)
+        if result.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = max(1, math.ceil(result.retry_after))
+        logger.warning(
+            f"Rate limit exceeded: {policy.name} {client_ip} {path}",
+            extra={"policy": policy.name, "client_ip": client_ip, "path": path, "event": "rate_limited"}
+        )
+        exc = RateLimitExceededException(retry_after, policy.name)
+        error_detail = ErrorDetail(
+            message=exc.message,
+            code=exc.error_code,
+            type=type(exc).__name__,
+            details=exc.context,
+            timestamp=datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            path=path
+        )
+        response = JSONResponse(
+            status_code=exc.status_code,
+            content=ErrorResponse(error=error_detail).model_dump(),
+            headers={
+                "Retry-After": str(retry_after),
+                "X-RateLimit-Limit": str(policy.limit),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+        await response(scope, receive, send)
+
+
+def default_policies() -> List[RateLimitPolicy]:
+    """Политики из настроек: от самой строгой к общей"""
+    return [
+        RateLimitPolicy(
+            name="verify",
+            limit=settings.RATE_LIMIT_VERIFY_REQUESTS,
+            window=settings.RATE_LIMIT_VERIFY_WINDOW,
+            pattern=re.compile(r"^/api/v1/(surveys|participation)/[^/]+/verify/?$"),
+        ),
+        RateLimitPolicy(
+            name="auth",
+            limit=settings.RATE_LIMIT_AUTH_REQUESTS,
+            window=settings.RATE_LIMIT_AUTH_WINDOW,
+            pattern=re.compile(r"^/api/v1/auth/"),
+        ),
+        RateLimitPolicy(
+            name="default",
+            limit=settings.RATE_LIMIT_REQUESTS,
+            window=settings.RATE_LIMIT_WINDOW,
+            pattern=re.compile(r"^/api/"),
+        ),
+    ]
+
+
+def create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend.from_url(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+
+# Singleton instance
+rate_limit_backend = create_backend()
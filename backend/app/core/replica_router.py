@@ -0,0 +1,276 @@
+"""
+Маршрутизация read-only запросов на реплики БД
+
+Read-only эндпоинты получают сессию реплики (round-robin среди здоровых).
+Реплика исключается из ротации, если не прошла health check, отстает больше
+DB_REPLICA_MAX_LAG_SECONDS или при ошибке соединения во время запроса.
+Если здоровых реплик нет, чтение идет в primary.
+
+Read-your-writes: после commit с изменениями в primary сессии запроса ответ
+получает заголовок X-DB-Pin-Until (unix-время, now + DB_REPLICA_PIN_SECONDS).
+Клиент повторяет его в запросах, и пока срок не вышел, его чтения идут в
+primary. Закрепление хранится у клиента, поэтому работает при любом числе
+инстансов и воркеров, а сервер не держит состояние по клиентам.
+
+Локально реплику можно имитировать второй базой: DB_REPLICA_URLS=sqlite:///./replica.db
+"""
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.db_pool import PoolMetrics, configure_pool, engine_options
+
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики PostgreSQL в секундах (0, если все полученное WAL применено)
+REPLICA_LAG_QUERY = text(
+    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+# Заголовок ответа и запроса: unix-время, до которого чтения клиента идут в primary
+PIN_HEADER = "X-DB-Pin-Until"
+_WROTE_INFO = "replica_pin_wrote"
+# Допустимое расхождение часов инстансов при проверке срока из заголовка
+_CLOCK_SKEW_SECONDS = 5.0
+
+
+@dataclass
+class RequestPin:
+    """Закрепление за primary в рамках HTTP запроса"""
+    requested_until: Optional[float] = None  # из заголовка запроса
+    written_until: Optional[float] = None  # запрос записал в primary - отдается клиенту
+
+
+request_pin: ContextVar[Optional[RequestPin]] = ContextVar("replica_request_pin", default=None)
+
+
+@dataclass
+class Replica:
+    """Реплика: engine, фабрика сессий и состояние здоровья"""
+    name: str
+    engine: Engine
+    session_factory: sessionmaker
+    metrics: PoolMetrics
+    healthy: bool = True
+    lag_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """
+    Выбор сессии для чтения: реплика (round-robin) или primary
+
+    Args:
+        replica_urls: URL реплик (пустой список - все чтения идут в primary)
+        max_lag_seconds: Допустимое отставание реплики
+        pin_seconds: Время закрепления клиента за primary после записи
+    """
+
+    def __init__(self, replica_urls: List[str], max_lag_seconds: float, pin_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.pin_seconds = pin_seconds
+        self.replicas = [self._create_replica(i, url) for i, url in enumerate(replica_urls)]
+        self._round_robin = itertools.count()
+        self.primary_fallbacks = 0
+        self.pinned_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _create_replica(self, index: int, url: str) -> Replica:
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        options = engine_options(url)
+        if connect_args:
+            options["connect_args"] = connect_args
+        engine = create_engine(url, **options)
+        metrics = PoolMetrics(f"replica{index}")
+        configure_pool(engine, metrics)
+        replica = Replica(
+            name=f"replica{index}",
+            engine=engine,
+            session_factory=sessionmaker(autocommit=False, autoflush=False, bind=engine),
+            metrics=metrics,
+        )
+
+        @event.listens_for(engine, "handle_error")
+        def on_error(context):
+            # Обрыв соединения во время запроса - исключаем реплику до следующей проверки
+            if context.is_disconnect:
+                self._mark_unhealthy(replica, str(context.original_exception))
+
+        return replica
+
+    def pin_primary(self) -> None:
+        """Закрепить клиента текущего запроса за primary на pin_seconds (заголовок ответа)"""
+        pin = request_pin.get()
+        if pin is None or not self.enabled or self.pin_seconds <= 0:
+            return
+        pin.written_until = time.time() + self.pin_seconds
+
+    def is_pinned(self) -> bool:
+        """Читает ли клиент текущего запроса из primary"""
+        pin = request_pin.get()
+        if pin is None:
+            return False
+        if pin.written_until is not None:
+            return True
+        if pin.requested_until is None:
+            return False
+        now = time.time()
+        # Срок дальше, чем мог выдать сервер, не продлевает закрепление
+        return now < pin.requested_until <= now + self.pin_seconds + _CLOCK_SKEW_SECONDS
+
+    def read_session(self) -> Optional[Session]:
+        """
+        Сессия здоровой реплики для чтения
+
+        Returns:
+            Optional[Session]: None - читать из primary (реплик нет, все нездоровы
+            или клиент недавно писал)
+        """
+        if not self.enabled:
+            return None
+        if self.is_pinned():
+            self.pinned_reads += 1
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_fallbacks += 1
+            return None
+        replica = healthy[next(self._round_robin) % len(healthy)]
+        return replica.session_factory()
+
+    def check_health(self) -> Dict[str, bool]:
+        """Проверить все реплики (SELECT 1 и отставание для PostgreSQL)"""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    if replica.engine.dialect.name == "postgresql":
+                        replica.lag_seconds = float(conn.execute(REPLICA_LAG_QUERY).scalar() or 0)
+            except Exception as e:
+                self._mark_unhealthy(replica, str(e))
+                continue
+
+            if replica.lag_seconds is not None and replica.lag_seconds > self.max_lag_seconds:
+                self._mark_unhealthy(replica, f"replication lag {replica.lag_seconds:.1f}s")
+            elif not replica.healthy:
+                replica.healthy = True
+                replica.last_error = None
+                logger.info(f"DB {replica.name} is healthy again")
+        return {replica.name: replica.healthy for replica in self.replicas}
+
+    def _mark_unhealthy(self, replica: Replica, error: str) -> None:
+        if replica.healthy:
+            logger.warning(f"DB {replica.name} removed from rotation: {error}")
+        replica.healthy = False
+        replica.last_error = error
+
+    def stats(self) -> Dict[str, Any]:
+        """Снимок состояния реплик"""
+        return {
+            "pinned_reads": self.pinned_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": {
+                replica.name: {
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "last_error": replica.last_error,
+                    "pool": replica.metrics.stats(),
+                }
+                for replica in self.replicas
+            },
+        }
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+# Singleton instance
+replica_router = ReplicaRouter(
+    replica_urls=settings.replica_urls_list,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    pin_seconds=settings.DB_REPLICA_PIN_SECONDS,
+)
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware read-your-writes
+
+    Читает X-DB-Pin-Until запроса и, если запрос записал в primary, отдает
+    клиенту новый срок закрепления в заголовке ответа.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pin = RequestPin(requested_until=_parse_pin(Headers(scope=scope).get(PIN_HEADER)))
+        token = request_pin.set(pin)
+
+        async def send_with_pin(message: Message) -> None:
+            if message["type"] == "http.response.start" and pin.written_until is not None:
+                MutableHeaders(scope=message).append(PIN_HEADER, f"{pin.written_until:.3f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            request_pin.reset(token)
+
+
+def _parse_pin(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _in_request() -> bool:
+    return request_pin.get() is not None
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, flush_context) -> None:
+    if _in_request():
+        session.info[_WROTE_INFO] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state) -> None:
+    # UPDATE/DELETE через db.execute() не проходят через flush
+    session = orm_execute_state.session
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and _in_request():
+        session.info[_WROTE_INFO] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session: Session) -> None:
+    """После commit с изменениями закрепить клиента за primary"""
+    if session.info.pop(_WROTE_INFO, False):
+        replica_router.pin_primary()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_write_mark(session: Session) -> None:
+    session.info.pop(_WROTE_INFO, None)
@@ -0,0 +1,63 @@
+"""
+Быстрая сериализация ответов (orjson)
+
+FastJSONResponse - класс ответа приложения по умолчанию. Кроме обычного
+JSON-совместимого содержимого умеет сериализовать Pydantic модели напрямую
+(без model_dump): списочные эндпоинты возвращают FastJSONResponse со строками,
+которые сервис уже собрал как модели. Такой ответ FastAPI не валидирует
+повторно по response_model - response_model остается для схемы OpenAPI.
+
+Строки собираются обычными конструкторами моделей, а не model_construct:
+в pydantic 2 валидация выполняется в Rust и быстрее, чем model_construct на
+Python (см. scripts/bench_serialization.py).
+"""
+from functools import lru_cache
+from typing import Any, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+@lru_cache(maxsize=None)
+def _is_plain_model(model: Type[BaseModel]) -> bool:
+    """JSON модели - значения ее полей: нет алиасов, исключений, сериализаторов и вычисляемых полей"""
+    decorators = model.__pydantic_decorators__
+    return (
+        not decorators.field_serializers
+        and not decorators.model_serializers
+        and not model.model_computed_fields
+        and model.model_config.get("extra") != "allow"
+        and all(
+            field.alias is None and field.serialization_alias is None and not field.exclude
+            for field in model.model_fields.values()
+        )
+    )
+
+
+def _default(obj: Any) -> Any:
+    """
+    Сериализация типов, которые orjson не знает: только Pydantic модели
+
+    Остальные объекты (ORM модели и т.п.) - TypeError, а не их __dict__.
+    """
+    if isinstance(obj, BaseModel):
+        if _is_plain_model(type(obj)):
+            # __dict__ Pydantic модели - ровно значения объявленных полей
+            return obj.__dict__
+        return obj.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse на orjson; принимает Pydantic модели и списки моделей"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -3,6 +3,7 @@ from typing import Optional, Any
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
+import re
 import secrets
 import string
 
@@ -21,8 +22,6 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    print('Hashing password...')
-    print(f'Password: {password}')
     """Хеширование пароля"""
     return pwd_context.hash(password)
 
@@ -60,6 +59,10 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
         return None
 
 
+# Формат generate_respondent_code: по нему код ищется в ответах Google Forms
+RESPONDENT_CODE_PATTERN = re.compile(r"RESP_\d{9}", re.IGNORECASE)
+
+
 def generate_respondent_code(user_id: int) -> str:
     """Генерация уникального кода респондента"""
     return f"RESP_{user_id:09d}"
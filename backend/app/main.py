@@ -1,21 +1,37 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError
+import hmac
 import time
 import logging
 
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core import database
+from app.core.db_pool import async_db_pool_metrics, db_pool_metrics
+from app.core.background_jobs import PeriodicJob, background_jobs
 from app.core.exceptions import FelendException
-from app.core.middleware import error_handling_middleware
+from app.core.logging_config import logging_pipeline, setup_logging
+from app.core.metrics import METRICS_CONTENT_TYPE, mark_process_dead, render_metrics
+from app.core.middleware import RequestContextMiddleware
+from app.core.password_hashing import password_hasher
+from app.core.rate_limit import RateLimitMiddleware, default_policies, rate_limit_backend
+from app.core.replica_router import PIN_HEADER, ReadYourWritesMiddleware, replica_router
+from app.core.responses import FastJSONResponse
 from app.core.error_handlers import (
     felend_exception_handler,
     validation_exception_handler,
     integrity_error_handler
 )
+from app.services.maintenance_service import MaintenanceService
+from app.services.participation_service import ParticipationService
+from app.services.email_delivery_service import EmailDeliveryService, smtp_connection
+from app.services.email_service import EmailService
 from app.api.v1 import (
     auth,
     google_auth,
@@ -27,10 +43,47 @@ from app.api.v1 import (
 )
 
 # Настройка логирования
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
+# Фоновые задачи
+background_jobs.add(PeriodicJob(
+    name="maintenance_purge",
+    func=lambda db: MaintenanceService(db).purge_expired(),
+    interval_seconds=settings.MAINTENANCE_INTERVAL_SECONDS,
+))
+background_jobs.add(PeriodicJob(
+    name="reservation_sweep",
+    func=lambda db: ParticipationService(db).release_expired_reservations(),
+    interval_seconds=settings.SURVEY_RESERVATION_SWEEP_SECONDS,
+))
+background_jobs.add(PeriodicJob(
+    name=EmailService.OUTBOX_JOB_NAME,
+    func=lambda db: EmailDeliveryService(db, smtp_connection).deliver_pending(),
+    interval_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+))
+if replica_router.enabled:
+    background_jobs.add(PeriodicJob(
+        name="replica_health",
+        func=lambda db: replica_router.check_health(),
+        interval_seconds=settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
+    ))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых ресурсов приложения"""
+    if settings.BACKGROUND_JOBS_ENABLED:
+        background_jobs.start()
+    yield
+    await background_jobs.stop()
+    smtp_connection.close()
+    replica_router.dispose()
+    password_hasher.shutdown()
+    mark_process_dead()
+
+
 # Создание FastAPI приложения
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -38,9 +91,20 @@ app = FastAPI(
     description="API for the Felend survey exchange platform",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 
+# Rate limiting (добавляется до CORS, чтобы ответы 429 получали CORS заголовки)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, backend=rate_limit_backend, policies=default_policies())
+
+
+# Read-your-writes для реплик: срок закрепления за primary в X-DB-Pin-Until
+app.add_middleware(ReadYourWritesMiddleware)
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -48,13 +112,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PIN_HEADER],
 )
 
 
-# Добавляем middleware для обработки ошибок
-@app.middleware("http")
-async def add_error_handling(request, call_next):
-    return await error_handling_middleware(request, call_next)
+# Request id, логирование, метрики и обработка ошибок (внешний слой - добавляется последним)
+app.add_middleware(RequestContextMiddleware)
 
 
 app.add_exception_handler(FelendException, felend_exception_handler) # type: ignore
@@ -65,10 +128,11 @@ app.add_exception_handler(IntegrityError, integrity_error_handler) # type: ignor
 # Подключение роутеров
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
+# participation раньше surveys: иначе GET /surveys/my-responses попадает в /surveys/{survey_id}
+app.include_router(participation.router, prefix="/api/v1")
 app.include_router(surveys.router, prefix="/api/v1")
 app.include_router(google_auth.router, prefix="/api/v1")
 app.include_router(google_accounts.router, prefix="/api/v1")
-app.include_router(participation.router, prefix="/api/v1")
 app.include_router(categories.router, prefix="/api/v1")
 
 
@@ -80,10 +144,43 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check эндпоинт"""
+    """Health check эндпоинт (без внутренних подробностей - он публичный)"""
     return {"status": "healthy", "timestamp": time.time()}
 
 
+def require_metrics_token(request: Request) -> None:
+    """Доступ к служебным эндпоинтам только с METRICS_TOKEN; выключенные - 404"""
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/health/details", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def health_details():
+    """Снимок пулов соединений, пула bcrypt, реплик и очереди логирования"""
+    pools = {"sync": db_pool_metrics.stats()}
+    if database.async_engine is not None:
+        pools["async"] = async_db_pool_metrics.stats()
+    health = {"status": "healthy", "timestamp": time.time(), "db_pool": pools}
+    health["password_hashing"] = password_hasher.stats()
+    if replica_router.enabled:
+        health["db_replicas"] = replica_router.stats()
+    health["logging"] = logging_pipeline.stats()
+    return health
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON, Table
+from sqlalchemy import BigInteger, Column, Date, Float, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON, Table, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime, timezone
 
 class TransactionType(enum.Enum):
     EARNED = "earned"  # получил баллы за прохождение опроса
@@ -25,6 +25,24 @@ class VerificationType(str, enum.Enum):
     password_reset = "password_reset"          # сброс пароля
 
 
+class QuestionKind(str, enum.Enum):
+    """Тип вопроса формы в каталоге (определяет, как кодируются ответы)"""
+    choice = "choice"      # один вариант (radio, dropdown, строка сетки) -> SurveyAnswer.choice
+    checkbox = "checkbox"  # несколько вариантов -> строка SurveyAnswer на каждый выбранный
+    scale = "scale"        # шкала или рейтинг -> SurveyAnswer.number
+    text = "text"          # свободный ответ -> SurveyAnswer.text
+    date = "date"          # дата -> number (дней от 1970-01-01) + text
+    time = "time"          # время -> number (секунд от полуночи) + text
+    other = "other"        # загрузка файлов и прочее - ответы не сохраняются
+
+
+class EmailOutboxStatus(str, enum.Enum):
+    """Статус письма в очереди отправки"""
+    pending = "pending"  # ждет отправки (или повторной попытки)
+    sent = "sent"        # отправлено
+    failed = "failed"    # попытки исчерпаны или адрес отклонен
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -85,6 +103,10 @@ class GoogleAccount(Base):
     # Связи
     user = relationship("User", back_populates="google_accounts")
     surveys = relationship("Survey", back_populates="google_account")
+    
+    __table_args__ = (
+        Index("ix_google_account_user_id_is_primary", "user_id", "is_primary"),
+    )
 
 
 # Association table для many-to-many связи между Survey и Category
@@ -149,7 +171,11 @@ class Survey(Base):
     # Статистика
     total_responses: Mapped[int] = mapped_column(Integer, default=0)  # общее количество ответов
     responses_needed: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # желаемое количество ответов
+    reserved_slots: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")  # слоты, занятые начатыми, но не засчитанными ответами
     last_reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # когда в последний раз проверяли форму
+    last_synced_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # когда закончилась последняя синхронизация ответов
+    sync_watermark: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # самое позднее время отправки среди синхронизированных ответов
+    last_sync_attempt_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # когда началась последняя синхронизация по промаху (в том числе неудачная)
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -163,6 +189,11 @@ class Survey(Base):
         secondary=survey_categories,
         back_populates="surveys"
     )
+    
+    __table_args__ = (
+        Index("ix_surveys_status_created_at", "status", "created_at"),  # лента
+        Index("ix_surveys_google_account_id_created_at", "google_account_id", "created_at"),  # мои опросы
+    )
 
 
 class SurveyResponse(Base):
@@ -183,10 +214,82 @@ class SurveyResponse(Base):
     # Временные метки
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())  # когда начал участие
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # когда завершил и получил баллы
+    reserved_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # до какого момента держится слот опроса (NULL - слота нет)
     
     # Связи
     survey = relationship("Survey", back_populates="responses")
     respondent = relationship("User", back_populates="survey_responses")
+    
+    __table_args__ = (
+        Index("ix_survey_responses_survey_id_respondent_id", "survey_id", "respondent_id"),  # участие
+        # мои ответы: ORDER BY started_at DESC, id DESC с keyset курсором
+        Index("ix_survey_responses_respondent_id_started_at_id", "respondent_id", text("started_at DESC"), text("id DESC")),
+        # возврат истекших слотов: в индексе только ответы, держащие слот
+        Index(
+            "ix_survey_responses_reserved_until", "reserved_until",
+            postgresql_where=text("reserved_until IS NOT NULL"),
+            sqlite_where=text("reserved_until IS NOT NULL"),
+        ),
+    )
+
+
+class SyncedFormResponse(Base):
+    """Ответ Google Forms, загруженный синхронизацией (индекс для подтверждения участия)"""
+    __tablename__ = "synced_form_responses"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    survey_id: Mapped[int] = mapped_column(Integer, ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    google_response_id: Mapped[str] = mapped_column(String(255), nullable=False)  # responseId в Google Forms
+    respondent_email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # respondentEmail в нижнем регистре
+    respondent_code: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # код респондента из ответов формы
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # lastSubmittedTime
+    synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_synced_form_responses_survey_id_google_response_id", "survey_id", "google_response_id", unique=True),
+        # поиск ответа участника при подтверждении
+        Index("ix_synced_form_responses_survey_id_respondent_email", "survey_id", "respondent_email"),
+        Index("ix_synced_form_responses_survey_id_respondent_code", "survey_id", "respondent_code"),
+    )
+
+
+class SurveyQuestion(Base):
+    """Вопрос формы в каталоге опроса; код варианта ответа - его индекс в options"""
+    __tablename__ = "survey_questions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    survey_id: Mapped[int] = mapped_column(Integer, ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    google_question_id: Mapped[str] = mapped_column(String(64), nullable=False)  # questionId в Google Forms
+    position: Mapped[int] = mapped_column(Integer, nullable=False)  # порядок в форме
+    title: Mapped[str] = mapped_column(String(1000), nullable=False)  # для строки сетки - "вопрос: строка"
+    kind: Mapped[QuestionKind] = mapped_column(SQLEnum(QuestionKind), nullable=False)
+    options: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)  # варианты choice/checkbox; новые только дописываются в конец
+    has_other: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)  # есть вариант "Другое"
+    required: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index("ix_survey_questions_survey_id_google_question_id", "survey_id", "google_question_id", unique=True),
+    )
+
+
+class SurveyAnswer(Base):
+    """Ответ на вопрос в синхронизированном ответе формы (для checkbox - строка на вариант)"""
+    __tablename__ = "survey_answers"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    survey_id: Mapped[int] = mapped_column(Integer, ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    question_id: Mapped[int] = mapped_column(Integer, ForeignKey("survey_questions.id"), nullable=False)
+    synced_response_id: Mapped[int] = mapped_column(Integer, ForeignKey("synced_form_responses.id"), nullable=False)
+    choice: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # индекс в SurveyQuestion.options, -1 - "Другое"
+    number: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # шкала, дата, время
+    text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # свободный ответ или текст "Другое"
+
+    __table_args__ = (
+        # аналитика читает ответы опроса по вопросам
+        Index("ix_survey_answers_survey_id_question_id", "survey_id", "question_id", "synced_response_id"),
+        # перекодирование отредактированного ответа
+        Index("ix_survey_answers_synced_response_id", "synced_response_id"),
+    )
 
 
 class BalanceTransaction(Base):
@@ -199,11 +302,44 @@ class BalanceTransaction(Base):
     balance_after: Mapped[int] = mapped_column(Integer, nullable=False)  # баланс после транзакции
     description: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # описание транзакции
     related_survey_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("surveys.id"), nullable=True)  # связанный опрос
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Время ставит приложение при вставке: по нему же считается месяц в balance_rollups
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
     
     # Связи
     user = relationship("User", back_populates="transactions")
     related_survey = relationship("Survey")
+    
+    __table_args__ = (
+        # история транзакций: ORDER BY created_at DESC, id DESC с keyset курсором
+        Index("ix_balance_transactions_user_id_created_at_id", "user_id", text("created_at DESC"), text("id DESC")),
+    )
+
+
+class BalanceRollup(Base):
+    """Месячные итоги журнала транзакций по типу (ведутся при каждой вставке BalanceTransaction)"""
+    __tablename__ = "balance_rollups"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)  # первый день месяца (UTC)
+    transaction_type: Mapped[TransactionType] = mapped_column(SQLEnum(TransactionType), primary_key=True)
+    transactions_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    amount_total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)  # сумма amount (траты отрицательные)
+
+
+class BalanceRollupCutoff(Base):
+    """
+    Граница заполнения balance_rollups (одна строка)
+
+    Транзакции с id <= transaction_id учтены заполнением по истории, все
+    последующие - приложением при вставке. Пока строки нет, итоги не ведутся.
+    """
+    __tablename__ = "balance_rollup_cutoff"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    transaction_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class EmailVerification(Base):
@@ -220,7 +356,7 @@ class EmailVerification(Base):
     verification_token: Mapped[str] = mapped_column(String(36), unique=True, index=True, nullable=False)  # UUID4
     verification_code: Mapped[Optional[str]] = mapped_column(String(6), nullable=True)  # 6-значный код
     code_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # код действителен 15 минут
-    token_expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # токен действителен 24 часа
+    token_expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)  # токен действителен 24 часа
     is_used: Mapped[bool] = mapped_column(Boolean, default=False)  # был ли использован для успешной верификации
     attempts: Mapped[int] = mapped_column(Integer, default=0)  # количество неудачных попыток ввода кода
     last_code_sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # для rate limiting
@@ -245,8 +381,33 @@ class OAuthTemporaryToken(Base):
     token: Mapped[str] = mapped_column(String(36), unique=True, index=True, nullable=False)  # UUID4
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     is_used: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # TTL 5 минут
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)  # TTL 5 минут
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Связь с пользователем
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+
+class EmailOutbox(Base):
+    """Очередь исходящих писем: API только добавляет запись, отправляет фоновый воркер"""
+    __tablename__ = "email_outbox"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body_text: Mapped[str] = mapped_column(Text, nullable=False)
+    body_html: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    status: Mapped[EmailOutboxStatus] = mapped_column(
+        SQLEnum(EmailOutboxStatus),
+        nullable=False,
+        default=EmailOutboxStatus.pending
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # также lease при захвате воркером
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,105 @@
+from typing import Generic, Type, Optional, List, Any, Dict
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.repositories.base_repository import ModelType, CreateSchemaType, UpdateSchemaType
+
+
+class AsyncBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Базовый async репозиторий с CRUD операциями (AsyncSession)
+
+        Повторяет интерфейс BaseRepository. Связи моделей в async режиме не
+        догружаются лениво - их нужно загружать явно (selectinload/joinedload).
+
+        Args:
+            model: SQLAlchemy модель
+        """
+        self.model = model
+
+    def _apply_filters(self, query: Select, filters: Optional[Dict[str, Any]]) -> Select:
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key):
+                    if isinstance(value, list):
+                        query = query.where(getattr(self.model, key).in_(value))
+                    else:
+                        query = query.where(getattr(self.model, key) == value)
+        return query
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Получить объект по ID"""
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None
+    ) -> List[ModelType]:
+        """Получить список объектов с фильтрами и пагинацией"""
+        query = self._apply_filters(select(self.model), filters)
+
+        if order_by and hasattr(self.model, order_by):
+            query = query.order_by(getattr(self.model, order_by))
+
+        result = await db.scalars(query.offset(skip).limit(limit))
+        return list(result.all())
+
+    async def count(self, db: AsyncSession, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Подсчет количества записей с фильтрами"""
+        query = self._apply_filters(select(func.count()).select_from(self.model), filters)
+        return await db.scalar(query)
+
+    async def create(self, db: AsyncSession, obj_in: CreateSchemaType) -> ModelType:
+        """Создать новый объект"""
+        db_obj = self.model(**obj_in.model_dump())
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: ModelType,
+        obj_in: UpdateSchemaType | Dict[str, Any]
+    ) -> ModelType:
+        """Обновить существующий объект"""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        for field, value in update_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Удалить объект по ID"""
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+    async def get_by_field(self, db: AsyncSession, field_name: str, value: Any) -> Optional[ModelType]:
+        """Получить объект по значению поля"""
+        if hasattr(self.model, field_name):
+            return await db.scalar(
+                select(self.model).where(getattr(self.model, field_name) == value).limit(1)
+            )
+        return None
+
+    async def exists(self, db: AsyncSession, id: Any) -> bool:
+        """Проверить существование объекта по ID"""
+        return await db.scalar(select(self.model.id).where(self.model.id == id)) is not None
@@ -0,0 +1,228 @@
+"""
+Repository для месячных итогов журнала транзакций (balance_rollups)
+
+Строка на (user_id, month, transaction_type) с количеством и суммой
+транзакций. Итоги обновляются в той же транзакции БД, что и вставка в
+balance_transactions (событие after_flush сессии), поэтому сводка баланса и
+история начислений читают несколько строк итогов вместо всей истории.
+
+Событие видит только объекты BalanceTransaction, добавленные в сессию:
+Core insert(BalanceTransaction) (в том числе через Session.execute) и SQL в
+обход ORM итоги не обновляют - такие вставки нужно учитывать вручную (apply).
+
+Историю до включения итогов заполняет backfill без остановки приложения: он
+фиксирует границу (balance_rollup_cutoff) - максимальный id журнала - и
+учитывает транзакции до нее, а все последующие учитывает событие. Пока граница
+не записана, событие ничего не делает, а чтения считают итоги по журналу.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, event, func, insert, select, text, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models import BalanceRollup, BalanceRollupCutoff, BalanceTransaction, TransactionType
+
+RollupKey = Tuple[int, date, TransactionType]
+
+# id единственной строки balance_rollup_cutoff
+_CUTOFF_ROW_ID = 1
+
+# Диалекты с INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _month_column(dialect_name: str):
+    """Месяц транзакции (первый день, UTC) в SQL"""
+    if dialect_name == "sqlite":
+        return type_coerce(func.date(BalanceTransaction.created_at, "start of month"), Date)
+    return func.date(func.date_trunc("month", func.timezone("UTC", BalanceTransaction.created_at)))
+
+
+def month_start(moment: datetime) -> date:
+    """Первый день месяца момента (UTC; naive время считается UTC)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date().replace(day=1)
+
+
+class BalanceRollupRepository:
+    """Репозиторий итогов баланса"""
+
+    def __init__(self):
+        # Граница заполнения после записи не меняется - читаем ее из БД, пока не появится
+        self._cutoff: Optional[int] = None
+
+    def get_cutoff(self, connection: Connection) -> Optional[int]:
+        """id последней транзакции, учтенной заполнением (None - заполнения еще не было)"""
+        if self._cutoff is None:
+            self._cutoff = self._read_cutoff(connection)
+        return self._cutoff
+
+    @staticmethod
+    def _read_cutoff(connection: Connection) -> Optional[int]:
+        return connection.scalar(
+            select(BalanceRollupCutoff.transaction_id).where(BalanceRollupCutoff.id == _CUTOFF_ROW_ID)
+        )
+
+    def reset_cutoff(self) -> None:
+        """Забыть закэшированную границу (другая БД, тесты)"""
+        self._cutoff = None
+
+    def backfill(self, connection: Connection) -> Optional[int]:
+        """
+        Заполнить итоги по истории журнала и записать границу
+
+        В PostgreSQL на время заполнения берется SHARE блокировка
+        balance_transactions: вставки ждут несколько секунд, а транзакции,
+        которые уже вставили строки (и не учли их, т.к. границы еще нет),
+        успевают завершиться и попадают в заполнение. Все, что вставлено после,
+        учитывает событие after_flush. Приложение при этом не останавливается,
+        но старые версии без события должны быть уже выключены.
+
+        Returns:
+            Optional[int]: Граница (максимальный учтенный id); None - уже заполнено
+        """
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("LOCK TABLE balance_transactions IN SHARE MODE"))
+        if self._read_cutoff(connection) is not None:
+            return None
+        cutoff = connection.scalar(select(func.coalesce(func.max(BalanceTransaction.id), 0)))
+        ledger = self._ledger_totals(connection.dialect.name).where(BalanceTransaction.id <= cutoff)
+        connection.execute(
+            insert(BalanceRollup.__table__).from_select(
+                ["user_id", "month", "transaction_type", "transactions_count", "amount_total"], ledger
+            )
+        )
+        connection.execute(insert(BalanceRollupCutoff.__table__).values(id=_CUTOFF_ROW_ID, transaction_id=cutoff))
+        return cutoff
+
+    @staticmethod
+    def _ledger_totals(dialect_name: str) -> Select:
+        """Итоги, посчитанные по журналу: (user_id, month, type, count, sum)"""
+        month = _month_column(dialect_name)
+        return (
+            select(
+                BalanceTransaction.user_id,
+                month,
+                BalanceTransaction.transaction_type,
+                func.count(),
+                func.sum(BalanceTransaction.amount),
+            )
+            .group_by(BalanceTransaction.user_id, month, BalanceTransaction.transaction_type)
+        )
+
+    def apply(self, connection: Connection, deltas: Dict[RollupKey, Sequence[int]]) -> None:
+        """Прибавить (count, amount) к итогам; отсутствующие строки создаются"""
+        if not deltas:
+            return
+        rows = [
+            {
+                "user_id": user_id,
+                "month": month,
+                "transaction_type": transaction_type,
+                "transactions_count": count,
+                "amount_total": amount,
+            }
+            for (user_id, month, transaction_type), (count, amount) in deltas.items()
+        ]
+        table = BalanceRollup.__table__
+        dialect_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(table)
+            connection.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c.user_id, table.c.month, table.c.transaction_type],
+                    set_={
+                        "transactions_count": table.c.transactions_count + stmt.excluded.transactions_count,
+                        "amount_total": table.c.amount_total + stmt.excluded.amount_total,
+                    },
+                ),
+                rows,
+            )
+            return
+
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(
+                    table.c.user_id == row["user_id"],
+                    table.c.month == row["month"],
+                    table.c.transaction_type == row["transaction_type"],
+                )
+                .values(
+                    transactions_count=table.c.transactions_count + row["transactions_count"],
+                    amount_total=table.c.amount_total + row["amount_total"],
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table), row)
+
+    def get_totals(self, db: Session, user_id: int) -> Dict[TransactionType, Tuple[int, int]]:
+        """Итоги пользователя за все время: тип -> (количество, сумма)"""
+        if self.get_cutoff(db.connection()) is None:
+            rows = db.execute(
+                select(BalanceTransaction.transaction_type, func.count(), func.sum(BalanceTransaction.amount))
+                .where(BalanceTransaction.user_id == user_id)
+                .group_by(BalanceTransaction.transaction_type)
+            ).all()
+            return {transaction_type: (int(count), int(amount)) for transaction_type, count, amount in rows}
+        rows = db.execute(
+            select(
+                BalanceRollup.transaction_type,
+                func.sum(BalanceRollup.transactions_count),
+                func.sum(BalanceRollup.amount_total),
+            )
+            .where(BalanceRollup.user_id == user_id)
+            .group_by(BalanceRollup.transaction_type)
+        ).all()
+        return {transaction_type: (int(count), int(amount)) for transaction_type, count, amount in rows}
+
+    def get_monthly(self, db: Session, user_id: int, since: date) -> List[BalanceRollup]:
+        """Итоги по месяцам начиная с since (новые месяцы первыми)"""
+        if self.get_cutoff(db.connection()) is None:
+            ledger = self._ledger_totals(db.get_bind().dialect.name).where(
+                BalanceTransaction.user_id == user_id,
+                BalanceTransaction.created_at >= datetime(since.year, since.month, 1, tzinfo=timezone.utc),
+            )
+            rollups = [
+                BalanceRollup(
+                    user_id=row_user_id, month=month, transaction_type=transaction_type,
+                    transactions_count=int(count), amount_total=int(amount),
+                )
+                for row_user_id, month, transaction_type, count, amount in db.execute(ledger)
+            ]
+            return sorted(rollups, key=lambda rollup: (-rollup.month.toordinal(), rollup.transaction_type.name))
+        return (
+            db.query(BalanceRollup)
+            .filter(BalanceRollup.user_id == user_id, BalanceRollup.month >= since)
+            .order_by(BalanceRollup.month.desc(), BalanceRollup.transaction_type)
+            .all()
+        )
+
+
+# Singleton instance
+balance_rollup_repository = BalanceRollupRepository()
+
+
+@event.listens_for(Session, "after_flush")
+def _rollup_new_transactions(session: Session, flush_context) -> None:
+    """Учитывать вставленные транзакции в итогах в той же транзакции БД"""
+    deltas: Dict[RollupKey, List[int]] = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if not isinstance(obj, BalanceTransaction):
+            continue
+        # created_at проставлен при вставке (default модели), месяц совпадает со строкой журнала
+        delta = deltas[(obj.user_id, month_start(obj.created_at), obj.transaction_type)]
+        delta[0] += 1
+        delta[1] += obj.amount
+    if not deltas:
+        return
+    connection = session.connection()
+    # До заполнения по истории эти транзакции учтет backfill
+    if balance_rollup_repository.get_cutoff(connection) is not None:
+        balance_rollup_repository.apply(connection, deltas)
@@ -0,0 +1,148 @@
+"""
+Repository для очереди исходящих писем
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app.models import EmailOutbox, EmailOutboxStatus
+
+
+class EmailOutboxRepository:
+    """Репозиторий для управления очередью email_outbox"""
+
+    # Тело письма нужно только для отправки: после sent/failed в БД не остается кодов
+    _ERASED_BODY = {"body_text": "", "body_html": None}
+
+    def enqueue(
+        self,
+        db: Session,
+        recipient: str,
+        subject: str,
+        body_text: str,
+        body_html: Optional[str] = None
+    ) -> EmailOutbox:
+        """Добавить письмо в очередь (отправка сразу доступна воркеру)"""
+        message = EmailOutbox(
+            recipient=recipient,
+            subject=subject,
+            body_text=body_text,
+            body_html=body_html,
+            status=EmailOutboxStatus.pending,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc)
+        )
+
+        db.add(message)
+        db.commit()
+        db.refresh(message)
+        return message
+
+    def claim_batch(self, db: Session, limit: int, lease_seconds: int) -> List[EmailOutbox]:
+        """
+        Захватить пачку писем, готовых к отправке
+
+        next_attempt_at сдвигается на lease_seconds: если воркер упадет, не
+        отправив письмо, оно вернется в очередь после истечения lease.
+        В PostgreSQL строки, захваченные другими воркерами, пропускаются (SKIP LOCKED).
+
+        Returns:
+            List[EmailOutbox]: Отсоединенные от сессии объекты писем
+        """
+        now = datetime.now(timezone.utc)
+        messages = (
+            db.query(EmailOutbox)
+            .filter(
+                EmailOutbox.status == EmailOutboxStatus.pending,
+                EmailOutbox.next_attempt_at <= now
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        lease_until = now + timedelta(seconds=lease_seconds)
+        for message in messages:
+            message.next_attempt_at = lease_until
+        db.flush()
+
+        # Отсоединяем до commit, чтобы не перечитывать каждую строку после него
+        for message in messages:
+            db.expunge(message)
+        db.commit()
+
+        return messages
+
+    def mark_sent(self, db: Session, message_ids: List[int]) -> None:
+        """Пометить письма как отправленные и стереть их тела (в них коды подтверждения)"""
+        if not message_ids:
+            return
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(message_ids))
+            .values(
+                status=EmailOutboxStatus.sent,
+                sent_at=datetime.now(timezone.utc),
+                last_error=None,
+                **self._ERASED_BODY
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def mark_attempt_failed(
+        self,
+        db: Session,
+        message_id: int,
+        error: str,
+        retry_at: Optional[datetime]
+    ) -> None:
+        """
+        Записать неудачную попытку отправки
+
+        Args:
+            retry_at: Время следующей попытки; None - попыток больше не будет,
+                тело письма стирается
+        """
+        values = {
+            "attempts": EmailOutbox.attempts + 1,
+            "last_error": error[:1000],
+        }
+        if retry_at is None:
+            values["status"] = EmailOutboxStatus.failed
+            values.update(self._ERASED_BODY)
+        else:
+            values["next_attempt_at"] = retry_at
+
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def delete_finished_batch(self, db: Session, batch_size: int = 1000, retention_minutes: int = 15) -> int:
+        """Удалить пачку отправленных и окончательно неудачных писем, поставленных в очередь раньше retention_minutes"""
+        threshold = datetime.now(timezone.utc) - timedelta(minutes=retention_minutes)
+        ids = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status.in_([EmailOutboxStatus.sent, EmailOutboxStatus.failed]),
+                EmailOutbox.created_at < threshold
+            )
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+
+# Singleton instance
+email_outbox_repository = EmailOutboxRepository()
@@ -3,6 +3,7 @@ Repository для работы с email верификацией и сбросо
 """
 from typing import Optional
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, select
 from sqlalchemy.orm import Session
 from app.models import EmailVerification, User, VerificationType
 import uuid
@@ -282,6 +283,42 @@ class EmailVerificationRepository:
             EmailVerification.created_at > time_threshold
         ).count()
 
+    # ===== Cleanup =====
+    
+    def delete_expired_batch(self, db: Session, batch_size: int = 1000) -> int:
+        """Удалить пачку верификаций с истекшим токеном"""
+        now = datetime.now(timezone.utc)
+        return self._delete_batch(db, EmailVerification.token_expires_at < now, batch_size)
+    
+    def delete_used_batch(
+        self,
+        db: Session,
+        batch_size: int = 1000,
+        retention_minutes: int = 60
+    ) -> int:
+        """
+        Удалить пачку использованных верификаций
+        
+        Использованные записи хранятся retention_minutes - по ним считается
+        лимит запросов на сброс пароля (count_recent_password_resets).
+        """
+        threshold = datetime.now(timezone.utc) - timedelta(minutes=retention_minutes)
+        return self._delete_batch(
+            db,
+            and_(EmailVerification.is_used == True, EmailVerification.created_at < threshold),
+            batch_size
+        )
+    
+    def _delete_batch(self, db: Session, condition, batch_size: int) -> int:
+        ids = select(EmailVerification.id).where(condition).limit(batch_size).scalar_subquery()
+        result = db.execute(
+            delete(EmailVerification)
+            .where(EmailVerification.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
 
 # Singleton instance
 email_verification_repository = EmailVerificationRepository()
@@ -3,6 +3,7 @@ Repository для работы с одноразовыми OAuth токенам
 """
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from app.models import OAuthTemporaryToken
 import uuid
@@ -99,33 +100,32 @@ class OAuthTokenRepository:
         
         return expires_at > now
     
-    def cleanup_expired(self, db: Session) -> int:
+    def delete_expired_batch(self, db: Session, batch_size: int = 1000) -> int:
         """
-        Удалить все истекшие и использованные токены
+        Удалить пачку истекших токенов (использованные токены тоже истекают через TTL)
         
         Args:
             db: Сессия БД
+            batch_size: Максимум строк за один DELETE
         
         Returns:
             int: Количество удаленных токенов
         """
         now = datetime.now(timezone.utc)
-        
-        # Удаляем истекшие токены
-        expired_count = db.query(OAuthTemporaryToken).filter(
-            OAuthTemporaryToken.expires_at < now
-        ).delete()
-        
-        # Удаляем использованные токены старше 1 часа
-        one_hour_ago = now - timedelta(hours=1)
-        used_count = db.query(OAuthTemporaryToken).filter(
-            OAuthTemporaryToken.is_used == True,
-            OAuthTemporaryToken.created_at < one_hour_ago
-        ).delete()
-        
+        expired_ids = (
+            select(OAuthTemporaryToken.id)
+            .where(OAuthTemporaryToken.expires_at < now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(OAuthTemporaryToken)
+            .where(OAuthTemporaryToken.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
         
-        return expired_count + used_count
+        return result.rowcount
 
 
 # Singleton instance
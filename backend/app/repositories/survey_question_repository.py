@@ -0,0 +1,68 @@
+"""
+Repository для каталога вопросов опроса (survey_questions) и закодированных ответов (survey_answers)
+"""
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.models import SurveyAnswer, SurveyQuestion
+
+
+class SurveyQuestionRepository:
+    """Репозиторий каталога вопросов и ответов"""
+
+    def get_catalog(self, db: Session, survey_id: int) -> List[SurveyQuestion]:
+        """Вопросы опроса в порядке формы"""
+        return (
+            db.query(SurveyQuestion)
+            .filter(SurveyQuestion.survey_id == survey_id)
+            .order_by(SurveyQuestion.position)
+            .all()
+        )
+
+    def merge_catalog(self, db: Session, survey_id: int, catalog: Sequence[Dict[str, Any]]) -> List[SurveyQuestion]:
+        """
+        Обновить каталог по текущей версии формы
+
+        Коды вариантов не меняются: новые варианты дописываются в конец options,
+        исчезнувшие из формы остаются. Удаленные из формы вопросы сохраняются
+        вместе с ответами.
+        """
+        existing = {question.google_question_id: question for question in self.get_catalog(db, survey_id)}
+        for described in catalog:
+            question = existing.get(described["google_question_id"])
+            if question is None:
+                question = SurveyQuestion(survey_id=survey_id, **described)
+                db.add(question)
+                existing[question.google_question_id] = question
+                continue
+            question.position = described["position"]
+            question.title = described["title"]
+            question.kind = described["kind"]
+            question.has_other = described["has_other"]
+            question.required = described["required"]
+            if described["options"] is not None:
+                known = list(question.options or [])
+                question.options = known + [value for value in described["options"] if value not in known]
+        db.flush()
+        return sorted(existing.values(), key=lambda question: question.position)
+
+    def add_answers(self, db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+        """Вставить закодированные ответы одним executemany"""
+        if rows:
+            db.execute(insert(SurveyAnswer), list(rows))
+
+    def delete_answers(self, db: Session, synced_response_ids: Iterable[int]) -> None:
+        """Удалить закодированные ответы (перед повторным кодированием отредактированных)"""
+        synced_response_ids = list(synced_response_ids)
+        if synced_response_ids:
+            db.execute(
+                delete(SurveyAnswer)
+                .where(SurveyAnswer.synced_response_id.in_(synced_response_ids))
+                .execution_options(synchronize_session=False)
+            )
+
+
+# Singleton instance
+survey_question_repository = SurveyQuestionRepository()
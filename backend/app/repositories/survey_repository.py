@@ -1,7 +1,11 @@
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, bindparam, case, desc, func, literal, or_, select, update
 from app.models import Survey, User, SurveyResponse, SurveyStatus
+from app.repositories.async_base_repository import AsyncBaseRepository
 from app.repositories.base_repository import BaseRepository
 from app.schemas import SurveyCreate, SurveyUpdate
 from app.core.exceptions import SurveyNotFoundException
@@ -112,6 +116,24 @@ class SurveyRepository(BaseRepository[Survey, SurveyCreate, SurveyUpdate]):
             .count()
         )
 
+    def get_participation_rules(self, db: Session, survey_ids: List[int]) -> List[Row]:
+        """
+        Поля опросов, нужные для статуса участия, одним запросом
+
+        Строки: (id, status, max_responses_per_user, reward_per_response, author_user_id)
+        """
+        return db.execute(
+            select(
+                Survey.id,
+                Survey.status,
+                Survey.max_responses_per_user,
+                Survey.reward_per_response,
+                GoogleAccount.user_id.label("author_user_id"),
+            )
+            .outerjoin(GoogleAccount, GoogleAccount.id == Survey.google_account_id)
+            .where(Survey.id.in_(survey_ids))
+        ).all()
+
     def can_user_participate(
         self, 
         db: Session, 
@@ -142,29 +164,134 @@ class SurveyRepository(BaseRepository[Survey, SurveyCreate, SurveyUpdate]):
         participation_count = self.get_user_participation_count(db, survey_id, user_id)
         return participation_count < survey.max_responses_per_user
 
-    def update_response_count(self, db: Session, survey_id: int) -> Survey:
-        """Обновить счетчик ответов в опросе"""
-        survey = self.get(db, survey_id)
-        if not survey:
-            raise SurveyNotFoundException(survey_id=survey_id)
+    def reserve_slot(self, db: Session, survey_id: int) -> bool:
+        """
+        Занять слот активного опроса: reserved_slots + 1
 
-        # Пересчитываем количество ответов
-        total_responses = (
-            db.query(SurveyResponse)
-            .filter(SurveyResponse.survey_id == survey_id)
-            .count()
+        Один UPDATE ... WHERE total_responses + reserved_slots < responses_needed:
+        засчитанные ответы и живые резервы вместе не превышают цель.
+        updated_at не меняется - резервы не видны в ленте, и кэш фрагментов
+        не должен сбрасываться на каждом старте участия.
+
+        Returns:
+            bool: True - слот занят, False - свободных слотов нет (или опрос не активен)
+        """
+        result = db.execute(
+            update(Survey)
+            .where(
+                Survey.id == survey_id,
+                Survey.status == SurveyStatus.ACTIVE,
+                or_(
+                    Survey.responses_needed.is_(None),
+                    Survey.total_responses + Survey.reserved_slots < Survey.responses_needed,
+                ),
+            )
+            .values(reserved_slots=Survey.reserved_slots + 1, updated_at=Survey.updated_at)
+            .execution_options(synchronize_session=False)
         )
+        return result.rowcount == 1
 
-        survey.total_responses = total_responses
+    def claim_sync_attempt(self, db: Session, survey_id: int, min_interval: timedelta) -> bool:
+        """
+        Занять попытку синхронизации опроса: не чаще min_interval
 
-        # Автоматически завершаем опрос если достигнут лимит
-        if (survey.responses_needed and 
-            total_responses >= survey.responses_needed):
-            survey.status = SurveyStatus.COMPLETED
+        Время попытки пишется до синхронизации и отдельно от last_synced_at,
+        поэтому неудачные синхронизации тоже ограничены по частоте, а
+        параллельные запросы (в том числе с разных инстансов) не синхронизируют
+        опрос одновременно. updated_at не меняется, как и у резервов слотов.
 
-        db.commit()
-        db.refresh(survey)
-        return survey
+        Returns:
+            bool: True - попытка за вызывающим, False - опрос синхронизировали недавно
+        """
+        now = datetime.now(timezone.utc)
+        result = db.execute(
+            update(Survey)
+            .where(
+                Survey.id == survey_id,
+                or_(Survey.last_sync_attempt_at.is_(None), Survey.last_sync_attempt_at <= now - min_interval),
+            )
+            .values(last_sync_attempt_at=now, updated_at=Survey.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def mark_synced(self, db: Session, survey_id: int, watermark: Optional[datetime], synced_at: datetime) -> None:
+        """
+        Записать итог синхронизации ответов
+
+        updated_at не меняется: синхронизация не меняет карточку опроса в ленте
+        и не должна сбрасывать кэш фрагментов.
+        """
+        db.execute(
+            update(Survey)
+            .where(Survey.id == survey_id)
+            .values(sync_watermark=watermark, last_synced_at=synced_at, updated_at=Survey.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    def release_slots(self, db: Session, released: Dict[int, int]) -> None:
+        """
+        Вернуть слоты в опросы одним executemany: reserved_slots - n
+
+        Args:
+            released: {survey_id: количество возвращаемых слотов}
+        """
+        if not released:
+            return
+        surveys = Survey.__table__
+        db.execute(
+            surveys.update()
+            .where(surveys.c.id == bindparam("b_survey_id"))
+            .values(
+                reserved_slots=surveys.c.reserved_slots - bindparam("b_released"),
+                updated_at=surveys.c.updated_at,
+            ),
+            # порядок id - одинаковый порядок блокировок у параллельных sweeper'ов
+            [{"b_survey_id": survey_id, "b_released": count} for survey_id, count in sorted(released.items())],
+        )
+
+    def increment_response_count(
+        self, db: Session, survey_id: int, from_reservation: bool = False
+    ) -> Optional[Row]:
+        """
+        Атомарно засчитать ответ: total_responses + 1, при достижении цели - COMPLETED
+
+        Один UPDATE ... WHERE <есть место> RETURNING: проверка лимита и инкремент
+        выполняются под блокировкой строки опроса, поэтому параллельные
+        подтверждения не превышают responses_needed.
+
+        Args:
+            from_reservation: ответ держал слот - слот переходит в засчитанный
+                ответ (reserved_slots - 1); иначе нужен свободный слот сверх
+                засчитанных ответов и чужих резервов
+
+        Returns:
+            (total_responses, status) после обновления или None, если места
+            нет (или опроса нет)
+        """
+        reaches_target = and_(
+            Survey.responses_needed.is_not(None),
+            Survey.total_responses + 1 >= Survey.responses_needed,
+        )
+        values = {
+            "total_responses": Survey.total_responses + 1,
+            "status": case(
+                (reaches_target, literal(SurveyStatus.COMPLETED, Survey.__table__.c.status.type)),
+                else_=Survey.status,
+            ),
+        }
+        if from_reservation:
+            has_room = Survey.total_responses < Survey.responses_needed
+            values["reserved_slots"] = Survey.reserved_slots - 1
+        else:
+            has_room = Survey.total_responses + Survey.reserved_slots < Survey.responses_needed
+        return db.execute(
+            update(Survey)
+            .where(Survey.id == survey_id, or_(Survey.responses_needed.is_(None), has_room))
+            .values(**values)
+            .returning(Survey.total_responses, Survey.status)
+            .execution_options(synchronize_session=False)
+        ).first()
 
     def search_surveys(
         self, 
@@ -213,5 +340,51 @@ class SurveyRepository(BaseRepository[Survey, SurveyCreate, SurveyUpdate]):
         db.refresh(survey_obj)
         return survey_obj
 
+
+class AsyncSurveyRepository(AsyncBaseRepository[Survey, SurveyCreate, SurveyUpdate]):
+    """Async вариант SurveyRepository для горячих read-путей"""
+
+    def __init__(self):
+        super().__init__(Survey)
+
+    async def get_active_surveys(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 50,
+        current_user_id: Optional[int] = None
+    ) -> List[Survey]:
+        """Получить список активных опросов для ленты (с автором и категориями)"""
+        result = await db.scalars(
+            select(Survey)
+            .options(selectinload(Survey.google_account), selectinload(Survey.categories))
+            .where(Survey.status == SurveyStatus.ACTIVE)
+            .order_by(desc(Survey.created_at))
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def get_user_participation_counts(
+        self,
+        db: AsyncSession,
+        survey_ids: List[int],
+        user_id: int
+    ) -> Dict[int, int]:
+        """Количество участий пользователя сразу для нескольких опросов (один запрос)"""
+        if not survey_ids:
+            return {}
+        rows = await db.execute(
+            select(SurveyResponse.survey_id, func.count(SurveyResponse.id))
+            .where(
+                SurveyResponse.survey_id.in_(survey_ids),
+                SurveyResponse.respondent_id == user_id
+            )
+            .group_by(SurveyResponse.survey_id)
+        )
+        return {survey_id: count for survey_id, count in rows.all()}
+
+
 # Создаем экземпляр репозитория
-survey_repository = SurveyRepository()
\ No newline at end of file
+survey_repository = SurveyRepository()
+async_survey_repository = AsyncSurveyRepository()
\ No newline at end of file
@@ -2,9 +2,10 @@
 Репозиторий для работы с ответами на опросы
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func, select, text, tuple_, update
 from datetime import datetime
 
 from app.models import SurveyResponse, Survey
@@ -30,11 +31,57 @@ class SurveyResponseRepository(BaseRepository[SurveyResponse, SurveyResponseCrea
             )
         ).first()
     
+    def extend_reservation(self, db: Session, response_id: int, reserved_until: datetime) -> bool:
+        """Продлить слот ответа; False - слота нет (не занимался или уже возвращен)"""
+        result = db.execute(
+            update(SurveyResponse)
+            .where(SurveyResponse.id == response_id, SurveyResponse.reserved_until.is_not(None))
+            .values(reserved_until=reserved_until)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def take_reservation(self, db: Session, response_id: int) -> bool:
+        """
+        Снять слот с ответа для подтверждения
+
+        Слот забирает ровно один из конкурентов (подтверждение или sweeper):
+        True - слот был и теперь принадлежит вызывающему.
+        """
+        result = db.execute(
+            update(SurveyResponse)
+            .where(SurveyResponse.id == response_id, SurveyResponse.reserved_until.is_not(None))
+            .values(reserved_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def take_expired_reservations(self, db: Session, now: datetime, batch_size: int = 1000) -> List[int]:
+        """
+        Снять пачку истекших слотов одним UPDATE
+
+        Returns:
+            List[int]: survey_id каждого снятого слота (с повторами)
+        """
+        expired_ids = (
+            select(SurveyResponse.id)
+            .where(SurveyResponse.reserved_until < now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        return list(db.execute(
+            update(SurveyResponse)
+            .where(SurveyResponse.id.in_(expired_ids), SurveyResponse.reserved_until < now)
+            .values(reserved_until=None)
+            .returning(SurveyResponse.survey_id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+
     def get_by_survey(self, db: Session, survey_id: int) -> List[SurveyResponse]:
         """Получить все ответы на опрос"""
         return db.query(SurveyResponse).filter(
             SurveyResponse.survey_id == survey_id
-        ).order_by(desc(SurveyResponse.submitted_at)).all()
+        ).order_by(desc(SurveyResponse.started_at)).all()
     
     def get_completed_responses(
         self, 
@@ -106,8 +153,91 @@ class SurveyResponseRepository(BaseRepository[SurveyResponse, SurveyResponseCrea
         """Получить ответы пользователя"""
         return db.query(SurveyResponse).filter(
             SurveyResponse.respondent_id == user_id
-        ).order_by(desc(SurveyResponse.submitted_at)).offset(offset).limit(limit).all()
+        ).order_by(desc(SurveyResponse.started_at)).offset(offset).limit(limit).all()
     
+    def get_user_responses_page(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        offset: int = 0,
+    ) -> List[Row]:
+        """
+        Страница ответов пользователя с данными опроса одним запросом
+
+        Строки - проекция (id, started_at, completed_at, is_verified,
+        reward_paid, survey_id, survey_title, reward_per_response) в порядке
+        (started_at, id) DESC по индексу ix_survey_responses_respondent_id_started_at_id.
+        after - ключ последней строки предыдущей страницы (keyset курсор).
+        """
+        query = (
+            select(
+                SurveyResponse.id,
+                SurveyResponse.started_at,
+                SurveyResponse.completed_at,
+                SurveyResponse.is_verified,
+                SurveyResponse.reward_paid,
+                Survey.id.label("survey_id"),
+                Survey.title.label("survey_title"),
+                Survey.reward_per_response,
+            )
+            .join(Survey, Survey.id == SurveyResponse.survey_id)
+            .where(SurveyResponse.respondent_id == user_id)
+        )
+        if after is not None:
+            query = query.where(tuple_(SurveyResponse.started_at, SurveyResponse.id) < tuple_(*after))
+        elif offset:
+            query = query.offset(offset)
+        return db.execute(
+            query.order_by(SurveyResponse.started_at.desc(), SurveyResponse.id.desc()).limit(limit)
+        ).all()
+
+    def get_user_responses_for_surveys(self, db: Session, user_id: int, survey_ids: List[int]) -> List[Row]:
+        """
+        Ответы пользователя на несколько опросов одним запросом
+
+        Строки: (survey_id, started_at, completed_at, reward_paid) в порядке
+        (survey_id, started_at, id) - последний ответ опроса идет последним.
+        """
+        return db.execute(
+            select(
+                SurveyResponse.survey_id,
+                SurveyResponse.started_at,
+                SurveyResponse.completed_at,
+                SurveyResponse.reward_paid,
+            )
+            .where(SurveyResponse.survey_id.in_(survey_ids), SurveyResponse.respondent_id == user_id)
+            .order_by(SurveyResponse.survey_id, SurveyResponse.started_at, SurveyResponse.id)
+        ).all()
+
+    def count_user_responses(self, db: Session, user_id: int, exact_limit: int) -> Tuple[int, bool]:
+        """
+        Количество ответов пользователя: (count, точное ли значение)
+
+        Точный подсчет ограничен exact_limit строками индекса. Если ответов
+        больше, в PostgreSQL возвращается оценка планировщика (не меньше
+        exact_limit + 1), в остальных БД - полный COUNT.
+        """
+        capped = db.scalar(
+            select(func.count()).select_from(
+                select(SurveyResponse.id)
+                .where(SurveyResponse.respondent_id == user_id)
+                .limit(exact_limit + 1)
+                .subquery()
+            )
+        )
+        if capped <= exact_limit:
+            return capped, True
+        if db.get_bind().dialect.name != "postgresql":
+            return db.query(SurveyResponse).filter(SurveyResponse.respondent_id == user_id).count(), True
+        plan = db.execute(
+            text("EXPLAIN (FORMAT JSON) SELECT 1 FROM survey_responses WHERE respondent_id = :user_id"),
+            {"user_id": user_id},
+        ).scalar()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        return max(estimate, exact_limit + 1), False
+
     def count_responses_by_survey(self, db: Session, survey_id: int) -> int:
         """Подсчитать количество ответов на опрос"""
         return db.query(SurveyResponse).filter(
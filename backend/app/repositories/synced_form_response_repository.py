@@ -0,0 +1,136 @@
+"""
+Repository для индекса синхронизированных ответов Google Forms (synced_form_responses)
+
+Синхронизация дописывает ответы формы пачками и обновляет отредактированные;
+подтверждение участия ищет
+ответ участника по (survey_id, email) или (survey_id, respondent_code)
+индексным запросом вместо обращения к Forms API.
+"""
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import SurveyResponse, SyncedFormResponse
+
+# Диалекты с INSERT ... ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class SyncedFormResponseRepository:
+    """Репозиторий синхронизированных ответов"""
+
+    def upsert(self, db: Session, rows: Sequence[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Добавить новые ответы одного опроса и обновить отредактированные
+
+        Ответ, измененный в форме, приходит с тем же responseId и более поздним
+        lastSubmittedTime: у него обновляются submitted_at, email и код
+        респондента. Неизменившиеся ответы пропускаются.
+
+        Returns:
+            Tuple: (добавленные, обновленные) - google_response_id -> id строки
+        """
+        if not rows:
+            return {}, {}
+        survey_id = rows[0]["survey_id"]
+        known = {
+            google_response_id: (row_id, submitted_at)
+            for google_response_id, row_id, submitted_at in db.execute(
+                select(SyncedFormResponse.google_response_id, SyncedFormResponse.id, SyncedFormResponse.submitted_at)
+                .where(
+                    SyncedFormResponse.survey_id == survey_id,
+                    SyncedFormResponse.google_response_id.in_([row["google_response_id"] for row in rows]),
+                )
+            )
+        }
+
+        updated = {}
+        for row in rows:
+            entry = known.get(row["google_response_id"])
+            if entry is None:
+                continue
+            row_id, submitted_at = entry
+            if submitted_at.tzinfo is None:
+                submitted_at = submitted_at.replace(tzinfo=timezone.utc)  # SQLite
+            if row["submitted_at"] > submitted_at:
+                updated[row["google_response_id"]] = row_id
+        if updated:
+            db.execute(
+                update(SyncedFormResponse),
+                [
+                    {
+                        "id": updated[row["google_response_id"]],
+                        "submitted_at": row["submitted_at"],
+                        "respondent_email": row["respondent_email"],
+                        "respondent_code": row["respondent_code"],
+                    }
+                    for row in rows
+                    if row["google_response_id"] in updated
+                ],
+            )
+
+        inserted = self._insert_new(db, [row for row in rows if row["google_response_id"] not in known])
+        return inserted, updated
+
+    def _insert_new(self, db: Session, rows: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        """Вставить строки, пропуская уже известные (survey_id, google_response_id) - параллельную синхронизацию"""
+        if not rows:
+            return {}
+        table = SyncedFormResponse.__table__
+        dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            result = db.execute(
+                dialect_insert(table)
+                .on_conflict_do_nothing(index_elements=[table.c.survey_id, table.c.google_response_id])
+                .returning(table.c.google_response_id, table.c.id),
+                list(rows),
+            )
+            return dict(result.all())
+
+        db.execute(insert(table), list(rows))
+        return dict(db.execute(
+            select(SyncedFormResponse.google_response_id, SyncedFormResponse.id).where(
+                SyncedFormResponse.survey_id == rows[0]["survey_id"],
+                SyncedFormResponse.google_response_id.in_([row["google_response_id"] for row in rows]),
+            )
+        ).all())
+
+    def find_unclaimed(
+        self, db: Session, survey_id: int, emails: Sequence[str], respondent_code: Optional[str]
+    ) -> Optional[SyncedFormResponse]:
+        """
+        Самый ранний ответ участника, еще не засчитанный ни одному SurveyResponse
+
+        Участник узнается по email, с которым отправлена форма, или по коду
+        респондента, введенному в форму.
+        """
+        conditions = []
+        if emails:
+            conditions.append(SyncedFormResponse.respondent_email.in_([email.lower() for email in emails]))
+        if respondent_code:
+            conditions.append(SyncedFormResponse.respondent_code == respondent_code.upper())
+        if not conditions:
+            return None
+        return db.scalar(
+            select(SyncedFormResponse)
+            .where(
+                SyncedFormResponse.survey_id == survey_id,
+                or_(*conditions),
+                ~exists().where(SurveyResponse.google_response_id == SyncedFormResponse.google_response_id),
+            )
+            .order_by(SyncedFormResponse.submitted_at, SyncedFormResponse.id)
+            .limit(1)
+        )
+
+    def count_by_survey(self, db: Session, survey_id: int) -> int:
+        """Количество синхронизированных ответов опроса"""
+        return db.scalar(
+            select(func.count()).select_from(SyncedFormResponse).where(SyncedFormResponse.survey_id == survey_id)
+        )
+
+
+# Singleton instance
+synced_form_response_repository = SyncedFormResponseRepository()
@@ -2,6 +2,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 import secrets
 from app.models import User, EmailVerification, VerificationType
+from app.repositories.async_base_repository import AsyncBaseRepository
 from app.repositories.base_repository import BaseRepository
 from app.schemas import UserRegister, UserUpdate
 from app.core.security import get_password_hash, generate_respondent_code
@@ -86,5 +87,13 @@ class UserRepository(BaseRepository[User, UserRegister, UserUpdate]):
         return pending is not None
 
 
+class AsyncUserRepository(AsyncBaseRepository[User, UserRegister, UserUpdate]):
+    """Async вариант UserRepository для горячих read-путей"""
+
+    def __init__(self):
+        super().__init__(User)
+
+
 # Создаем экземпляр репозитория
-user_repository = UserRepository()
\ No newline at end of file
+user_repository = UserRepository()
+async_user_repository = AsyncUserRepository()
\ No newline at end of file
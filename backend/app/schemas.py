@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, HttpUrl, Field, model_validator
 from typing import Optional, List, Literal, Any, Dict
-from datetime import datetime
-from app.models import SurveyStatus, TransactionType
+from datetime import date, datetime
+from app.models import QuestionKind, SurveyStatus, TransactionType
 
 
 # Category schemas
@@ -178,11 +178,55 @@ class MySurveyDetail(BaseModel):
         from_attributes = True
 
 
+# Survey analytics schemas
+class NumericSummary(BaseModel):
+    count: int
+    mean: float
+    min: float
+    p25: float
+    median: float
+    p75: float
+    max: float
+
+
+class QuestionAnalytics(BaseModel):
+    question_id: int
+    title: str
+    kind: QuestionKind
+    answered: int  # ответов формы, в которых есть этот вопрос
+    options: Optional[List[str]] = None
+    counts: Optional[List[int]] = None  # по options, последний элемент - "Другое"
+    summary: Optional[NumericSummary] = None  # дата - в днях от 1970-01-01, время - в секундах
+
+
+class CrossTab(BaseModel):
+    row_question_id: int
+    column_question_id: int
+    counts: List[List[int]]  # [вариант строки][вариант столбца], последние строка и столбец - "Другое"
+
+
+class CompletionTimeSummary(BaseModel):
+    count: int
+    p50: float  # секунды от начала участия до отправки формы
+    p90: float
+    p99: float
+
+
+class SurveyAnalytics(BaseModel):
+    survey_id: int
+    last_synced_at: Optional[datetime]
+    responses: int  # синхронизированных ответов формы
+    questions: List[QuestionAnalytics]
+    completion_time: Optional[CompletionTimeSummary] = None
+    cross_tab: Optional[CrossTab] = None
+
+
 # Survey participation schemas
 class SurveyStartResponse(BaseModel):
     google_form_url: str
     respondent_code: Optional[str] = None
     instructions: str
+    reserved_until: Optional[datetime] = None  # до этого момента за пользователем держится место в опросе
 
 
 class SurveyVerifyResponse(BaseModel):
@@ -192,6 +236,19 @@ class SurveyVerifyResponse(BaseModel):
     message: str
 
 
+class SyncResponse(BaseModel):
+    """Итог синхронизации ответов опроса из Google Forms"""
+    survey_id: int
+    synced_responses: int  # получено из Google за эту синхронизацию
+    new_responses: int  # из них новых
+    total_responses: int  # всего в локальном индексе
+    last_sync_at: datetime
+
+
+class ParticipationStatusBatchRequest(BaseModel):
+    survey_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+
 # Survey Response schemas
 class SurveyResponseCreate(BaseModel):
     survey_id: int
@@ -223,7 +280,7 @@ class TransactionItem(BaseModel):
     transaction_type: TransactionType
     amount: int
     balance_after: int
-    description: str
+    description: Optional[str] = None
     created_at: datetime
     related_survey: Optional[dict] = None
 
@@ -231,6 +288,24 @@ class TransactionItem(BaseModel):
         from_attributes = True
 
 
+class BalanceSummary(BaseModel):
+    user_id: int
+    current_balance: int
+    total_earned: int
+    total_spent: int  # отрицательная сумма трат
+    total_bonus: int
+    total_earned_transactions: int
+    total_spent_transactions: int
+    total_bonus_transactions: int
+
+
+class BalanceMonthItem(BaseModel):
+    month: date  # первый день месяца (UTC)
+    transaction_type: TransactionType
+    transactions_count: int
+    amount: int
+
+
 # Response wrappers
 class ApiResponse(BaseModel):
     success: bool = True
@@ -1,10 +1,13 @@
 
-from typing import Tuple
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.models import User, BalanceTransaction, TransactionType
-from app.repositories.user_repository import user_repository
+from app.repositories.user_repository import AsyncUserRepository, async_user_repository, user_repository
 from app.repositories.email_verification_repository import email_verification_repository
-from app.core.security import verify_password, create_access_token, create_refresh_token, verify_token, get_password_hash
+from app.core.security import create_access_token, create_refresh_token, verify_token
+from app.core.password_hashing import password_hasher
+from app.core.principal_cache import principal_cache
 from app.core.exceptions import (
     InvalidTokenException,
     UserAlreadyExistsException, 
@@ -16,13 +19,21 @@ from app.core.exceptions import (
 from app.core.config import settings
 
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Claims access токена с обязательным sub"""
+    payload = verify_token(token, token_type="access")
+    if not payload or not payload.get("sub"):
+        raise InvalidTokenException()
+    return payload
+
+
 class AuthService:
     def __init__(self, db: Session):
         self.user_repo = user_repository
         self.verification_repo = email_verification_repository
         self.db = db
 
-    def register_user(self, email: str, password: str, full_name: str) -> Tuple[str, str]:
+    async def register_user(self, email: str, password: str, full_name: str) -> Tuple[str, str]:
         """
         Регистрация нового пользователя
         
@@ -41,7 +52,7 @@ class AuthService:
             
             if existing_verification:
                 # Обновляем существующую pending registration
-                hashed_password = get_password_hash(password)
+                hashed_password = await password_hasher.hash(password)
                 self.verification_repo.update_user_data(
                     self.db,
                     existing_verification.id,
@@ -54,8 +65,8 @@ class AuthService:
                 # Email уже зарегистрирован и подтверждён
                 raise UserAlreadyExistsException(email)
         
-        # Хешируем пароль
-        hashed_password = get_password_hash(password)
+        # Хешируем пароль (в пуле процессов, не блокируя event loop)
+        hashed_password = await password_hasher.hash(password)
         
         # Создаем запись верификации с данными пользователя
         verification = self.verification_repo.create_with_user_data(
@@ -68,20 +79,15 @@ class AuthService:
         
         return verification.verification_token, email_service.mask_email(email)
 
-    def authenticate_user(self, email: str, password: str) -> User:
+    async def authenticate_user(self, email: str, password: str) -> User:
         user = self.user_repo.get_by_email(self.db, email)
         if not user or not user.hashed_password:
             raise InvalidCredentialsException()
-        if not verify_password(password, user.hashed_password):
+        if not await password_hasher.verify(password, user.hashed_password):
             raise InvalidCredentialsException()
         if not user.is_active:
             raise UserInactiveException(user.id)  # Не даем войти неактивным пользователям
         return user
-        if not verify_password(password, user.hashed_password):
-            raise InvalidCredentialsException()
-        if not user.is_active:
-            raise AuthenticationException("Account is deactivated")
-        return user
 
     def create_tokens(self, user: User) -> Tuple[str, str]:
         access_token = create_access_token(data={"sub": str(user.id)})
@@ -100,19 +106,57 @@ class AuthService:
             raise UserNotFoundException()
         return self.create_tokens(user)
 
-    def get_current_user(self, token: str) -> User:
-        payload = verify_token(token, token_type="access")
+    def get_current_user(self, token: str, use_cache: bool = True) -> User:
+        """
+        Получить пользователя по access токену
 
-        if not payload:
-            raise InvalidTokenException()
-        
-        user_id = payload.get("sub")
+        Сначала проверяется principal cache: при попадании JWT не декодируется,
+        а строка users не читается - снимок пользователя присоединяется к сессии
+        запроса без SQL. Сервисы получают этот же объект и не перечитывают его.
 
-        if not user_id:
-            raise InvalidTokenException()
-        
-        user = self.user_repo.get(self.db, int(user_id))
+        Args:
+            use_cache: False - всегда читать строку users (запросы на изменение,
+                см. app/core/principal_cache.py); свежий снимок все равно кэшируется
+        """
+        principal = principal_cache.get(token) if use_cache else None
+        if principal is not None:
+            return self._attach_snapshot(principal.snapshot)
+
+        payload = decode_access_token(token)
+        user = self.user_repo.get(self.db, int(payload["sub"]))
         
         if not user:
             raise UserNotFoundException()
-        return user
\ No newline at end of file
+
+        principal_cache.put(token, payload, user)
+        return user
+
+    def _attach_snapshot(self, snapshot: Dict[str, Any]) -> User:
+        """Присоединить снимок пользователя к сессии как persistent объект без SELECT"""
+        user = User(**snapshot)
+        make_transient_to_detached(user)  # незаданные поля (hashed_password) станут expired
+        return self.db.merge(user, load=False)
+
+
+class AsyncAuthService:
+    """Async проверка access токена для эндпоинтов на AsyncSession (DB_ASYNC_ENABLED)"""
+
+    def __init__(self, db: AsyncSession):
+        self.user_repo: AsyncUserRepository = async_user_repository
+        self.db = db
+
+    async def get_current_user(self, token: str, use_cache: bool = True) -> User:
+        """Получить пользователя по access токену (см. AuthService.get_current_user)"""
+        principal = principal_cache.get(token) if use_cache else None
+        if principal is not None:
+            user = User(**principal.snapshot)
+            make_transient_to_detached(user)
+            return await self.db.merge(user, load=False)
+
+        payload = decode_access_token(token)
+        user = await self.user_repo.get(self.db, int(payload["sub"]))
+        if not user:
+            raise UserNotFoundException()
+
+        principal_cache.put(token, payload, user)
+        return user
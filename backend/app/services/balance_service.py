@@ -2,10 +2,12 @@
 Сервис для управления балансом пользователей
 """
 
+from datetime import date, datetime, timezone
 from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from app.models import User, BalanceTransaction, TransactionType
+from app.repositories.balance_rollup_repository import balance_rollup_repository, month_start
 from app.repositories.user_repository import user_repository
 from app.core.exceptions import UserNotFoundException
 
@@ -14,6 +16,7 @@ class BalanceService:
     """Сервис для управления балансом пользователей"""
     def __init__(self, db: Session):
         self.user_repo = user_repository
+        self.rollup_repo = balance_rollup_repository
         self.db = db
 
     def add_bonus_points(self, user_id: int, amount: int, description: str = "Welcome bonus") -> BalanceTransaction:
@@ -44,20 +47,30 @@ class BalanceService:
         return query.order_by(BalanceTransaction.created_at.desc()).offset(offset).limit(limit).all()
 
     def get_balance_summary(self, user_id: int) -> dict:
+        """Текущий баланс и итоги по типам транзакций из balance_rollups"""
         user = self.user_repo.get(self.db, user_id)
         if not user:
             raise UserNotFoundException()
-        earned = self.db.query(BalanceTransaction).filter(
-            BalanceTransaction.user_id == user_id,
-            BalanceTransaction.transaction_type == TransactionType.EARNED
-        ).count()
-        spent = self.db.query(BalanceTransaction).filter(
-            BalanceTransaction.user_id == user_id,
-            BalanceTransaction.transaction_type == TransactionType.SPENT
-        ).count()
-        return {
-            "current_balance": user.balance,
-            "total_earned_transactions": earned,
-            "total_spent_transactions": spent,
-            "user_id": user_id
-        }
\ No newline at end of file
+        totals = self.rollup_repo.get_totals(self.db, user_id)
+        summary = {"user_id": user_id, "current_balance": user.balance}
+        for transaction_type in TransactionType:
+            count, amount = totals.get(transaction_type, (0, 0))
+            summary[f"total_{transaction_type.value}"] = amount
+            summary[f"total_{transaction_type.value}_transactions"] = count
+        return summary
+
+    def get_monthly_history(self, user_id: int, months: int = 12) -> List[dict]:
+        """Итоги по месяцам и типам за последние months месяцев (текущий включительно)"""
+        current = month_start(datetime.now(timezone.utc))
+        # Первый день месяца, отстоящего на months - 1 назад
+        index = current.year * 12 + current.month - 1 - (months - 1)
+        since = date(index // 12, index % 12 + 1, 1)
+        return [
+            {
+                "month": rollup.month,
+                "transaction_type": rollup.transaction_type,
+                "transactions_count": rollup.transactions_count,
+                "amount": rollup.amount_total,
+            }
+            for rollup in self.rollup_repo.get_monthly(self.db, user_id, since)
+        ]
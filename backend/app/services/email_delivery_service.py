@@ -0,0 +1,213 @@
+"""
+Доставка писем из очереди email_outbox
+
+Фоновая задача забирает пачку готовых писем и отправляет их через одно
+аутентифицированное SMTP соединение, которое переиспользуется между запусками
+(без connect/STARTTLS/login на каждое письмо). Неудачные отправки повторяются
+с экспоненциальной задержкой.
+"""
+import logging
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import EmailOutbox
+from app.repositories.email_outbox_repository import email_outbox_repository
+from app.services.email_service import email_service
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Ошибка уровня соединения: письмо не виновато (SMTPException - тоже OSError)"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPConnection:
+    """
+    Переиспользуемое SMTP соединение
+
+    Соединение открывается при первой отправке и закрывается после
+    max_messages писем, после max_idle_seconds простоя или при ошибке.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str],
+        password: Optional[str],
+        use_tls: bool = True,
+        timeout: float = 10,
+        max_messages: int = 100,
+        max_idle_seconds: float = 60,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.max_idle_seconds = max_idle_seconds
+        self.connections_opened = 0
+        self._server: Optional[smtplib.SMTP] = None
+        self._messages_sent = 0
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, message) -> None:
+        """Отправить письмо, при необходимости открыв соединение"""
+        with self._lock:
+            server = self._get_server()
+            try:
+                server.send_message(message)
+            except OSError as e:
+                if is_connection_error(e):
+                    self._close()
+                raise
+            self._messages_sent += 1
+            self._last_used = time.monotonic()
+            if self._messages_sent >= self.max_messages:
+                self._close()
+
+    def close_if_idle(self) -> None:
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used > self.max_idle_seconds:
+                self._close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _get_server(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.max_idle_seconds:
+            self._close()  # сервер мог закрыть соединение по таймауту
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.use_tls:
+                    server.starttls()
+                if self.user and self.password:
+                    server.login(self.user, self.password)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+            self._messages_sent = 0
+            self._last_used = time.monotonic()
+            self.connections_opened += 1
+        return self._server
+
+    def _close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+
+class EmailDeliveryService:
+    """Отправка писем из очереди"""
+
+    def __init__(self, db: Session, connection: SMTPConnection):
+        self.db = db
+        self.connection = connection
+        self.outbox_repo = email_outbox_repository
+
+    def deliver_pending(
+        self,
+        batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE,
+        max_attempts: int = settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    ) -> Dict[str, int]:
+        """
+        Отправить пачку писем из очереди
+
+        Returns:
+            Dict[str, int]: Количество отправленных, отложенных и окончательно неудачных писем
+        """
+        stats = {"sent": 0, "retried": 0, "failed": 0}
+        messages = self.outbox_repo.claim_batch(self.db, batch_size, settings.EMAIL_OUTBOX_LEASE_SECONDS)
+        if not messages:
+            self.connection.close_if_idle()
+            return stats
+
+        sent_ids = []
+        for index, message in enumerate(messages):
+            try:
+                self.connection.send(
+                    email_service.build_message(
+                        message.recipient, message.subject, message.body_text, message.body_html
+                    )
+                )
+                sent_ids.append(message.id)
+            except OSError as e:
+                if not is_connection_error(e):
+                    self._record_failure(message, e, max_attempts, stats)
+                    continue
+                # Сервер недоступен - откладываем остаток пачки, не тратя время на таймауты
+                for pending in messages[index:]:
+                    self._record_failure(pending, e, max_attempts, stats)
+                break
+
+        self.outbox_repo.mark_sent(self.db, sent_ids)
+        stats["sent"] = len(sent_ids)
+        if stats["retried"] or stats["failed"]:
+            logger.warning(f"Email outbox delivery: {stats}")
+        return stats
+
+    def _record_failure(self, message: EmailOutbox, error: Exception, max_attempts: int, stats: Dict[str, int]) -> None:
+        attempts = message.attempts + 1
+        retry_at = None
+        if attempts < max_attempts and not self._is_permanent(error):
+            retry_at = datetime.now(timezone.utc) + timedelta(seconds=self.backoff_seconds(attempts))
+        self.outbox_repo.mark_attempt_failed(self.db, message.id, f"{type(error).__name__}: {error}", retry_at)
+        stats["retried" if retry_at else "failed"] += 1
+        logger.error(
+            f"Failed to send email {message.id} (attempt {attempts}): {error}",
+            extra={"outbox_id": message.id, "attempts": attempts, "will_retry": retry_at is not None}
+        )
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        """Экспоненциальная задержка с разбросом, чтобы повторы не шли одной волной"""
+        delay = min(
+            settings.EMAIL_OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+        )
+        return delay * random.uniform(1.0, 1.2)
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        """Адрес отклонен сервером (5xx) - повторять бессмысленно"""
+        if is_connection_error(error):
+            return False
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code >= 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code >= 500
+        return False
+
+
+# Singleton instance
+smtp_connection = SMTPConnection(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    user=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    max_idle_seconds=settings.SMTP_MAX_IDLE_SECONDS,
+)
@@ -1,12 +1,18 @@
 """
 Email Service для отправки писем верификации
+
+Письма не отправляются в запросе: они добавляются в очередь email_outbox,
+а доставляет их фоновая задача (EmailDeliveryService) через переиспользуемое
+SMTP соединение.
 """
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Optional, Tuple
 import logging
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.background_jobs import background_jobs
+from app.repositories.email_outbox_repository import email_outbox_repository
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +20,46 @@ logger = logging.getLogger(__name__)
 class EmailService:
     """Сервис для отправки email"""
     
+    OUTBOX_JOB_NAME = "email_outbox"
+    
     def __init__(self):
-        self.smtp_host = getattr(settings, 'SMTP_HOST', 'smtp.gmail.com')
-        self.smtp_port = getattr(settings, 'SMTP_PORT', 587)
-        self.smtp_user = getattr(settings, 'SMTP_USER', None)
-        self.smtp_password = getattr(settings, 'SMTP_PASSWORD', None)
-        self.from_email = getattr(settings, 'FROM_EMAIL', self.smtp_user)
-        self.from_name = getattr(settings, 'FROM_NAME', 'Felend')
+        self.smtp_user = settings.SMTP_USER
+        self.smtp_password = settings.SMTP_PASSWORD
+        self.from_email = settings.FROM_EMAIL or self.smtp_user
+        self.from_name = settings.FROM_NAME
+    
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.smtp_user and self.smtp_password)
     
-    def _create_verification_email(self, code: str, recipient_email: str) -> MIMEMultipart:
-        """Создать HTML письмо с кодом верификации"""
+    def build_message(
+        self,
+        recipient_email: str,
+        subject: str,
+        body_text: str,
+        body_html: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Собрать MIME письмо (текстовая + HTML версии)"""
         message = MIMEMultipart("alternative")
-        message["Subject"] = "Verify your Felend account"
+        message["Subject"] = subject
         message["From"] = f"{self.from_name} <{self.from_email}>"
         message["To"] = recipient_email
         
+        message.attach(MIMEText(body_text, "plain"))
+        if body_html:
+            message.attach(MIMEText(body_html, "html"))
+        
+        return message
+    
+    def _enqueue(self, db: Session, recipient_email: str, subject: str, body_text: str, body_html: str) -> None:
+        """Добавить письмо в очередь и разбудить воркер доставки"""
+        email_outbox_repository.enqueue(db, recipient_email, subject, body_text, body_html)
+        background_jobs.wake(self.OUTBOX_JOB_NAME)
+    
+    def _render_verification_email(self, code: str) -> Tuple[str, str, str]:
+        """Тема, текст и HTML письма с кодом верификации"""
+        subject = "Verify your Felend account"
+        
         # Текстовая версия
         text = f"""
         Welcome to Felend!
@@ -109,19 +140,13 @@ class EmailService:
         </html>
         """
         
-        part1 = MIMEText(text, "plain")
-        part2 = MIMEText(html, "html")
-        
-        message.attach(part1)
-        message.attach(part2)
-        
-        return message
+        return subject, text, html
     
-    def send_verification_code(self, email: str, code: str) -> bool:
-        """Отправить код верификации на email"""
+    def send_verification_code(self, db: Session, email: str, code: str) -> bool:
+        """Поставить письмо с кодом верификации в очередь отправки"""
         try:
             # Если нет настроек SMTP, логируем код вместо отправки (для разработки)
-            if not self.smtp_user or not self.smtp_password:
+            if not self.is_configured:
                 logger.warning(f"SMTP not configured. Verification code for {email}: {code}")
                 print(f"\n{'='*60}")
                 print(f"📧 EMAIL VERIFICATION CODE")
@@ -131,19 +156,13 @@ class EmailService:
                 print(f"{'='*60}\n")
                 return True
             
-            message = self._create_verification_email(code, email)
-            
-            # Подключение к SMTP серверу
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(message)
+            self._enqueue(db, email, *self._render_verification_email(code))
             
-            logger.info(f"Verification email sent successfully to {email}")
+            logger.info(f"Verification email queued for {email}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send verification email to {email}: {str(e)}")
+            logger.error(f"Failed to queue verification email to {email}: {str(e)}")
             # В production можно выбросить исключение, в dev - просто логируем
             if settings.DEBUG:
                 logger.warning(f"Development mode: Verification code for {email}: {code}")
@@ -157,12 +176,9 @@ class EmailService:
                 return True
             return False
     
-    def _create_password_reset_email(self, code: str, recipient_email: str) -> MIMEMultipart:
-        """Создать HTML письмо с кодом сброса пароля"""
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "Reset your Felend password"
-        message["From"] = f"{self.from_name} <{self.from_email}>"
-        message["To"] = recipient_email
+    def _render_password_reset_email(self, code: str) -> Tuple[str, str, str]:
+        """Тема, текст и HTML письма с кодом сброса пароля"""
+        subject = "Reset your Felend password"
         
         # Текстовая версия
         text = f"""
@@ -253,19 +269,13 @@ class EmailService:
         </html>
         """
         
-        part1 = MIMEText(text, "plain")
-        part2 = MIMEText(html, "html")
-        
-        message.attach(part1)
-        message.attach(part2)
-        
-        return message
+        return subject, text, html
     
-    def send_password_reset_code(self, email: str, code: str) -> bool:
-        """Отправить код сброса пароля на email"""
+    def send_password_reset_code(self, db: Session, email: str, code: str) -> bool:
+        """Поставить письмо с кодом сброса пароля в очередь отправки"""
         try:
             # Если нет настроек SMTP, логируем код вместо отправки (для разработки)
-            if not self.smtp_user or not self.smtp_password:
+            if not self.is_configured:
                 logger.warning(f"SMTP not configured. Password reset code for {email}: {code}")
                 print(f"\n{'='*60}")
                 print(f"🔐 PASSWORD RESET CODE")
@@ -275,19 +285,13 @@ class EmailService:
                 print(f"{'='*60}\n")
                 return True
             
-            message = self._create_password_reset_email(code, email)
-            
-            # Подключение к SMTP серверу
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(message)
+            self._enqueue(db, email, *self._render_password_reset_email(code))
             
-            logger.info(f"Password reset email sent successfully to {email}")
+            logger.info(f"Password reset email queued for {email}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send password reset email to {email}: {str(e)}")
+            logger.error(f"Failed to queue password reset email to {email}: {str(e)}")
             # В production можно выбросить исключение, в dev - просто логируем
             if settings.DEBUG:
                 logger.warning(f"Development mode: Password reset code for {email}: {code}")
@@ -78,7 +78,7 @@ class EmailVerificationService:
         )
         
         # Отправить код на email
-        email_sent = self.email_service.send_verification_code(email, code)
+        email_sent = self.email_service.send_verification_code(self.db, email, code)
         
         if not email_sent:
             logger.error(f"Failed to send verification email to {email}")
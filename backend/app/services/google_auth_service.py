@@ -20,6 +20,7 @@ from app.core.exceptions import (
     TemporaryTokenExpiredException
 )
 from app.core.config import settings
+from app.core.metrics import track_google_api
 from datetime import datetime, timezone
 import logging
 from sqlalchemy.orm import Session
@@ -195,7 +196,7 @@ class GoogleAuthService:
             import asyncio
 
             loop = asyncio.get_running_loop()
-            with warnings.catch_warnings():
+            with warnings.catch_warnings(), track_google_api("oauth.fetch_token"):
                 warnings.simplefilter("ignore")
                 await loop.run_in_executor(None, lambda: flow.fetch_token(code=code))
 
@@ -233,17 +234,18 @@ class GoogleAuthService:
         try:
             async with httpx.AsyncClient() as client:
                 try:
-                    response = await client.get(
-                        google_settings.GOOGLE_USERINFO_URL,
-                        headers={"Authorization": f"Bearer {access_token}"},
-                        timeout=10.0,  # 10 секунд таймаут
-                    )
+                    with track_google_api("oauth.userinfo"):
+                        response = await client.get(
+                            google_settings.GOOGLE_USERINFO_URL,
+                            headers={"Authorization": f"Bearer {access_token}"},
+                            timeout=10.0,  # 10 секунд таймаут
+                        )
+                        response.raise_for_status()
                 except httpx.TimeoutException:
                     logger.error(
                         "Таймаут при получении информации о пользователе из Google"
                     )
                     raise GoogleAPIException("Время ожидания ответа от Google истекло")
-                response.raise_for_status()
                 return response.json()
         except httpx.HTTPError as e:
             logger.error(f"HTTP ошибка при получении информации о пользователе: {e}")
@@ -430,9 +432,6 @@ class GoogleAuthService:
             GoogleAPIException: Ошибки при работе с Google API
             InvalidFrontendOriginException: Некорректный state
         """
-        # Cleanup expired tokens
-        oauth_token_repository.cleanup_expired(self.db)
-        
         # Проверяем и декодируем JWT state
         state_payload = verify_google_auth_state(state)
         if not state_payload:
@@ -494,9 +493,6 @@ class GoogleAuthService:
             TemporaryTokenNotFoundException: Токен не найден
             TemporaryTokenExpiredException: Токен истек или уже использован
         """
-        # Cleanup expired tokens
-        oauth_token_repository.cleanup_expired(self.db)
-        
         # Получаем токен из БД
         oauth_token = oauth_token_repository.get_by_token(self.db, token)
         
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build, Resource
@@ -7,6 +8,7 @@ from app.core.exceptions import GoogleAPIException, SurveyValidationException, V
 from app.models import GoogleAccount
 from app.schemas import EmailCollectionType, FormValidationResponse, GoogleForm
 from app.core.config import settings
+from app.core.metrics import track_google_api
 from app.core.google_config import google_settings
 
 
@@ -34,7 +36,8 @@ class GoogleFormsService:
     async def get_form_info(self, form_id: str) -> GoogleForm:
         """Получить информацию о форме"""
         try:
-            form_data = self.service.forms().get(formId=form_id).execute()
+            with track_google_api("forms.get"):
+                form_data = self.service.forms().get(formId=form_id).execute()
             
         except HttpError as e:
             logger.error(f"HTTP ошибка при получении формы {form_id}: {e}")
@@ -66,15 +69,25 @@ class GoogleFormsService:
             raise GoogleAPIException(f"Некорректная структура данных от Google API: {str(validation_error)}")
 
     async def get_form_responses(
-        self, form_id: str, page_token: Optional[str] = None
+        self,
+        form_id: str,
+        page_token: Optional[str] = None,
+        submitted_after: Optional[datetime] = None,
     ) -> Dict[str, Any]:
-        """Получить ответы на форму"""
+        """
+        Получить страницу ответов на форму
+
+        Args:
+            submitted_after: Только ответы, отправленные (или измененные) не раньше этого момента
+        """
+        params = {"formId": form_id}
+        if page_token:
+            params["pageToken"] = page_token
+        if submitted_after:
+            params["filter"] = f"timestamp >= {submitted_after.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}"
         try:
-            request = self.service.forms().responses().list(formId=form_id)
-            if page_token:
-                request = request.execute(pageToken=page_token)
-            else:
-                request = request.execute()
+            with track_google_api("forms.responses.list"):
+                request = self.service.forms().responses().list(**params).execute()
 
             responses = request.get("responses", [])
             next_page_token = request.get("nextPageToken")
@@ -182,10 +195,11 @@ class GoogleFormsService:
                 }
             }
 
-            updated_form = self.service.forms().update(
-                formId=form_id,
-                body=update_body
-            ).execute()
+            with track_google_api("forms.update"):
+                updated_form = self.service.forms().update(
+                    formId=form_id,
+                    body=update_body
+                ).execute()
 
             return GoogleForm(**updated_form)
 
@@ -0,0 +1,218 @@
+"""
+Сверка балансов пользователей с журналом транзакций
+
+Журнал balance_transactions читается потоком (server-side курсор) в порядке
+(user_id, id) пачками фиксированного размера; каждая пачка проверяется
+векторно (NumPy), состояние незакрытого пользователя переносится в следующую
+пачку. Память не зависит от размера журнала.
+
+Для каждого пользователя проверяется:
+- цепочка balance_after: balance_after = предыдущий balance_after + amount
+  (для первой транзакции предыдущий баланс - 0);
+- сумма amount всех транзакций равна User.balance;
+- balance_after последней транзакции равен User.balance.
+
+Пользователи с ненулевым балансом без транзакций тоже считаются расхождением.
+"""
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import exists, select
+from sqlalchemy.engine import Connection, Row
+
+from app.models import BalanceTransaction, User
+
+# Столбцы пачки: user_id, id, amount, balance_after
+_USER, _ID, _AMOUNT, _BALANCE_AFTER = range(4)
+
+
+def _to_array(rows: Sequence[Row], width: int) -> np.ndarray:
+    """Строки результата -> int64 массив (rows, width) без промежуточных кортежей"""
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width)
+    return flat.reshape(len(rows), width)
+
+
+@dataclass
+class UserDrift:
+    """Расхождение баланса пользователя с журналом"""
+    user_id: int
+    balance: int  # User.balance
+    ledger_sum: int  # сумма amount
+    last_balance_after: Optional[int]  # balance_after последней транзакции
+    transactions: int
+    chain_breaks: int  # транзакции, где balance_after != предыдущий + amount
+    first_break_id: Optional[int]
+
+    @property
+    def sum_drift(self) -> int:
+        return self.balance - self.ledger_sum
+
+
+@dataclass
+class ReconciliationReport:
+    """Итоги сверки"""
+    rows: int = 0
+    users: int = 0
+    batches: int = 0
+    drifts: List[UserDrift] = field(default_factory=list)  # первые max_report расхождений
+    drifted_users: int = 0
+
+
+@dataclass
+class _Groups:
+    """Агрегаты пользователей пачки (массивы одинаковой длины, user_id по возрастанию)"""
+    user_ids: np.ndarray
+    sums: np.ndarray
+    last_balances_after: np.ndarray
+    counts: np.ndarray
+    chain_breaks: np.ndarray
+    first_break_ids: np.ndarray  # -1 - цепочка не нарушена
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def split_last(self) -> Tuple["_Groups", "_Groups"]:
+        """(все группы кроме последней, последняя)"""
+        fields = (
+            self.user_ids, self.sums, self.last_balances_after,
+            self.counts, self.chain_breaks, self.first_break_ids,
+        )
+        return _Groups(*(f[:-1] for f in fields)), _Groups(*(f[-1:] for f in fields))
+
+    @staticmethod
+    def concat(first: "_Groups", second: "_Groups") -> "_Groups":
+        return _Groups(*(
+            np.concatenate((getattr(first, name), getattr(second, name)))
+            for name in ("user_ids", "sums", "last_balances_after", "counts", "chain_breaks", "first_break_ids")
+        ))
+
+
+class LedgerReconciler:
+    """Потоковая сверка журнала транзакций с User.balance"""
+
+    def __init__(self, connection: Connection, batch_size: int = 50_000):
+        self.connection = connection
+        self.batch_size = batch_size
+
+    def run(self, max_report: int = 100) -> ReconciliationReport:
+        report = ReconciliationReport()
+        for drift in self.iter_drifts(report):
+            report.drifted_users += 1
+            if len(report.drifts) < max_report:
+                report.drifts.append(drift)
+        return report
+
+    def iter_drifts(self, report: Optional[ReconciliationReport] = None) -> Iterator[UserDrift]:
+        """Расхождения по пользователям в порядке user_id (журнал), затем пользователи без транзакций"""
+        report = report or ReconciliationReport()
+        result = self.connection.execution_options(stream_results=True, yield_per=self.batch_size).execute(
+            select(
+                BalanceTransaction.user_id,
+                BalanceTransaction.id,
+                BalanceTransaction.amount,
+                BalanceTransaction.balance_after,
+            ).order_by(BalanceTransaction.user_id, BalanceTransaction.id)
+        )
+        open_user: Optional[_Groups] = None
+        for rows in result.partitions():
+            batch = _to_array(rows, 4)
+            report.rows += len(batch)
+            report.batches += 1
+            closed, open_user = self._check_batch(batch, open_user)
+            report.users += len(closed)
+            yield from self._compare_balances(closed)
+        if open_user is not None:
+            report.users += 1
+            yield from self._compare_balances(open_user)
+        yield from self._users_without_ledger()
+
+    def _check_batch(self, batch: np.ndarray, carry: Optional[_Groups]) -> Tuple[_Groups, _Groups]:
+        """Агрегаты пользователей пачки; последний пользователь остается открытым"""
+        users = batch[:, _USER]
+        ids = batch[:, _ID]
+        amounts = batch[:, _AMOUNT]
+        balances_after = batch[:, _BALANCE_AFTER]
+        continues = carry is not None and users[0] == carry.user_ids[0]
+
+        # Баланс перед каждой транзакцией: balance_after предыдущей строки того же пользователя
+        new_user = np.empty(len(batch), dtype=bool)
+        new_user[0] = True
+        np.not_equal(users[1:], users[:-1], out=new_user[1:])
+        previous = np.empty_like(balances_after)
+        previous[1:] = balances_after[:-1]
+        previous[new_user] = 0
+        if continues:
+            previous[0] = carry.last_balances_after[0]
+        breaks = balances_after != previous + amounts
+
+        starts = np.flatnonzero(new_user)
+        ends = np.append(starts[1:], len(batch)) - 1
+        # Первая сломанная транзакция группы (строки группы идут по возрастанию id)
+        first_break_ids = np.full(len(starts), -1, dtype=np.int64)
+        break_groups = np.searchsorted(starts, np.flatnonzero(breaks), side="right") - 1
+        groups_with_breaks, first_positions = np.unique(break_groups, return_index=True)
+        first_break_ids[groups_with_breaks] = ids[breaks][first_positions]
+
+        groups = _Groups(
+            user_ids=users[starts],
+            sums=np.add.reduceat(amounts, starts),
+            last_balances_after=balances_after[ends],
+            counts=np.diff(np.append(starts, len(batch))),
+            chain_breaks=np.add.reduceat(breaks.astype(np.int64), starts),
+            first_break_ids=first_break_ids,
+        )
+        if continues:
+            groups.sums[0] += carry.sums[0]
+            groups.counts[0] += carry.counts[0]
+            groups.chain_breaks[0] += carry.chain_breaks[0]
+            if carry.first_break_ids[0] >= 0:
+                groups.first_break_ids[0] = carry.first_break_ids[0]
+        elif carry is not None:
+            groups = _Groups.concat(carry, groups)
+        return groups.split_last()
+
+    def _compare_balances(self, groups: _Groups) -> Iterator[UserDrift]:
+        """Сравнить агрегаты с User.balance; балансы читаются одним запросом по диапазону id"""
+        if not len(groups):
+            return
+        rows = self.connection.execute(
+            select(User.id, User.balance)
+            .where(User.id.between(int(groups.user_ids[0]), int(groups.user_ids[-1])))
+            .order_by(User.id)
+        ).all()
+        balances = np.zeros(len(groups), dtype=np.int64)  # нет пользователя - баланс 0
+        if rows:
+            user_ids, user_balances = _to_array(rows, 2).T
+            positions = np.searchsorted(user_ids, groups.user_ids).clip(max=len(user_ids) - 1)
+            found = user_ids[positions] == groups.user_ids
+            balances[found] = user_balances[positions[found]]
+
+        drifted = (
+            (groups.chain_breaks > 0)
+            | (groups.sums != balances)
+            | (groups.last_balances_after != balances)
+        )
+        for i in np.flatnonzero(drifted):
+            yield UserDrift(
+                user_id=int(groups.user_ids[i]),
+                balance=int(balances[i]),
+                ledger_sum=int(groups.sums[i]),
+                last_balance_after=int(groups.last_balances_after[i]),
+                transactions=int(groups.counts[i]),
+                chain_breaks=int(groups.chain_breaks[i]),
+                first_break_id=int(groups.first_break_ids[i]) if groups.first_break_ids[i] >= 0 else None,
+            )
+
+    def _users_without_ledger(self) -> Iterator[UserDrift]:
+        rows = self.connection.execution_options(stream_results=True, yield_per=self.batch_size).execute(
+            select(User.id, User.balance)
+            .where(User.balance != 0, ~exists().where(BalanceTransaction.user_id == User.id))
+            .order_by(User.id)
+        )
+        for user_id, balance in rows:
+            yield UserDrift(
+                user_id=user_id, balance=balance, ledger_sum=0, last_balance_after=None,
+                transactions=0, chain_breaks=0, first_break_id=None,
+            )
@@ -0,0 +1,73 @@
+"""
+Сервис обслуживания БД: пакетная очистка устаревших записей
+"""
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.email_outbox_repository import email_outbox_repository
+from app.repositories.email_verification_repository import email_verification_repository
+from app.repositories.oauth_token_repository import oauth_token_repository
+
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceService:
+    """Очистка истекших OAuth токенов, верификаций email и обработанных писем пачками ограниченного размера"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def purge_expired(
+        self,
+        batch_size: int = settings.MAINTENANCE_BATCH_SIZE,
+        max_batches: int = settings.MAINTENANCE_MAX_BATCHES,
+    ) -> Dict[str, int]:
+        """
+        Удалить устаревшие записи (токены, верификации, отправленные и неудачные письма)
+
+        Каждая пачка - отдельный короткий DELETE + commit, чтобы не держать
+        блокировки долго. За один запуск удаляется не больше
+        batch_size * max_batches строк каждого вида, остаток - в следующий запуск.
+
+        Returns:
+            Dict[str, int]: Количество удаленных строк по видам
+        """
+        purged = {
+            "oauth_temporary_tokens": self._purge(
+                lambda: oauth_token_repository.delete_expired_batch(self.db, batch_size),
+                batch_size, max_batches
+            ),
+            "email_verifications_expired": self._purge(
+                lambda: email_verification_repository.delete_expired_batch(self.db, batch_size),
+                batch_size, max_batches
+            ),
+            "email_verifications_used": self._purge(
+                lambda: email_verification_repository.delete_used_batch(self.db, batch_size),
+                batch_size, max_batches
+            ),
+            "email_outbox_finished": self._purge(
+                lambda: email_outbox_repository.delete_finished_batch(
+                    self.db, batch_size, settings.EMAIL_OUTBOX_RETENTION_MINUTES
+                ),
+                batch_size, max_batches
+            ),
+        }
+        logger.info(
+            f"Maintenance purge: {purged}",
+            extra={"event": "maintenance_purge", "purged": purged}
+        )
+        return purged
+
+    @staticmethod
+    def _purge(delete_batch: Callable[[], int], batch_size: int, max_batches: int) -> int:
+        total = 0
+        for _ in range(max_batches):
+            deleted = delete_batch()
+            total += deleted
+            if deleted < batch_size:
+                break
+        return total
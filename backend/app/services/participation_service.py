@@ -2,16 +2,22 @@
 Сервис для управления участием в опросах и системой баллов
 """
 
-from typing import Dict, Any, Optional
+from collections import Counter
+from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import logging
 
-from app.models import SurveyResponse, BalanceTransaction, TransactionType, SurveyStatus
+from app.models import Survey, SurveyResponse, SyncedFormResponse, BalanceTransaction, TransactionType, SurveyStatus, User
+from app.repositories.google_account_repository import google_account_repository
 from app.repositories.survey_repository import survey_repository
 from app.repositories.survey_response_repository import survey_response_repository
+from app.repositories.synced_form_response_repository import synced_form_response_repository
 from app.repositories.user_repository import user_repository
-from app.core.exceptions import ConflictException, SurveyNotFoundException, SurveyValidationException, ValidationException, AuthorizationException, FelendException
+from app.services.survey_sync_service import survey_sync_service
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.exceptions import ConflictException, InsufficientBalanceException, SurveyNotFoundException, SurveyValidationException, ValidationException, AuthorizationException, FelendException
 from app.schemas import SurveyStartResponse, SurveyVerifyResponse
 
 
@@ -25,9 +31,19 @@ class ParticipationService:
         self.survey_repo = survey_repository
         self.response_repo = survey_response_repository
         self.user_repo = user_repository
+        self.google_account_repo = google_account_repository
+        self.synced_repo = synced_form_response_repository
         self.db = db
 
-    def start_participation(self, survey_id: int, user_id: int) -> SurveyStartResponse:
+    def start_participation(self, survey_id: int, user: User) -> SurveyStartResponse:
+        """
+        Начать (или продолжить) участие: за пользователем закрепляется слот опроса
+
+        Слот держится SURVEY_RESERVATION_TTL_SECONDS; пока он жив, другие
+        респонденты не могут занять место сверх responses_needed. Истекшие
+        слоты возвращает release_expired_reservations.
+        """
+        user_id = user.id
         survey = self.survey_repo.get(self.db, survey_id)
         
         if not survey:
@@ -46,10 +62,26 @@ class ParticipationService:
                 survey_id=str(survey_id)
             )
         
-        user = self.user_repo.get(self.db, user_id)
-        if not user:
-            raise AuthorizationException("User not found")
-        
+        reserved_until = datetime.now(timezone.utc) + timedelta(seconds=settings.SURVEY_RESERVATION_TTL_SECONDS)
+        existing_response = self.response_repo.get_by_survey_and_respondent(
+            self.db, survey_id, user_id
+        )
+        # Начатый ответ можно продолжить (если он еще не засчитан)
+        if existing_response:
+            if existing_response.is_verified:
+                raise ValidationException("You have already completed this survey")
+            # Слот продлевается; если sweeper его уже вернул - занимается заново
+            if not self.response_repo.extend_reservation(self.db, existing_response.id, reserved_until):
+                self._reserve_slot(survey_id)
+                existing_response.reserved_until = reserved_until
+            self.db.commit()
+            return SurveyStartResponse(
+                google_form_url=survey.google_form_url,
+                respondent_code=user.respondent_code,
+                instructions=f"Continue filling out the form. Use your respondent code: {user.respondent_code}",
+                reserved_until=reserved_until,
+            )
+
         can_participate = self.survey_repo.can_user_participate(
             self.db, survey_id, user_id
         )
@@ -57,45 +89,12 @@ class ParticipationService:
         if not can_participate:
             raise ConflictException("You cannot participate in this survey")
         
-        # Check how many attempts this user has made for this survey
-        attempts_limit = getattr(survey, "max_attempts_per_user", None) or getattr(
-            survey, "attempts_per_user", None
-        )
-        attempts_count = (
-            self.db.query(SurveyResponse)
-            .filter(
-            SurveyResponse.survey_id == survey_id,
-            SurveyResponse.respondent_id == user_id,
-            )
-            .count()
-        )
-
-        # If there's an existing response allow the user to continue (unless it's already verified)
-        if attempts_count > 0:
-            existing_response = self.response_repo.get_by_survey_and_respondent(
-                self.db, survey_id, user_id
-            )
-            if existing_response:
-                if existing_response.is_verified:
-                    raise ValidationException("You have already completed this survey")
-                else:
-                    pass
-                
-        return SurveyStartResponse(
-            google_form_url=survey.google_form_url,
-            respondent_code=user.respondent_code,
-            instructions=f"Continue filling out the form. Use your respondent code: {user.respondent_code}",
-        )
-
-        # If a per-user attempts limit is set, ensure it is not exceeded
-        if attempts_limit is not None and attempts_count >= attempts_limit:
-            raise ValidationException(
-            "You have exceeded the maximum number of attempts for this survey"
-            )
+        self._reserve_slot(survey_id)
         response = SurveyResponse(
             survey_id=survey_id,
             respondent_id=user_id,
             started_at=datetime.now(timezone.utc),
+            reserved_until=reserved_until,
         )
         self.db.add(response)
         self.db.commit()
@@ -104,22 +103,64 @@ class ParticipationService:
             google_form_url=survey.google_form_url,
             respondent_code=user.respondent_code,
             instructions=f"Please fill out the Google Form and use your respondent code: {user.respondent_code}. After completing the form, return here to claim your reward.",
+            reserved_until=reserved_until,
         )
 
-    def verify_and_reward(
+    def _reserve_slot(self, survey_id: int) -> None:
+        if not self.survey_repo.reserve_slot(self.db, survey_id):
+            self.db.rollback()
+            raise SurveyValidationException(
+                "All remaining survey slots are taken. Please try again later",
+                survey_id=str(survey_id)
+            )
+
+    def release_expired_reservations(
+        self,
+        batch_size: int = settings.SURVEY_RESERVATION_SWEEP_BATCH_SIZE,
+        max_batches: int = settings.MAINTENANCE_MAX_BATCHES,
+    ) -> int:
+        """
+        Вернуть в опросы слоты с истекшим резервом
+
+        Каждая пачка - один UPDATE ответов (снимает резервы и возвращает
+        survey_id) и один executemany по опросам, затем commit.
+
+        Returns:
+            int: Количество возвращенных слотов
+        """
+        now = datetime.now(timezone.utc)
+        released = 0
+        for _ in range(max_batches):
+            survey_ids = self.response_repo.take_expired_reservations(self.db, now, batch_size)
+            self.survey_repo.release_slots(self.db, Counter(survey_ids))
+            self.db.commit()
+            released += len(survey_ids)
+            if len(survey_ids) < batch_size:
+                break
+        if released:
+            logger.info(
+                f"Released {released} expired survey slot reservations",
+                extra={"event": "reservations_released", "released": released}
+            )
+        return released
+
+    async def verify_and_reward(
         self,
         survey_id: int,
-        user_id: int,
+        user: User,
     ) -> SurveyVerifyResponse:
-        
+        """
+        Засчитать ответ и выплатить награду
+
+        Ответ участника ищется в локальном индексе синхронизированных ответов
+        Google Forms; при промахе опрос один раз досинхронизируется
+        инкрементально (см. SurveySyncService.sync_if_stale).
+        """
+        user_id = user.id
         survey = self.survey_repo.get(self.db, survey_id)
         if not survey:
             raise ValidationException("Survey not found")
         
-        user = self.user_repo.get(self.db, user_id)
-        if not user:
-            raise AuthorizationException("User not found")
-        
         response = self.response_repo.get_by_survey_and_respondent(
             self.db, survey_id, user_id
         )
@@ -133,7 +174,7 @@ class ParticipationService:
                 "You have already received the reward for this survey"
             )
         
-        author = self.user_repo.get(self.db, survey.author_id)
+        author = self.user_repo.get(self.db, survey.google_account.user_id) if survey.google_account else None
         if not author:
             raise ValidationException("Survey author not found")
         
@@ -142,7 +183,31 @@ class ParticipationService:
             raise ValidationException(
                 "Survey author has insufficient balance to pay rewards"
             )
+
+        synced = await self._find_synced_response(survey, user)
+        if not synced:
+            raise ValidationException(
+                "Your form response was not found. Submit the Google Form with your respondent code and try again"
+            )
         try:
+            # Слот, занятый при старте, переходит в засчитанный ответ; если он истек
+            # и возвращен, ответ засчитывается только при наличии свободного места
+            reserved = self.response_repo.take_reservation(self.db, response.id)
+            # Счетчик ответов и статус меняются одним UPDATE под блокировкой строки опроса
+            counted = self.survey_repo.increment_response_count(self.db, survey_id, from_reservation=reserved)
+            if counted is None:
+                raise SurveyValidationException(
+                    "Survey has reached the maximum number of responses",
+                    survey_id=str(survey_id)
+                )
+            self.db.expire(survey, ["total_responses", "reserved_slots", "status", "updated_at"])
+            self.db.expire(response, ["reserved_until"])
+            # Пользователь мог прийти из principal cache - перечитываем балансы под блокировкой
+            # (в порядке id, чтобы встречные выплаты не блокировали друг друга)
+            for account in sorted({user, author}, key=lambda u: u.id):
+                self.db.refresh(account, attribute_names=["balance"], with_for_update=True)
+            if author.balance < survey.reward_per_response:
+                raise InsufficientBalanceException(survey.reward_per_response, author.balance, author.id)
             user.balance += survey.reward_per_response
             author.balance -= survey.reward_per_response
             participant_transaction = BalanceTransaction(
@@ -166,23 +231,25 @@ class ParticipationService:
             response.is_verified = True
             response.reward_paid = True
             response.completed_at = datetime.now(timezone.utc)
-            survey.total_responses += 1
-            if (
-                survey.responses_needed
-                and survey.total_responses >= survey.responses_needed
-            ):
-                survey.status = SurveyStatus.COMPLETED
-                logger.info(f"Survey {survey_id} completed - reached target responses")
+            # Ответ Google засчитывается один раз: google_response_id уникален
+            response.google_response_id = synced.google_response_id
+            response.google_timestamp = synced.submitted_at
+            reward = survey.reward_per_response
             self.db.commit()
+            if counted.status == SurveyStatus.COMPLETED:
+                logger.info(f"Survey {survey_id} completed - reached target responses")
             logger.info(
-                f"User {user_id} completed survey {survey_id} and earned {survey.reward_per_response} points"
+                f"User {user_id} completed survey {survey_id} and earned {reward} points"
             )
             return SurveyVerifyResponse(
                 verified=True,
-                reward_earned=survey.reward_per_response,
+                reward_earned=reward,
                 new_balance=user.balance,
-                message=f"Congratulations! You earned {survey.reward_per_response} points. Your new balance is {user.balance} points.",
+                message=f"Congratulations! You earned {reward} points. Your new balance is {user.balance} points.",
             )
+        except SurveyValidationException:
+            self.db.rollback()
+            raise
         except FelendException as e:
             self.db.rollback()
             logger.error(
@@ -190,39 +257,112 @@ class ParticipationService:
             )
             raise ValidationException("Failed to process reward. Please try again.")
 
+    async def _find_synced_response(self, survey: Survey, user: User) -> Optional[SyncedFormResponse]:
+        """Незасчитанный ответ участника в индексе; при промахе - досинхронизация опроса"""
+        emails = [user.email, *(account.email for account in self.google_account_repo.get_by_user_id(self.db, user.id))]
+        synced = self.synced_repo.find_unclaimed(self.db, survey.id, emails, user.respondent_code)
+        if synced is None and await survey_sync_service.sync_if_stale(self.db, survey) is not None:
+            synced = self.synced_repo.find_unclaimed(self.db, survey.id, emails, user.respondent_code)
+        return synced
+
     def get_user_participation_status(
         self, survey_id: int, user_id: int
     ) -> Dict[str, Any]:
-        can_participate = self.survey_repo.can_user_participate(
-            self.db, survey_id, user_id
+        return self.get_participation_statuses([survey_id], user_id)[survey_id]
+
+    def get_participation_statuses(self, survey_ids: List[int], user_id: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Статусы участия пользователя для нескольких опросов двумя запросами
+
+        Неизвестные опросы получают статус not_started без возможности участия.
+        Если ответов несколько, статус берется по последнему.
+        """
+        survey_ids = list(dict.fromkeys(survey_ids))
+        rules = {row.id: row for row in self.survey_repo.get_participation_rules(self.db, survey_ids)}
+        responses: Dict[int, list] = {}
+        for row in self.response_repo.get_user_responses_for_surveys(self.db, user_id, survey_ids):
+            responses.setdefault(row.survey_id, []).append(row)
+
+        statuses = {}
+        for survey_id in survey_ids:
+            survey = rules.get(survey_id)
+            survey_responses = responses.get(survey_id)
+            if not survey_responses:
+                statuses[survey_id] = {
+                    "status": "not_started",
+                    "can_participate": (
+                        survey is not None
+                        and survey.status == SurveyStatus.ACTIVE
+                        and survey.author_user_id != user_id
+                        and survey.max_responses_per_user > 0
+                    ),
+                    "started_at": None,
+                    "completed_at": None,
+                    "reward_earned": 0,
+                }
+                continue
+            response = survey_responses[-1]
+            if response.reward_paid:
+                statuses[survey_id] = {
+                    "status": "completed",
+                    "can_participate": False,
+                    "started_at": response.started_at,
+                    "completed_at": response.completed_at,
+                    "reward_earned": survey.reward_per_response if survey else 0,
+                }
+            else:
+                statuses[survey_id] = {
+                    "status": "in_progress",
+                    "can_participate": False,
+                    "started_at": response.started_at,
+                    "completed_at": None,
+                    "reward_earned": 0,
+                }
+        return statuses
+
+    def get_my_responses(
+        self, user_id: int, limit: int = 20, cursor: Optional[str] = None, page: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Страница ответов пользователя с курсором следующей страницы и total
+
+        page (OFFSET) оставлен для старых клиентов и применяется только без курсора.
+        """
+        rows = self.response_repo.get_user_responses_page(
+            self.db,
+            user_id,
+            limit + 1,  # лишняя строка показывает, есть ли следующая страница
+            after=decode_cursor(cursor) if cursor else None,
+            offset=(page - 1) * limit,
         )
-        response = self.response_repo.get_by_survey_and_respondent(
-            self.db, survey_id, user_id
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].started_at, rows[-1].id)
+        total, total_exact = self.response_repo.count_user_responses(
+            self.db, user_id, settings.MY_RESPONSES_EXACT_COUNT_LIMIT
         )
-        if not response:
-            return {
-                "status": "not_started",
-                "can_participate": can_participate,
-                "started_at": None,
-                "completed_at": None,
-                "reward_earned": 0,
-            }
-        if response.reward_paid:
-            survey = self.survey_repo.get(self.db, survey_id)
-            reward_earned = survey.reward_per_response if survey else 0
-            return {
-                "status": "completed",
-                "can_participate": False,
-                "started_at": response.started_at,
-                "completed_at": response.completed_at,
-                "reward_earned": reward_earned,
+        items = [
+            {
+                "id": row.id,
+                "survey": {
+                    "id": row.survey_id,
+                    "title": row.survey_title,
+                    "reward_per_response": row.reward_per_response,
+                },
+                "started_at": row.started_at,
+                "completed_at": row.completed_at,
+                "reward_earned": row.reward_per_response if row.reward_paid else 0,
+                "status": "completed" if row.is_verified else "in_progress",
             }
+            for row in rows
+        ]
         return {
-            "status": "in_progress",
-            "can_participate": False,
-            "started_at": response.started_at,
-            "completed_at": None,
-            "reward_earned": 0,
+            "items": items,
+            "per_page": limit,
+            "next_cursor": next_cursor,
+            "total": total,
+            "total_exact": total_exact,
         }
 
     def get_user_responses_count(self, survey_id: int, user_id: int) -> int:
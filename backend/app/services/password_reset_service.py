@@ -15,7 +15,7 @@ from app.core.exceptions import (
     VerificationRateLimitException,
     VerificationAlreadyUsedException
 )
-from app.core.security import get_password_hash
+from app.core.password_hashing import password_hasher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -103,7 +103,7 @@ class PasswordResetService:
         )
         
         # Отправить код на email
-        email_sent = self.email_service.send_password_reset_code(user.email, code)
+        email_sent = self.email_service.send_password_reset_code(self.db, user.email, code)
         
         if not email_sent:
             logger.error(f"Failed to send password reset email to {user.email}")
@@ -118,7 +118,7 @@ class PasswordResetService:
             masked_email
         )
     
-    def reset_password(
+    async def reset_password(
         self, 
         email: str, 
         code: str, 
@@ -184,7 +184,7 @@ class PasswordResetService:
             raise InvalidVerificationCodeException(attempts_left)
         
         # Код правильный! Сбросить пароль
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await password_hasher.hash(new_password)
         self.db.commit()
         self.db.refresh(user)
         
@@ -0,0 +1,172 @@
+"""
+Каталог вопросов формы и кодирование ответов
+
+Вопросы Google Forms нормализуются в survey_questions, ответы хранятся в
+survey_answers: варианты - целым кодом (индекс в SurveyQuestion.options),
+шкалы, даты и время - числом, свободный текст - строкой. Агрегаты по вопросу
+считаются по локальным данным без повторных запросов к Google.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from app.models import QuestionKind, SurveyQuestion
+from app.schemas import FormItem
+
+# Код ответа "Другое" (текст ответа - в SurveyAnswer.text)
+OTHER_CHOICE = -1
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _describe_question(question: Dict[str, Any]) -> Dict[str, Any]:
+    """Тип, варианты и обязательность вопроса Forms API"""
+    described = {"options": None, "has_other": False, "required": bool(question.get("required"))}
+    if "choiceQuestion" in question:
+        choice = question["choiceQuestion"]
+        options = choice.get("options", [])
+        described.update(
+            kind=QuestionKind.checkbox if choice.get("type") == "CHECKBOX" else QuestionKind.choice,
+            options=[option["value"] for option in options if "value" in option],
+            has_other=any(option.get("isOther") for option in options),
+        )
+    elif "scaleQuestion" in question or "ratingQuestion" in question:
+        described["kind"] = QuestionKind.scale
+    elif "textQuestion" in question:
+        described["kind"] = QuestionKind.text
+    elif "dateQuestion" in question:
+        described["kind"] = QuestionKind.date
+    elif "timeQuestion" in question:
+        described["kind"] = QuestionKind.time
+    else:
+        described["kind"] = QuestionKind.other
+    return described
+
+
+def catalog_from_items(items: Iterable[Union[FormItem, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Вопросы формы в порядке следования
+
+    Элементы без вопросов (текст, картинки, разрывы страниц) пропускаются;
+    каждая строка сетки становится отдельным вопросом с вариантами столбцов.
+    """
+    catalog = []
+    for item in items:
+        if isinstance(item, FormItem):
+            item = item.model_dump()
+        title = item.get("title") or ""
+        if item.get("questionItem"):
+            question = item["questionItem"].get("question", {})
+            if question.get("questionId"):
+                catalog.append({"google_question_id": question["questionId"], "title": title, **_describe_question(question)})
+        elif item.get("questionGroupItem"):
+            group = item["questionGroupItem"]
+            columns = group.get("grid", {}).get("columns", {})
+            for question in group.get("questions", []):
+                if not question.get("questionId"):
+                    continue
+                row_title = question.get("rowQuestion", {}).get("title", "")
+                catalog.append({
+                    "google_question_id": question["questionId"],
+                    "title": f"{title}: {row_title}" if row_title else title,
+                    **_describe_question({"choiceQuestion": columns, "required": question.get("required")}),
+                })
+    for position, question in enumerate(catalog):
+        question["position"] = position
+    return catalog
+
+
+def question_types(catalog: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Краткое описание вопросов для Survey.question_types"""
+    return {
+        "questions": [
+            {"type": question["kind"].value, "required": question["required"],
+             **({"options": question["options"]} if question["options"] is not None else {})}
+            for question in catalog
+        ]
+    }
+
+
+class QuestionCatalog:
+    """Каталог вопросов опроса на время синхронизации: questionId -> SurveyQuestion"""
+
+    def __init__(self, questions: Iterable[SurveyQuestion]):
+        self.questions = {question.google_question_id: question for question in questions}
+        self._codes = {
+            question.google_question_id: {value: code for code, value in enumerate(question.options or [])}
+            for question in self.questions.values()
+        }
+
+    def covers(self, google_responses: Iterable[Dict[str, Any]]) -> bool:
+        """Известны ли все вопросы и варианты (без "Другое") в ответах"""
+        for google_response in google_responses:
+            for question_id, answer in google_response.get("answers", {}).items():
+                question = self.questions.get(question_id)
+                if question is None:
+                    return False
+                if question.kind in (QuestionKind.choice, QuestionKind.checkbox) and not question.has_other:
+                    codes = self._codes[question_id]
+                    if any(value not in codes for value in _text_values(answer)):
+                        return False
+        return True
+
+    def encode(self, survey_id: int, synced_response_id: int, google_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Строки survey_answers для одного ответа формы (вопросы не из каталога пропускаются)"""
+        rows = []
+        for question_id, answer in google_response.get("answers", {}).items():
+            question = self.questions.get(question_id)
+            if question is None or question.kind == QuestionKind.other:
+                continue
+            for value in _text_values(answer):
+                row = {
+                    "survey_id": survey_id,
+                    "question_id": question.id,
+                    "synced_response_id": synced_response_id,
+                    "choice": None,
+                    "number": None,
+                    "text": None,
+                }
+                if question.kind in (QuestionKind.choice, QuestionKind.checkbox):
+                    code = self._codes[question_id].get(value)
+                    row["choice"] = OTHER_CHOICE if code is None else code
+                    row["text"] = value if code is None else None
+                elif question.kind == QuestionKind.scale:
+                    row["number"] = _to_float(value)
+                elif question.kind == QuestionKind.date:
+                    row["number"], row["text"] = _date_to_days(value), value
+                elif question.kind == QuestionKind.time:
+                    row["number"], row["text"] = _time_to_seconds(value), value
+                else:
+                    row["text"] = value
+                rows.append(row)
+        return rows
+
+
+def _text_values(answer: Dict[str, Any]) -> List[str]:
+    return [item.get("value", "") for item in answer.get("textAnswers", {}).get("answers", [])]
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _date_to_days(value: str) -> Optional[float]:
+    """"2024-01-31" -> дней от 1970-01-01 (дата без года не кодируется)"""
+    try:
+        return float((date.fromisoformat(value) - _EPOCH).days)
+    except ValueError:
+        return None
+
+
+def _time_to_seconds(value: str) -> Optional[float]:
+    """"10:30" или "01:20:05" (длительность) -> секунд"""
+    try:
+        parts = [int(part) for part in value.split(":")]
+    except ValueError:
+        return None
+    if not 2 <= len(parts) <= 3:
+        return None
+    hours, minutes, seconds = (parts + [0])[:3]
+    return float(hours * 3600 + minutes * 60 + seconds)
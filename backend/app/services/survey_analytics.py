@@ -0,0 +1,331 @@
+"""
+Аналитика ответов опроса для автора
+
+Закодированные ответы (см. question_catalog) читаются из survey_answers в
+массивы NumPy: коды вариантов - (question_id, synced_response_id, choice),
+числа - (question_id, number). Гистограммы всех вопросов с вариантами
+считаются одним np.bincount по сдвинутым кодам, перекрестная таблица двух
+вопросов - соединением их ответов по synced_response_id через searchsorted
+(у вопроса с флажками пар из одного ответа формы может быть несколько).
+Ответ "Другое" (код -1) попадает в последний столбец гистограммы.
+
+Результат кэшируется в процессе уже закодированным JSON с ключом
+(survey_id, last_synced_at): новые ответы появляются только при синхронизации,
+а она сдвигает last_synced_at. Время прохождения меняется и без синхронизации
+(подтверждение участия по уже известному ответу) - оно устаревает не больше
+чем на TTL кэша.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import AuthorizationException, SurveyNotFoundException, ValidationException
+from app.core.metrics import record_cache_lookup
+from app.core.responses import dumps
+from app.models import GoogleAccount, QuestionKind, Survey, SurveyAnswer, SurveyResponse
+from app.repositories.survey_question_repository import survey_question_repository
+from app.repositories.synced_form_response_repository import synced_form_response_repository
+from app.schemas import (
+    CompletionTimeSummary,
+    CrossTab,
+    NumericSummary,
+    QuestionAnalytics,
+    SurveyAnalytics,
+)
+from app.services.question_catalog import OTHER_CHOICE
+
+_CHOICE_KINDS = (QuestionKind.choice, QuestionKind.checkbox)
+_NUMERIC_KINDS = (QuestionKind.scale, QuestionKind.date, QuestionKind.time)
+
+# Столбцы массива вариантов: question_id, synced_response_id, choice
+_QUESTION, _RESPONSE, _CHOICE = range(3)
+
+# survey_id, last_synced_at, вопросы перекрестной таблицы
+CacheKey = Tuple[int, Optional[datetime], Optional[int], Optional[int]]
+
+
+def _to_array(rows: Sequence[Row], width: int, dtype: Any) -> np.ndarray:
+    """Строки результата -> массив (rows, width) без промежуточных кортежей"""
+    flat = np.fromiter(chain.from_iterable(rows), dtype=dtype, count=len(rows) * width)
+    return flat.reshape(len(rows), width)
+
+
+def _slots(codes: np.ndarray, width: int) -> np.ndarray:
+    """Коды вариантов -> столбцы гистограммы ("Другое" - последний)"""
+    return np.where(codes == OTHER_CHOICE, width - 1, codes)
+
+
+def _question_rows(array: np.ndarray, question_id: int) -> np.ndarray:
+    """Строки вопроса из массива, отсортированного по question_id"""
+    start, end = np.searchsorted(array[:, 0], [question_id, question_id + 1])
+    return array[start:end]
+
+
+def histograms(choices: np.ndarray, question_ids: np.ndarray, widths: np.ndarray) -> List[np.ndarray]:
+    """
+    Гистограммы вопросов с вариантами одним bincount
+
+    question_ids - id вопросов по возрастанию, widths - число вариантов + 1.
+    Ответы вопросов не из question_ids (тип вопроса изменили в форме) пропускаются.
+    """
+    offsets = np.cumsum(widths) - widths
+    position = np.minimum(np.searchsorted(question_ids, choices[:, _QUESTION]), len(question_ids) - 1)
+    known = question_ids[position] == choices[:, _QUESTION]
+    position, codes = position[known], choices[known, _CHOICE]
+    slots = np.where(codes == OTHER_CHOICE, widths[position] - 1, codes)
+    counts = np.bincount(offsets[position] + slots, minlength=int(widths.sum()))
+    return np.split(counts, offsets[1:])
+
+
+def cross_tab(choices: np.ndarray, row_question_id: int, row_width: int,
+              column_question_id: int, column_width: int) -> np.ndarray:
+    """
+    Число пар (вариант строки, вариант столбца) в одних и тех же ответах формы
+
+    choices отсортирован по (question_id, synced_response_id), поэтому ответы
+    вопроса столбцов упорядочены по synced_response_id.
+    """
+    rows = _question_rows(choices, row_question_id)
+    columns = _question_rows(choices, column_question_id)
+    starts = np.searchsorted(columns[:, _RESPONSE], rows[:, _RESPONSE], side="left")
+    matches = np.searchsorted(columns[:, _RESPONSE], rows[:, _RESPONSE], side="right") - starts
+    row_index = np.repeat(np.arange(len(rows)), matches)
+    # k-я пара строки i - столбец starts[i] + (k - номер первой пары строки i)
+    first_pair = np.cumsum(matches) - matches
+    column_index = np.repeat(starts - first_pair, matches) + np.arange(len(row_index))
+    flat = (
+        _slots(rows[row_index, _CHOICE], row_width) * column_width
+        + _slots(columns[column_index, _CHOICE], column_width)
+    )
+    return np.bincount(flat, minlength=row_width * column_width).reshape(row_width, column_width)
+
+
+def numeric_summary(values: np.ndarray) -> NumericSummary:
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return NumericSummary(
+        count=len(values),
+        mean=float(values.mean()),
+        min=float(values.min()),
+        p25=float(p25),
+        median=float(median),
+        p75=float(p75),
+        max=float(values.max()),
+    )
+
+
+@dataclass
+class _Entry:
+    data: bytes
+    expires_at: float
+
+
+class SurveyAnalyticsCache:
+    """Потокобезопасный LRU кэш закодированной аналитики с TTL"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry.expires_at > time.monotonic()
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache_lookup("survey_analytics", hit=hit)
+        return entry.data if hit else None
+
+    def put(self, key: CacheKey, data: bytes) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = _Entry(data=data, expires_at=time.monotonic() + self.ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instance
+survey_analytics_cache = SurveyAnalyticsCache(
+    ttl_seconds=settings.SURVEY_ANALYTICS_CACHE_TTL_SECONDS,
+    max_entries=settings.SURVEY_ANALYTICS_CACHE_MAX_ENTRIES,
+)
+
+
+class SurveyAnalyticsService:
+    """Аналитика ответов опросов автора"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_analytics(
+        self,
+        survey_id: int,
+        user_id: int,
+        row_question_id: Optional[int] = None,
+        column_question_id: Optional[int] = None,
+    ) -> bytes:
+        """
+        Аналитика опроса автора (JSON SurveyAnalytics)
+
+        Перекрестная таблица строится, если заданы оба вопроса с вариантами.
+        """
+        if (row_question_id is None) != (column_question_id is None):
+            raise ValidationException("row_question_id and column_question_id must be given together")
+
+        survey = self.db.execute(
+            select(Survey.last_synced_at, GoogleAccount.user_id)
+            .join(GoogleAccount, GoogleAccount.id == Survey.google_account_id)
+            .where(Survey.id == survey_id)
+        ).first()
+        if survey is None:
+            raise SurveyNotFoundException(survey_id)
+        last_synced_at, author_id = survey
+        if author_id != user_id:
+            raise AuthorizationException("You are not the author of this survey")
+
+        key = (survey_id, last_synced_at, row_question_id, column_question_id)
+        data = survey_analytics_cache.get(key)
+        if data is None:
+            data = dumps(self.compute(survey_id, last_synced_at, row_question_id, column_question_id))
+            survey_analytics_cache.put(key, data)
+        return data
+
+    def compute(
+        self,
+        survey_id: int,
+        last_synced_at: Optional[datetime],
+        row_question_id: Optional[int] = None,
+        column_question_id: Optional[int] = None,
+    ) -> SurveyAnalytics:
+        """Посчитать аналитику по survey_answers без кэша"""
+        questions = survey_question_repository.get_catalog(self.db, survey_id)
+        by_id = {question.id: question for question in questions}
+        if row_question_id is not None:
+            for question_id in (row_question_id, column_question_id):
+                question = by_id.get(question_id)
+                if question is None or question.kind not in _CHOICE_KINDS:
+                    raise ValidationException(f"Question {question_id} is not a choice question of this survey")
+
+        choice_questions = sorted(
+            (question for question in questions if question.kind in _CHOICE_KINDS), key=lambda question: question.id
+        )
+        widths = {question.id: len(question.options or []) + 1 for question in choice_questions}
+        choices = self._load_choices(survey_id)
+        counts: Dict[int, np.ndarray] = {}
+        if choice_questions:
+            question_ids = np.fromiter(widths, dtype=np.int64, count=len(widths))
+            width_array = np.fromiter(widths.values(), dtype=np.int64, count=len(widths))
+            counts = dict(zip(widths, histograms(choices, question_ids, width_array)))
+
+        numbers = self._load_numbers(survey_id)
+        answered = self._answered_counts(survey_id)
+
+        result = []
+        for question in questions:
+            item = QuestionAnalytics(
+                question_id=question.id,
+                title=question.title,
+                kind=question.kind,
+                answered=answered.get(question.id, 0),
+            )
+            if question.id in counts:
+                item.options = list(question.options or [])
+                item.counts = counts[question.id].tolist()
+            elif question.kind in _NUMERIC_KINDS:
+                values = _question_rows(numbers, question.id)[:, 1]
+                if len(values):
+                    item.summary = numeric_summary(values)
+            result.append(item)
+
+        analytics = SurveyAnalytics(
+            survey_id=survey_id,
+            last_synced_at=last_synced_at,
+            responses=synced_form_response_repository.count_by_survey(self.db, survey_id),
+            questions=result,
+            completion_time=self._completion_time(survey_id),
+        )
+        if row_question_id is not None:
+            matrix = cross_tab(
+                choices, row_question_id, widths[row_question_id], column_question_id, widths[column_question_id]
+            )
+            analytics.cross_tab = CrossTab(
+                row_question_id=row_question_id, column_question_id=column_question_id, counts=matrix.tolist()
+            )
+        return analytics
+
+    def _load_choices(self, survey_id: int) -> np.ndarray:
+        """(question_id, synced_response_id, choice) по возрастанию question_id, synced_response_id"""
+        rows = self.db.execute(
+            select(SurveyAnswer.question_id, SurveyAnswer.synced_response_id, SurveyAnswer.choice)
+            .where(SurveyAnswer.survey_id == survey_id, SurveyAnswer.choice.isnot(None))
+            .order_by(SurveyAnswer.question_id, SurveyAnswer.synced_response_id)
+        ).all()
+        return _to_array(rows, 3, np.int64)
+
+    def _load_numbers(self, survey_id: int) -> np.ndarray:
+        """(question_id, number) по возрастанию question_id (id вопросов точно представимы в float64)"""
+        rows = self.db.execute(
+            select(SurveyAnswer.question_id, SurveyAnswer.number)
+            .where(SurveyAnswer.survey_id == survey_id, SurveyAnswer.number.isnot(None))
+            .order_by(SurveyAnswer.question_id)
+        ).all()
+        return _to_array(rows, 2, np.float64)
+
+    def _answered_counts(self, survey_id: int) -> Dict[int, int]:
+        """question_id -> число ответов формы с этим вопросом"""
+        return dict(self.db.execute(
+            select(SurveyAnswer.question_id, func.count(func.distinct(SurveyAnswer.synced_response_id)))
+            .where(SurveyAnswer.survey_id == survey_id)
+            .group_by(SurveyAnswer.question_id)
+        ).all())
+
+    def _completion_time(self, survey_id: int) -> Optional[CompletionTimeSummary]:
+        """Перцентили времени от начала участия до отправки формы по подтвержденным ответам"""
+        rows = self.db.execute(
+            select(SurveyResponse.started_at, SurveyResponse.google_timestamp).where(
+                SurveyResponse.survey_id == survey_id,
+                SurveyResponse.is_verified.is_(True),
+                SurveyResponse.google_timestamp.isnot(None),
+            )
+        ).all()
+        seconds = np.fromiter(
+            ((submitted - started).total_seconds() for started, submitted in rows), dtype=np.float64, count=len(rows)
+        )
+        # Форму могли отправить до нажатия "начать" (ответ нашелся по email)
+        seconds = seconds[seconds >= 0]
+        if not len(seconds):
+            return None
+        p50, p90, p99 = np.percentile(seconds, [50, 90, 99])
+        return CompletionTimeSummary(count=len(seconds), p50=float(p50), p90=float(p90), p99=float(p99))
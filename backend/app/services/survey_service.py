@@ -1,16 +1,23 @@
 from typing import List, Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import re
 from app.models import GoogleAccount, Survey, SurveyStatus, User
-from app.repositories.survey_repository import SurveyRepository, survey_repository
+from app.repositories.survey_repository import (
+    AsyncSurveyRepository,
+    SurveyRepository,
+    async_survey_repository,
+    survey_repository,
+)
+from app.repositories.survey_question_repository import survey_question_repository
 from app.repositories.user_repository import UserRepository, user_repository
 from app.repositories.category_repository import category_repository
 from app.services.google_accounts_service import GoogleAccountsService
+from app.core.fragment_cache import survey_fragment_cache
 from app.schemas import (
     GoogleForm,
     SurveyCreate,
     SurveyUpdate,
-    SurveyListItem,
     SurveyDetail,
     MySurveyDetail,
     CategoryResponse,
@@ -24,6 +31,7 @@ from app.core.exceptions import (
     InsufficientBalanceException,
 )
 from app.services.google_forms_service import GoogleFormsService
+from app.services.question_catalog import catalog_from_items, question_types
 
 
 class SurveyService:
@@ -50,6 +58,9 @@ class SurveyService:
                 survey_data.reward_per_response, author.balance, author.id
             )
 
+        # Вопросы формы сохраняются в каталог - по нему кодируются синхронизированные ответы
+        catalog = catalog_from_items(form.items)
+
         # Валидация категорий
         if survey_data.category_ids:
             if not category_repository.validate_category_ids(self.db, survey_data.category_ids):
@@ -62,7 +73,7 @@ class SurveyService:
             google_form_id=form.formId,
             google_form_url=str(survey_data.google_form_url),
             questions_count=len(form.items),
-            question_types={},
+            question_types=question_types(catalog),
             reward_per_response=survey_data.reward_per_response,
             status=SurveyStatus.ACTIVE,
             responses_needed=survey_data.responses_needed,
@@ -71,6 +82,7 @@ class SurveyService:
 
         self.db.add(survey)
         self.db.flush()  # Получаем ID опроса до commit
+        survey_question_repository.merge_catalog(self.db, survey.id, catalog)
         
         # Привязываем категории
         if survey_data.category_ids:
@@ -83,14 +95,14 @@ class SurveyService:
 
     def get_surveys_feed(
         self, current_user_id: Optional[int] = None, skip: int = 0, limit: int = 50
-    ) -> List[SurveyListItem]:
-        """Получить ленту опросов"""
+    ) -> bytes:
+        """Получить ленту опросов (JSON массив SurveyListItem из кэшированных фрагментов)"""
 
         surveys = self.survey_repo.get_active_surveys(
             self.db, skip, limit, current_user_id
         )
 
-        result = []
+        items = []
         for survey in surveys:
             can_participate = False
             my_responses_count = 0
@@ -103,21 +115,8 @@ class SurveyService:
                     self.db, survey.id, current_user_id
                 )
 
-            survey_item = SurveyListItem(
-                id=survey.id,
-                title=survey.title,
-                description=survey.description,
-                author_name=survey.google_account.name,  # Используем связь с GoogleAccount
-                reward_per_response=survey.reward_per_response,
-                total_responses=survey.total_responses,
-                responses_needed=survey.responses_needed,
-                questions_count=survey.questions_count,
-                can_participate=can_participate,
-                my_responses_count=my_responses_count,
-                categories=[CategoryResponse.model_validate(cat, from_attributes=True) for cat in survey.categories],
-            )
-            result.append(survey_item)
-        return result
+            items.append((survey, can_participate, my_responses_count))
+        return survey_fragment_cache.render_feed(items)
 
     def _get_google_account_for_user(
         self, user_id: int, google_account_id: Optional[int] = None
@@ -281,3 +280,38 @@ class SurveyService:
             raise ValidationException("Cannot delete survey with responses")
         self.survey_repo.delete(self.db, survey_id)
         return True
+
+
+class AsyncSurveyService:
+    """Async read-путь для ленты опросов (используется при DB_ASYNC_ENABLED)"""
+
+    def __init__(self, db: AsyncSession):
+        self.survey_repo: AsyncSurveyRepository = async_survey_repository
+        self.db = db
+
+    async def get_surveys_feed(
+        self, current_user_id: Optional[int] = None, skip: int = 0, limit: int = 50
+    ) -> bytes:
+        """Получить ленту опросов (JSON массив SurveyListItem из кэшированных фрагментов)"""
+        surveys = await self.survey_repo.get_active_surveys(
+            self.db, skip, limit, current_user_id
+        )
+
+        # Участия пользователя считаются одним запросом на всю страницу
+        my_counts: Dict[int, int] = {}
+        if current_user_id:
+            my_counts = await self.survey_repo.get_user_participation_counts(
+                self.db, [survey.id for survey in surveys], current_user_id
+            )
+
+        items = []
+        for survey in surveys:
+            my_responses_count = my_counts.get(survey.id, 0)
+            # Опросы в ленте активны; автор не может участвовать в своем опросе
+            can_participate = bool(
+                current_user_id
+                and survey.google_account.user_id != current_user_id
+                and my_responses_count < survey.max_responses_per_user
+            )
+            items.append((survey, can_participate, my_responses_count))
+        return survey_fragment_cache.render_feed(items)
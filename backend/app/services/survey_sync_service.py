@@ -1,169 +1,206 @@
 """
 Сервис для синхронизации ответов из Google Forms
+
+Ответы формы складываются в локальный индекс synced_form_responses
+(survey_id, email, код респондента), по которому подтверждается участие,
+а значения ответов - в survey_answers по каталогу вопросов survey_questions
+(см. question_catalog). Синхронизация инкрементальная: запрашиваются только
+ответы, отправленные не раньше Survey.sync_watermark. Уже известные responseId
+пропускаются, если ответ не редактировался; у отредактированного (сдвинулся
+lastSubmittedTime) обновляется строка индекса и перекодируются ответы.
 """
 
+import re
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import logging
 
-from app.models import Survey, SurveyResponse, User
+from app.models import Survey
 from app.repositories.survey_repository import survey_repository
+from app.repositories.survey_question_repository import survey_question_repository
 from app.repositories.survey_response_repository import survey_response_repository
-from app.repositories.user_repository import user_repository
-
-from app.core.exceptions import GoogleAPIException, ValidationException
+from app.repositories.synced_form_response_repository import synced_form_response_repository
+from app.services.google_forms_service import GoogleFormsService, get_google_forms_service
+from app.services.question_catalog import QuestionCatalog, catalog_from_items
+from app.core.config import settings
+from app.core.exceptions import FelendException, GoogleAPIException, ValidationException
+from app.core.security import RESPONDENT_CODE_PATTERN
+from app.schemas import SyncResponse
 
 
 
 logger = logging.getLogger(__name__)
 
+# Google отдает наносекунды: "2024-01-31T10:00:00.123456789Z"
+_EXTRA_FRACTION_DIGITS = re.compile(r"(\.\d{6})\d+")
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(_EXTRA_FRACTION_DIGITS.sub(r"\1", value).replace("Z", "+00:00"))
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """SQLite возвращает naive время - считаем его UTC"""
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
 
 class SurveySyncService:
     """Сервис для синхронизации ответов из Google Forms"""
-    
+
     def __init__(self):
         self.survey_repo = survey_repository
         self.response_repo = survey_response_repository
-        self.user_repo = user_repository
-    
+        self.synced_repo = synced_form_response_repository
+        self.question_repo = survey_question_repository
+
     async def sync_survey_responses(
-        self, 
-        db: Session, 
-        survey_id: int, 
+        self,
+        db: Session,
+        survey_id: int,
         force_full_sync: bool = False
-    ) -> Any:
+    ) -> SyncResponse:
         """Синхронизировать ответы для конкретного опроса"""
-        
+
         # Получить опрос
         survey = self.survey_repo.get(db, survey_id)
         if not survey:
             raise ValidationException("Survey not found")
-        
-        # Получить автора опроса для доступа к Google API
-        author = self.user_repo.get(db, survey.author_id)
-        if not author or not author.google_access_token:
+
+        # Ответы читаются от имени Google аккаунта, к которому привязан опрос
+        if not survey.google_account or not survey.google_account.access_token:
             raise ValidationException("Survey author doesn't have Google access")
-        
+
         try:
-            # Создать Google Forms сервис
-            forms_service = get_google_forms_service(author.google_access_token)
-            
-            # Получить ID формы из URL
-            form_id = GoogleFormsService.extract_form_id_from_url(survey.google_form_url)
-            if not form_id:
-                raise ValidationException("Invalid Google Form URL")
-            
-            # Получить все ответы из Google Forms
-            all_google_responses = []
+            forms_service = get_google_forms_service(survey.google_account)
+            watermark = _as_utc(survey.sync_watermark)
+            submitted_after = None if force_full_sync else watermark
+            catalog = QuestionCatalog(self.question_repo.get_catalog(db, survey_id))
+            catalog_refreshed = False
+            synced_count = 0
+            new_count = 0
+            edited_count = 0
             next_page_token = None
-            
+
+            # Каждая страница сразу пишется в индекс - память не растет с размером формы
             while True:
                 response_data = await forms_service.get_form_responses(
-                    form_id, next_page_token
+                    survey.google_form_id, next_page_token, submitted_after=submitted_after
                 )
-                
-                google_responses = response_data.get("responses", [])
-                all_google_responses.extend(google_responses)
-                
+                google_responses = [r for r in response_data.get("responses", []) if r.get("responseId")]
+                rows = [self._to_index_row(google_response) for google_response in google_responses]
+                for row in rows:
+                    row["survey_id"] = survey_id
+                    if watermark is None or row["submitted_at"] > watermark:
+                        watermark = row["submitted_at"]
+                inserted_ids, edited_ids = self.synced_repo.upsert(db, rows)
+                new_count += len(inserted_ids)
+                edited_count += len(edited_ids)
+                synced_count += len(rows)
+
+                # Ответы на вопросы или варианты, которых нет в каталоге - форма изменилась.
+                # Форма перечитывается не больше раза за синхронизацию: то, что не
+                # покрыл свежий каталог, кодируется как "Другое" или пропускается
+                changed_ids = {**inserted_ids, **edited_ids}
+                changed_responses = [r for r in google_responses if r["responseId"] in changed_ids]
+                if not catalog_refreshed and not catalog.covers(changed_responses):
+                    catalog = await self._refresh_catalog(db, survey, forms_service)
+                    catalog_refreshed = True
+                self.question_repo.delete_answers(db, edited_ids.values())
+                self.question_repo.add_answers(db, [
+                    row
+                    for google_response in changed_responses
+                    for row in catalog.encode(survey_id, changed_ids[google_response["responseId"]], google_response)
+                ])
+
                 next_page_token = response_data.get("next_page_token")
                 if not next_page_token:
                     break
-            
-            # Синхронизировать ответы
-            synced_count = 0
-            new_responses = []
-            
-            for google_response in all_google_responses:
-                google_response_id = google_response.get("responseId")
-                
-                if not google_response_id:
-                    continue
-                
-                # Проверить, есть ли уже такой ответ
-                existing_response = self.response_repo.get_by_google_response_id(
-                    db, google_response_id
-                )
-                
-                if not existing_response:
-                    # Попытаться найти пользователя по email (если форма собирает email)
-                    respondent_id = None
-                    if survey.collects_emails:
-                        respondent_id = await self._find_respondent_by_email(
-                            db, google_response
-                        )
-                    
-                    # Создать новый ответ
-                    response_obj = self.response_repo.create_from_google_response(
-                        db, survey_id, google_response, respondent_id
-                    )
-                    new_responses.append(response_obj)
-                
-                synced_count += 1
-            
-            # Обновить счетчик ответов в опросе
-            total_responses = self.response_repo.count_responses_by_survey(db, survey_id)
-            survey.total_responses = total_responses
-            survey.last_synced_at = datetime.now(timezone.utc)
+
+            # total_responses опроса не трогаем: это счетчик засчитанных (оплаченных) ответов
+            synced_at = datetime.now(timezone.utc)
+            self.survey_repo.mark_synced(db, survey_id, watermark, synced_at)
             db.commit()
-            
-            logger.info(f"Synced {len(new_responses)} new responses for survey {survey_id}")
-            
+
+            logger.info(f"Synced {new_count} new and {edited_count} edited responses for survey {survey_id}")
+
             return SyncResponse(
                 survey_id=survey_id,
                 synced_responses=synced_count,
-                new_responses=len(new_responses),
-                total_responses=total_responses,
-                last_sync_at=survey.last_synced_at
+                new_responses=new_count,
+                total_responses=self.synced_repo.count_by_survey(db, survey_id),
+                last_sync_at=synced_at
             )
-            
+
         except GoogleAPIException as e:
+            db.rollback()
             logger.error(f"Google API error during sync for survey {survey_id}: {e}")
             raise ValidationException(f"Failed to sync responses: {str(e)}")
         except Exception as e:
+            db.rollback()
             logger.error(f"Unexpected error during sync for survey {survey_id}: {e}")
             raise ValidationException(f"Sync failed: {str(e)}")
-    
-    async def _find_respondent_by_email(
-        self, 
-        db: Session, 
-        google_response: Dict[str, Any]
-    ) -> Optional[int]:
-        """Найти ID пользователя по email из ответа Google Forms"""
-        try:
-            # В Google Forms email обычно хранится в поле respondentEmail
-            respondent_email = google_response.get("respondentEmail")
-            
-            if not respondent_email:
-                # Попытаться найти в ответах на вопросы
-                answers = google_response.get("answers", {})
-                for question_id, answer_data in answers.items():
-                    text_answers = answer_data.get("textAnswers", {})
-                    if text_answers and text_answers.get("answers"):
-                        for answer in text_answers["answers"]:
-                            text = answer.get("value", "")
-                            # Простая проверка на email
-                            if "@" in text and "." in text:
-                                respondent_email = text
-                                break
-                        if respondent_email:
-                            break
-            
-            if respondent_email:
-                user = self.user_repo.get_by_email(db, respondent_email)
-                return user.id if user else None
-            
+
+    async def sync_if_stale(self, db: Session, survey: Survey) -> Optional[SyncResponse]:
+        """
+        Инкрементальная синхронизация по промаху индекса при подтверждении
+
+        Не чаще SURVEY_SYNC_MIN_INTERVAL_SECONDS на опрос, чтобы поток
+        неудачных подтверждений не превращался в поток запросов к Google.
+        Интервал считается от начала попытки, а не от успешной синхронизации:
+        при ошибках Google (недоступен, отозван токен) запросы тоже не чаще.
+        Ошибки синхронизации логируются, подтверждение просто не находит ответ.
+
+        Returns:
+            Итог синхронизации или None, если она не выполнялась или не удалась
+        """
+        min_interval = timedelta(seconds=settings.SURVEY_SYNC_MIN_INTERVAL_SECONDS)
+        if not self.survey_repo.claim_sync_attempt(db, survey.id, min_interval):
             return None
-            
-        except Exception as e:
-            logger.warning(f"Could not find respondent email: {e}")
+        db.commit()  # время попытки сохраняется, даже если синхронизация откатится
+        try:
+            return await self.sync_survey_responses(db, survey.id)
+        except FelendException as e:
+            logger.warning(f"On-demand sync for survey {survey.id} failed: {e}")
             return None
-    
+
+    async def _refresh_catalog(
+        self, db: Session, survey: Survey, forms_service: GoogleFormsService
+    ) -> QuestionCatalog:
+        """Перечитать вопросы формы и обновить каталог опроса"""
+        form = await forms_service.get_form_info(survey.google_form_id)
+        return QuestionCatalog(self.question_repo.merge_catalog(db, survey.id, catalog_from_items(form.items)))
+
+    @staticmethod
+    def _to_index_row(google_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Строка индекса из ответа Forms API"""
+        # Код респондента - любой текстовый ответ вида RESP_XXXXXXXXX
+        respondent_code = None
+        for answer_data in google_response.get("answers", {}).values():
+            for answer in answer_data.get("textAnswers", {}).get("answers", []):
+                match = RESPONDENT_CODE_PATTERN.fullmatch(answer.get("value", "").strip())
+                if match:
+                    respondent_code = match.group(0).upper()
+                    break
+            if respondent_code:
+                break
+
+        respondent_email = google_response.get("respondentEmail")
+        submitted = google_response.get("lastSubmittedTime") or google_response.get("createTime")
+        return {
+            "google_response_id": google_response["responseId"],
+            "respondent_email": respondent_email.strip().lower() if respondent_email else None,
+            "respondent_code": respondent_code,
+            "submitted_at": _parse_timestamp(submitted) if submitted else datetime.now(timezone.utc),
+        }
+
     async def sync_all_active_surveys(self, db: Session) -> List[SyncResponse]:
         """Синхронизировать все активные опросы"""
         active_surveys = self.survey_repo.get_active_surveys(db)
         sync_results = []
-        
+
         for survey in active_surveys:
             try:
                 result = await self.sync_survey_responses(db, survey.id)
@@ -172,20 +209,21 @@ class SurveySyncService:
                 logger.error(f"Failed to sync survey {survey.id}: {e}")
                 # Продолжаем синхронизацию других опросов
                 continue
-        
+
         return sync_results
-    
+
     def get_sync_status(self, db: Session, survey_id: int) -> Dict[str, Any]:
         """Получить статус синхронизации опроса"""
         survey = self.survey_repo.get(db, survey_id)
         if not survey:
             raise ValidationException("Survey not found")
-        
+
         stats = self.response_repo.get_response_statistics(db, survey_id)
-        
+
         return {
             "survey_id": survey_id,
             "last_synced_at": survey.last_synced_at,
+            "synced_responses": self.synced_repo.count_by_survey(db, survey_id),
             "total_responses": stats["total_responses"],
             "last_response_at": stats["last_response_at"],
             "sync_needed": True  # Можно добавить логику определения необходимости синхронизации
@@ -193,4 +231,4 @@ class SurveySyncService:
 
 
 # Создаем экземпляр сервиса
-survey_sync_service = SurveySyncService()
\ No newline at end of file
+survey_sync_service = SurveySyncService()
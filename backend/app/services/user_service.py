@@ -2,9 +2,11 @@
 Сервис для управления пользователями (user_service)
 """
 
-from typing import List
+from typing import List, Optional, Tuple
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from app.models import User, BalanceTransaction
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models import User, BalanceTransaction, Survey, TransactionType
 from app.repositories.user_repository import user_repository
 from app.schemas import UserUpdate, UserProfile, TransactionItem
 
@@ -19,26 +21,66 @@ class UserService:
         updated_user = self.user_repo.update(self.db, user, user_update)
         return updated_user
 
-    def get_transactions(self, user: User, skip: int = 0, limit: int = 50) -> List[TransactionItem]:
-        """Получить историю транзакций пользователя с информацией о связанных опросах"""
-        transactions = (
-            self.db.query(BalanceTransaction)
+    def get_transactions(
+        self,
+        user: User,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        transaction_type: Optional[TransactionType] = None,
+        skip: int = 0,
+    ) -> Tuple[List[TransactionItem], Optional[str]]:
+        """
+        Страница истории транзакций и курсор следующей страницы (None - последняя)
+
+        Один запрос: нужные колонки транзакций + название связанного опроса
+        через LEFT JOIN, порядок (created_at, id) DESC по индексу
+        ix_balance_transactions_user_id_created_at_id. skip (OFFSET) оставлен
+        для старых клиентов и применяется только без курсора.
+        """
+        query = (
+            self.db.query(
+                BalanceTransaction.id,
+                BalanceTransaction.transaction_type,
+                BalanceTransaction.amount,
+                BalanceTransaction.balance_after,
+                BalanceTransaction.description,
+                BalanceTransaction.created_at,
+                Survey.id.label("survey_id"),
+                Survey.title.label("survey_title"),
+            )
+            .outerjoin(Survey, Survey.id == BalanceTransaction.related_survey_id)
             .filter(BalanceTransaction.user_id == user.id)
-            .order_by(BalanceTransaction.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+        )
+        if transaction_type is not None:
+            query = query.filter(BalanceTransaction.transaction_type == transaction_type)
+        if cursor is not None:
+            query = query.filter(
+                tuple_(BalanceTransaction.created_at, BalanceTransaction.id) < tuple_(*decode_cursor(cursor))
+            )
+        elif skip:
+            query = query.offset(skip)
+        # Лишняя строка показывает, есть ли следующая страница
+        rows = (
+            query.order_by(BalanceTransaction.created_at.desc(), BalanceTransaction.id.desc())
+            .limit(limit + 1)
             .all()
         )
-        result = []
-        for transaction in transactions:
-            transaction_data = TransactionItem.model_validate(transaction)
-            if transaction.related_survey_id:
-                from app.models import Survey
-                survey = self.db.query(Survey).filter(Survey.id == transaction.related_survey_id).first()
-                if survey:
-                    transaction_data.related_survey = {
-                        "id": survey.id,
-                        "title": survey.title
-                    }
-            result.append(transaction_data)
-        return result
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        items = [
+            TransactionItem(
+                id=row.id,
+                transaction_type=row.transaction_type,
+                amount=row.amount,
+                balance_after=row.balance_after,
+                description=row.description,
+                created_at=row.created_at,
+                related_survey={"id": row.survey_id, "title": row.survey_title} if row.survey_id else None,
+            )
+            for row in rows
+        ]
+        return items, next_cursor
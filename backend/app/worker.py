@@ -0,0 +1,43 @@
+"""
+Отдельный процесс фоновых задач
+
+Выполняет те же периодические задачи, что и lifespan API (доставка писем из
+email_outbox, очистка устаревших записей, освобождение брони), но без HTTP
+сервера. Нужен, когда задачи в API не работают: BACKGROUND_JOBS_ENABLED=false
+или CPU инстанса выделяется только на время запроса (Cloud Run по умолчанию) -
+иначе письма из очереди никто не отправит. Задачи запускаются независимо от
+BACKGROUND_JOBS_ENABLED, остановка - по SIGTERM/SIGINT.
+
+Запуск: python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.background_jobs import background_jobs
+from app.core.replica_router import replica_router
+from app.main import app  # noqa: F401 - регистрирует задачи и настраивает логирование
+from app.services.email_delivery_service import smtp_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    background_jobs.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Background worker stopping")
+        await background_jobs.stop()
+        smtp_connection.close()
+        replica_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,38 @@
+"""
+Заполнение balance_rollups по накопленной истории журнала транзакций
+
+Запускать один раз после миграции a8c4e2f7b913 и выкатки версии приложения,
+которая ведет итоги (версии без нее должны быть уже выключены). Приложение не
+останавливается: в PostgreSQL вставки в balance_transactions ждут на время
+заполнения. До запуска сводка баланса считается по журналу.
+
+Запуск: python scripts/backfill_balance_rollups.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import engine
+from app.repositories.balance_rollup_repository import balance_rollup_repository
+
+
+def main() -> int:
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        cutoff = balance_rollup_repository.backfill(connection)
+    if cutoff is None:
+        print("balance_rollups already backfilled, nothing to do", file=sys.stderr)
+        return 0
+    print(
+        f"balance_rollups backfilled up to transaction id {cutoff} in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Бенчмарк ленты опросов: синхронная Session vs AsyncSession
+
+Заполняет базу опросами и запускает приложение в памяти (httpx + ASGITransport)
+дважды, в отдельных процессах: с DB_ASYNC_ENABLED=false (синхронный путь, get_db)
+и с DB_ASYNC_ENABLED=true (get_async_db). Маршрут ленты выбирается при импорте
+приложения, поэтому каждый вариант - свой процесс. Отправляются конкурентные
+запросы к GET /api/v1/surveys, параллельно измеряется задержка /health -
+блокировка event loop запросами к БД видна по ней.
+
+По умолчанию используется временная SQLite база (aiosqlite). Для замеров на
+PostgreSQL передайте --database-url пустой тестовой базы: таблицы будут созданы
+и заполнены скриптом.
+
+Запуск: python scripts/bench_async_db.py [--requests 500] [--concurrency 128] [--surveys 50]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.api.deps import get_async_db, get_db
+from app.core.config import settings
+from app.core.database import Base, to_async_url
+from app.core.security import create_access_token
+from app.models import Category, GoogleAccount, Survey, SurveyStatus
+from app.repositories.user_repository import user_repository
+
+
+def setup_database(database_url: str, surveys: int) -> str:
+    """Создать таблицы, автора с опросами и читателя; вернуть токен читателя"""
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    author = user_repository.create_user(db, email="author@bench.local", full_name="Bench Author")
+    reader = user_repository.create_user(db, email="reader@bench.local", full_name="Bench Reader")
+    account = GoogleAccount(
+        user_id=author.id, google_id="bench-author", email="author@bench.local",
+        name="Bench Author", access_token="bench", is_primary=True,
+    )
+    category = Category(name="Bench")
+    db.add_all([account, category])
+    db.flush()
+    for i in range(surveys):
+        survey = Survey(
+            title=f"Survey {i}", description="Benchmark survey", google_account_id=account.id,
+            google_form_id=f"bench-form-{i}", google_form_url=f"https://docs.google.com/forms/d/bench-form-{i}/viewform",
+            questions_count=10, max_responses_per_user=1, reward_per_response=5,
+            responses_needed=100, status=SurveyStatus.ACTIVE, total_responses=0,
+        )
+        survey.categories.append(category)
+        db.add(survey)
+    db.commit()
+    token = create_access_token(data={"sub": str(reader.id)})
+    db.close()
+    engine.dispose()
+    return token
+
+
+def override_sessions(database_url: str, concurrency: int):
+    """Подменить сессии приложения сессиями бенчмарка; вернуть async engine (или None)"""
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    # Синхронный checkout из пула блокирует event loop: если соединения заняты
+    # приостановленными запросами, цикл встает до pool_timeout. Поэтому пул
+    # рассчитан на всю конкурентность (для обоих путей одинаково).
+    engine = create_engine(database_url, connect_args=connect_args, pool_size=20, max_overflow=concurrency)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    if not settings.DB_ASYNC_ENABLED:
+        return None
+
+    async_engine = create_async_engine(to_async_url(database_url), pool_size=20, max_overflow=concurrency)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = _get_async_db
+    return async_engine
+
+
+async def run_scenario(label: str, token: str, total: int, concurrency: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    health_latencies = []
+    done = False
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Прогрев: соединения пула и кеш пользователя
+        await client.get("/api/v1/surveys", headers=headers)
+
+        async def fetch_feed():
+            async with semaphore:
+                response = await client.get("/api/v1/surveys", headers=headers)
+                assert response.status_code == 200, response.text
+
+        async def probe_health():
+            while not done:
+                started = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe = asyncio.create_task(probe_health())
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch_feed() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        done = True
+        await probe
+
+    health_latencies.sort()
+    p50 = health_latencies[len(health_latencies) // 2] * 1000
+    p99 = health_latencies[max(int(len(health_latencies) * 0.99) - 1, 0)] * 1000
+    print(
+        f"{label:<20} {total / elapsed:8.1f} req/s   "
+        f"/health p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   ({len(health_latencies)} probes)"
+    )
+
+
+async def run_in_process(args: argparse.Namespace) -> None:
+    """Один вариант ленты в текущем процессе (вызывается из main через --scenario)"""
+    async_engine = override_sessions(args.database_url, args.concurrency)
+    label = "after: AsyncSession" if async_engine is not None else "before: sync Session"
+    try:
+        await run_scenario(label, args.token, args.requests, args.concurrency)
+    finally:
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+def main(args: argparse.Namespace, database_url: str) -> None:
+    token = setup_database(database_url, args.surveys)
+    print(f"{args.requests} feed requests, concurrency {args.concurrency}, {args.surveys} surveys\n")
+
+    for async_enabled in ("false", "true"):
+        env = {**os.environ, "DB_ASYNC_ENABLED": async_enabled, "DATABASE_URL": database_url}
+        subprocess.run(
+            [
+                sys.executable, __file__, "--scenario", "--database-url", database_url, "--token", token,
+                "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+            ],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)  # логи запросов искажают замеры
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--surveys", type=int, default=50)
+    parser.add_argument("--database-url", help="URL пустой тестовой базы (по умолчанию временная SQLite)")
+    parser.add_argument("--scenario", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        asyncio.run(run_in_process(args))
+    elif args.database_url:
+        main(args, args.database_url)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            main(args, f"sqlite:///{os.path.join(tmp, 'bench.db')}")
@@ -0,0 +1,129 @@
+"""
+Бенчмарк пропускной способности /auth/login: bcrypt в event loop vs пул процессов
+
+Запускает приложение в памяти (httpx + ASGITransport) на временной SQLite базе,
+отправляет конкурентные запросы логина и параллельно измеряет задержку /health,
+чтобы увидеть, насколько bcrypt блокирует остальные запросы.
+
+Запуск: python scripts/bench_login.py [--requests 64] [--concurrency 16] [--workers 4]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # иначе логины и /health упираются в 429
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.api.deps import get_db
+from app.core.database import Base
+from app.core.password_hashing import PasswordHasher
+from app.repositories.user_repository import user_repository
+import app.services.auth_service as auth_service_module
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def setup_database(db_path: str) -> sessionmaker:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = session_factory()
+    user_repository.create_user(db, email=EMAIL, full_name="Bench User", password=PASSWORD)
+    db.close()
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    return session_factory
+
+
+async def run_scenario(label: str, hasher: PasswordHasher, total: int, concurrency: int) -> None:
+    auth_service_module.password_hasher = hasher
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    health_latencies = []
+    done = False
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Прогрев (в т.ч. запуск процессов пула)
+        await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+        async def login():
+            async with semaphore:
+                response = await client.post(
+                    "/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD}
+                )
+                assert response.status_code == 200, response.text
+
+        async def probe_health():
+            while not done:
+                started = time.perf_counter()
+                response = await client.get("/health")
+                assert response.status_code == 200, response.text
+                health_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe = asyncio.create_task(probe_health())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        done = True
+        await probe
+
+    health_latencies.sort()
+    p50 = health_latencies[len(health_latencies) // 2] * 1000
+    p99 = health_latencies[int(len(health_latencies) * 0.99) - 1] * 1000
+    print(
+        f"{label:<28} {total / elapsed:8.1f} logins/s   "
+        f"/health p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   ({len(health_latencies)} probes)"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{args.requests} logins, concurrency {args.concurrency}, bcrypt rounds 12\n")
+
+    inline = PasswordHasher(max_workers=0, max_queue=0)
+    await run_scenario("before: bcrypt in event loop", inline, args.requests, args.concurrency)
+
+    pool = PasswordHasher(max_workers=args.workers, max_queue=args.requests)
+    try:
+        await run_scenario(f"after: process pool x{args.workers}", pool, args.requests, args.concurrency)
+    finally:
+        pool.shutdown()
+    print(f"\npool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)  # логи запросов искажают замеры
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, "bench.db"))
+        asyncio.run(main(args))
@@ -0,0 +1,133 @@
+"""
+Бенчмарк накладных расходов middleware запроса: BaseHTTPMiddleware vs чистый ASGI
+
+Мини-приложение с одним эндпоинтом без БД обслуживается трижды: без middleware
+(базовая линия), с прежней реализацией через @app.middleware("http") (два
+f-string лога на запрос, dict(query_params)) и с RequestContextMiddleware
+(одна запись, 2xx сэмплируются). Логи пишутся в io.StringIO через
+форматтер, как в проде, чтобы учитывалась стоимость форматирования.
+
+Запуск: python scripts/bench_middleware.py [--requests 5000] [--sample-rate 0.1]
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+from app.core.metrics import observe_request, observe_request_db, route_template
+from app.core.middleware import RequestContextMiddleware
+from app.core.query_stats import track_queries
+
+legacy_logger = logging.getLogger("bench.legacy_middleware")
+
+
+async def legacy_middleware(request: Request, call_next):
+    """Прежняя реализация (без обработки ошибок - она не влияет на успешный путь)"""
+    start_time = time.time()
+    request_id = str(uuid.uuid4())
+    legacy_logger.info(
+        f"[{request_id}] {request.method} {request.url}",
+        extra={
+            "request_id": request_id,
+            "method": request.method,
+            "path": str(request.url.path),
+            "query_params": dict(request.query_params) if request.query_params else {},
+            "client_ip": request.client.host if request.client else "unknown",
+            "user_agent": request.headers.get("User-Agent", "unknown"),
+            "content_type": request.headers.get("Content-Type", "unknown"),
+            "event": "request_start",
+        },
+    )
+    with track_queries() as query_stats:
+        response = await call_next(request)
+    process_time = time.time() - start_time
+    legacy_logger.info(
+        f"[{request_id}] Completed {response.status_code} in {process_time:.4f}s "
+        f"({query_stats.statements} queries, {query_stats.duration_seconds * 1000:.1f}ms db)",
+        extra={
+            "request_id": request_id,
+            "status_code": response.status_code,
+            "process_time": process_time,
+            "db_statements": query_stats.statements,
+            "db_time": query_stats.duration_seconds,
+            "response_size": response.headers.get("content-length", "unknown"),
+            "event": "request_completed",
+        },
+    )
+    route = route_template(request.scope)
+    observe_request(request.method, route, response.status_code, process_time)
+    observe_request_db(request.method, route, query_stats)
+    return response
+
+
+def make_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id, "title": "bench"}
+
+    if variant == "legacy":
+        app.middleware("http")(legacy_middleware)
+    elif variant == "asgi":
+        app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def run_scenario(label: str, app: FastAPI, total: int, baseline: float = 0.0) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):  # прогрев
+            await client.get(f"/api/v1/items/{i}?page=1")
+
+        started = time.perf_counter()
+        for i in range(total):
+            response = await client.get(f"/api/v1/items/{i}?page=1")
+            assert response.status_code == 200
+        per_request = (time.perf_counter() - started) / total
+
+    overhead = f"   overhead {(per_request - baseline) * 1e6:7.1f} us" if baseline else ""
+    print(f"{label:<34} {per_request * 1e6:8.1f} us/request{overhead}")
+    return per_request
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.REQUEST_LOG_SAMPLE_RATE_2XX = args.sample_rate
+    print(f"{args.requests} sequential requests, 2xx log sample rate {args.sample_rate}\n")
+
+    baseline = await run_scenario("no middleware", make_app("none"), args.requests)
+    await run_scenario("before: @app.middleware('http')", make_app("legacy"), args.requests, baseline)
+    await run_scenario("after: pure ASGI", make_app("asgi"), args.requests, baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    for name in ("bench.legacy_middleware", "app.core.middleware"):
+        logging.getLogger(name).addHandler(handler)
+        logging.getLogger(name).setLevel(logging.INFO)
+        logging.getLogger(name).propagate = False
+
+    asyncio.run(main(args))
@@ -0,0 +1,153 @@
+"""
+Бенчмарк сериализации списочных эндпоинтов: Pydantic + stdlib json vs orjson
+
+Для ленты (GET /surveys), моих опросов (GET /surveys/my/) и истории транзакций
+(GET /users/me/transactions) строится страница из --rows строк и измеряется
+время от ORM-подобных объектов до тела ответа:
+
+- before: модель на строку, затем serialize_response FastAPI (повторная
+  валидация по response_model) и JSONResponse (json.dumps)
+- construct: model_construct на строку и FastJSONResponse (orjson)
+- after: модель на строку и FastJSONResponse (orjson), как в эндпоинтах
+
+Запуск: python scripts/bench_serialization.py [--rows 100] [--iterations 500]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import FastJSONResponse
+from app.models import SurveyStatus, TransactionType
+from app.schemas import CategoryResponse, MySurveyDetail, SurveyListItem, TransactionItem
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_categories(i: int) -> list:
+    return [
+        SimpleNamespace(id=c, name=f"Category {c}", description="Описание категории", is_active=True, created_at=NOW)
+        for c in range(i % 3)
+    ]
+
+
+def category_fields(cat) -> dict:
+    return dict(id=cat.id, name=cat.name, description=cat.description, is_active=cat.is_active, created_at=cat.created_at)
+
+
+def feed_fields(i: int) -> dict:
+    return dict(
+        id=i, title=f"Survey {i}", description="Короткое описание опроса " * 3, author_name="Author",
+        reward_per_response=5, total_responses=i, responses_needed=100, questions_count=10,
+        can_participate=True, my_responses_count=0,
+    )
+
+
+def my_survey_fields(i: int) -> dict:
+    return dict(
+        id=i, title=f"Survey {i}", description="Короткое описание опроса " * 3, status=SurveyStatus.ACTIVE,
+        google_form_url=f"https://docs.google.com/forms/d/form-{i}/viewform", reward_per_response=5,
+        responses_needed=100, max_responses_per_user=1, total_responses=i, total_spent=5 * i,
+        questions_count=10, collects_emails=True, created_at=NOW - timedelta(minutes=i),
+    )
+
+
+def transaction_fields(i: int) -> dict:
+    return dict(
+        id=i, transaction_type=TransactionType.EARNED, amount=5, balance_after=100 + 5 * i,
+        description="Survey reward", created_at=NOW - timedelta(minutes=i),
+        related_survey={"id": i, "title": f"Survey {i}"},
+    )
+
+
+ENDPOINTS = {
+    "GET /surveys": (SurveyListItem, feed_fields, True),
+    "GET /surveys/my/": (MySurveyDetail, my_survey_fields, True),
+    "GET /users/me/transactions": (TransactionItem, transaction_fields, False),
+}
+
+
+def build_validated(model, fields, with_categories: bool, rows: int) -> list:
+    items = []
+    for i in range(rows):
+        extra = {}
+        if with_categories:
+            extra["categories"] = [
+                CategoryResponse.model_validate(cat, from_attributes=True) for cat in make_categories(i)
+            ]
+        items.append(model(**fields(i), **extra))
+    return items
+
+
+def build_constructed(model, fields, with_categories: bool, rows: int) -> list:
+    items = []
+    for i in range(rows):
+        extra = {}
+        if with_categories:
+            extra["categories"] = [
+                CategoryResponse.model_construct(**category_fields(cat)) for cat in make_categories(i)
+            ]
+        items.append(model.model_construct(**fields(i), **extra))
+    return items
+
+
+async def before(model, fields, with_categories, rows, response_field) -> bytes:
+    items = build_validated(model, fields, with_categories, rows)
+    content = await serialize_response(field=response_field, response_content=items)
+    return JSONResponse(content).body
+
+
+async def construct(model, fields, with_categories, rows, response_field) -> bytes:
+    return FastJSONResponse(build_constructed(model, fields, with_categories, rows)).body
+
+
+async def after(model, fields, with_categories, rows, response_field) -> bytes:
+    return FastJSONResponse(build_validated(model, fields, with_categories, rows)).body
+
+
+async def measure(func, iterations: int, *args) -> float:
+    for _ in range(10):  # прогрев
+        await func(*args)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func(*args)
+    return (time.perf_counter() - started) / iterations
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{args.rows} rows per page, {args.iterations} iterations\n")
+    print(f"{'endpoint':<28} {'before':>10} {'construct':>10} {'after':>10} {'speedup':>8}")
+    for name, (model, fields, with_categories) in ENDPOINTS.items():
+        response_field = create_model_field(name="Response", type_=List[model], mode="serialization")
+        params = (model, fields, with_categories, args.rows, response_field)
+        slow = await measure(before, args.iterations, *params)
+        constructed = await measure(construct, args.iterations, *params)
+        fast = await measure(after, args.iterations, *params)
+        print(
+            f"{name:<28} {slow * 1000:8.2f}ms {constructed * 1000:8.2f}ms "
+            f"{fast * 1000:8.2f}ms {slow / fast:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
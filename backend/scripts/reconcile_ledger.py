@@ -0,0 +1,60 @@
+"""
+Сверка User.balance с журналом balance_transactions
+
+Журнал читается потоком в порядке (user_id, id) пачками по --batch-size
+строк, пачки проверяются векторно (см. app/services/ledger_reconciliation.py).
+В PostgreSQL сверка идет в одной транзакции REPEATABLE READ - результат
+согласован, даже если приложение продолжает писать в журнал.
+
+Выводит расхождения по пользователям (первые --max-report) и итог.
+Код выхода 1, если расхождения найдены.
+
+Запуск: python scripts/reconcile_ledger.py [--batch-size 50000] [--max-report 100] [--json]
+"""
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import engine
+from app.services.ledger_reconciliation import LedgerReconciler
+
+
+def main(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection = connection.execution_options(isolation_level="REPEATABLE READ")
+        report = LedgerReconciler(connection, batch_size=args.batch_size).run(max_report=args.max_report)
+    elapsed = time.perf_counter() - started
+
+    for drift in report.drifts:
+        if args.json:
+            print(json.dumps({**asdict(drift), "sum_drift": drift.sum_drift}))
+        else:
+            print(
+                f"user {drift.user_id}: balance={drift.balance} ledger_sum={drift.ledger_sum} "
+                f"(drift {drift.sum_drift:+d}) last_balance_after={drift.last_balance_after} "
+                f"transactions={drift.transactions} chain_breaks={drift.chain_breaks} "
+                f"first_break_id={drift.first_break_id}"
+            )
+    print(
+        f"{report.rows} rows, {report.users} users, {report.batches} batches in {elapsed:.1f}s "
+        f"({report.rows / elapsed if elapsed else 0:,.0f} rows/s); drifted users: {report.drifted_users}",
+        file=sys.stderr,
+    )
+    return 1 if report.drifted_users else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--max-report", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="расхождения в виде JSON строк")
+    sys.exit(main(parser.parse_args()))
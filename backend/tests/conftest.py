@@ -1,21 +1,34 @@
 """
 Конфигурация тестов и фикстуры
 """
+import logging
 import pytest
 import os
+from itertools import count
 from typing import Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Настройки, которые читаются при импорте приложения
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")  # bcrypt синхронно, без пула процессов
+os.environ.setdefault("BACKGROUND_JOBS_ENABLED", "false")  # фоновые задачи тестируются напрямую
+
 from app.main import app
 from app.core.database import Base
 from app.api.deps import get_db
-from app.models import User, GoogleAccount, Survey, SurveyResponse, BalanceTransaction
+from app.models import User, GoogleAccount, Survey, SurveyResponse, SurveyStatus, BalanceTransaction
 from app.repositories.user_repository import user_repository
 from app.repositories.google_account_repository import google_account_repository
 from app.core.security import get_password_hash, create_access_token
+from app.core.principal_cache import principal_cache
+from app.core.fragment_cache import survey_fragment_cache
+from app.services.survey_analytics import survey_analytics_cache
+from app.core.rate_limit import rate_limit_backend
+from app.repositories.balance_rollup_repository import balance_rollup_repository
+from app.schemas import GoogleForm
+from app.services import survey_sync_service
 
 # Используем SQLite в памяти для тестов
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -50,6 +63,43 @@ def override_get_db(db_session):
     return _override
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Сброс кэша пользователей: id и токены повторяются между тестами"""
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_fragment_cache():
+    """Сброс кэша фрагментов ленты: id опросов повторяются между тестами"""
+    survey_fragment_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_analytics_cache():
+    """Сброс кэша аналитики: id опросов повторяются между тестами"""
+    survey_analytics_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rollup_cutoff():
+    """Граница заполнения итогов кэшируется в процессе, а БД создается заново в каждом тесте"""
+    balance_rollup_repository.reset_cutoff()
+    yield
+    balance_rollup_repository.reset_cutoff()
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limits():
+    """Сброс счетчиков rate limiting: все запросы TestClient идут с одного адреса"""
+    rate_limit_backend.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """FastAPI TestClient с тестовой БД"""
@@ -204,6 +254,84 @@ def mock_google_forms_service():
     return MockGoogleFormsService()
 
 
+class FakeFormsService:
+    """Forms API для синхронизации: ответы отдаются страницами, запросы запоминаются"""
+
+    def __init__(self, pages, items=None):
+        self.pages = pages
+        self.items = items or [{"itemId": "i1", "title": "Code", "questionItem": {"question": {"questionId": "q1", "textQuestion": {}}}}]
+        self.calls = []
+        self.form_reads = 0
+
+    async def get_form_info(self, form_id):
+        self.form_reads += 1
+        return GoogleForm(formId=form_id, info={"title": "Form", "documentTitle": "Form"}, settings={}, items=self.items)
+
+    async def get_form_responses(self, form_id, page_token=None, submitted_after=None):
+        self.calls.append((page_token, submitted_after))
+        index = int(page_token or 0)
+        return {
+            "responses": self.pages[index] if self.pages else [],
+            "next_page_token": str(index + 1) if index + 1 < len(self.pages) else None,
+        }
+
+
+@pytest.fixture
+def fake_forms(monkeypatch):
+    """Подменить Forms API синхронизации: fake_forms(*страницы ответов, items=вопросы формы)"""
+    def install(*pages, items=None):
+        service = FakeFormsService(list(pages), items)
+        monkeypatch.setattr(survey_sync_service, "get_google_forms_service", lambda account: service)
+        return service
+    return install
+
+
+@pytest.fixture
+def make_survey(db_session):
+    """
+    Активный опрос пользователя: make_survey(owner, db=None, **поля опроса)
+
+    Google аккаунт владельца создается при первом опросе и переиспользуется.
+    Объекты только добавляются в сессию (flush) - commit делает тест.
+    """
+    accounts = {}
+    form_ids = count(1)
+
+    def create(owner, db=None, **fields):
+        db = db or db_session
+        account = accounts.get((id(db), owner.id))
+        if account is None:
+            account = GoogleAccount(
+                user_id=owner.id, google_id=f"author-{owner.id}", email=f"author-{owner.id}@gmail.com",
+                name="Author", access_token="token", is_primary=True,
+            )
+            db.add(account)
+            db.flush()
+            accounts[(id(db), owner.id)] = account
+        survey = Survey(**{
+            "title": "Survey", "google_account_id": account.id, "google_form_id": f"form-{next(form_ids)}",
+            "google_form_url": "https://docs.google.com/forms/d/x/viewform", "questions_count": 1,
+            "reward_per_response": 5, "status": SurveyStatus.ACTIVE, **fields,
+        })
+        db.add(survey)
+        db.flush()
+        return survey
+    return create
+
+
+@pytest.fixture
+def db_statement_counts(caplog):
+    """Число SQL запросов каждого HTTP запроса теста по логу app.core.middleware: db_statement_counts()"""
+    caplog.set_level(logging.INFO, logger="app.core.middleware")
+
+    def collect():
+        return [
+            r.db_statements for r in caplog.records
+            if r.name == "app.core.middleware" and getattr(r, "event", None) == "request_completed"
+        ]
+    return collect
+
+
 # Переменные окружения для тестов
 @pytest.fixture(autouse=True)
 def setup_test_env():
@@ -0,0 +1,166 @@
+"""
+Тесты async пути БД (AsyncSession, async репозитории, лента опросов)
+
+In-memory база conftest недоступна для aiosqlite, поэтому здесь используется
+файловая SQLite база: sync сессия для подготовки данных, async - для проверки.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_async_db, get_db
+from app.api.v1.surveys import get_surveys_feed_async
+from app.core.database import Base, to_async_url
+from app.core.exceptions import InvalidTokenException
+from app.core.principal_cache import principal_cache
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Category, GoogleAccount, Survey, SurveyResponse, SurveyStatus
+from app.repositories.survey_repository import async_survey_repository
+from app.repositories.user_repository import user_repository
+from app.services.auth_service import AsyncAuthService
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'async.db'}"
+
+
+@pytest.fixture
+def seeded(db_url):
+    """Автор с двумя опросами и респондент, уже прошедший один из них"""
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+
+    author = user_repository.create_user(db, email="author@example.com", full_name="Author")
+    respondent = user_repository.create_user(db, email="respondent@example.com", full_name="Respondent")
+    account = GoogleAccount(
+        user_id=author.id, google_id="g-author", email="author@gmail.com",
+        name="Survey Author", access_token="token", is_primary=True, is_active=True,
+    )
+    category = Category(name="Science")
+    db.add_all([account, category])
+    db.flush()
+    surveys = []
+    for i in range(2):
+        survey = Survey(
+            title=f"Survey {i}", description="d", google_account_id=account.id,
+            google_form_id=f"form-{i}", google_form_url=f"https://docs.google.com/forms/d/form-{i}/viewform",
+            questions_count=3, max_responses_per_user=1, reward_per_response=5,
+            responses_needed=10, status=SurveyStatus.ACTIVE, total_responses=0,
+        )
+        survey.categories.append(category)
+        surveys.append(survey)
+    db.add_all(surveys)
+    db.flush()
+    db.add(SurveyResponse(survey_id=surveys[0].id, respondent_id=respondent.id))
+    db.commit()
+
+    yield {
+        "session_factory": session_factory,
+        "author_id": author.id,
+        "respondent_id": respondent.id,
+        "account_id": account.id,
+        "survey_ids": [s.id for s in surveys],
+    }
+    db.close()
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_session_factory(db_url, seeded):
+    engine = create_async_engine(to_async_url(db_url))
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+class TestAsyncUrl:
+    """Тесты выбора async драйвера"""
+
+    def test_driver_substitution(self):
+        assert to_async_url("postgresql://u:p@host:5432/db") == "postgresql+asyncpg://u:p@host:5432/db"
+        assert to_async_url("postgresql+psycopg2://u:p@/db?host=/cloudsql/x") == "postgresql+asyncpg://u:p@/db?host=/cloudsql/x"
+        assert to_async_url("sqlite:///tmp.db") == "sqlite+aiosqlite:///tmp.db"
+        with pytest.raises(ValueError):
+            to_async_url("mysql://u:p@host/db")
+
+
+class TestAsyncRepositories:
+    """Тесты async репозиториев"""
+
+    async def test_survey_repository(self, async_session_factory, seeded):
+        async with async_session_factory() as db:
+            surveys = await async_survey_repository.get_active_surveys(db)
+            counts = await async_survey_repository.get_user_participation_counts(
+                db, seeded["survey_ids"], seeded["respondent_id"]
+            )
+
+            assert {s.id for s in surveys} == set(seeded["survey_ids"])
+            # Связи загружены заранее - доступ без lazy IO
+            assert surveys[0].google_account.name == "Survey Author"
+            assert [c.name for c in surveys[0].categories] == ["Science"]
+            assert counts == {seeded["survey_ids"][0]: 1}
+            assert await async_survey_repository.count(db, {"status": SurveyStatus.ACTIVE}) == 2
+
+    async def test_auth_service_reads_user_and_uses_cache(self, async_session_factory, seeded):
+        token = create_access_token(data={"sub": str(seeded["respondent_id"])})
+        async with async_session_factory() as db:
+            user = await AsyncAuthService(db).get_current_user(token)
+        assert user.email == "respondent@example.com"
+        assert principal_cache.get(token) is not None
+
+        async with async_session_factory() as db:
+            cached = await AsyncAuthService(db).get_current_user(token)
+            assert cached.id == seeded["respondent_id"]
+            with pytest.raises(InvalidTokenException):
+                await AsyncAuthService(db).get_current_user("not-a-token")
+
+
+class TestAsyncSurveysFeed:
+    """Тест: лента через AsyncSession совпадает с синхронной"""
+
+    def test_feed_matches_sync_path(self, async_session_factory, seeded):
+        def override_get_db():
+            db = seeded["session_factory"]()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db():
+            async with async_session_factory() as db:
+                yield db
+
+        def sync_db_not_used():
+            raise AssertionError("async feed must not open a sync session")
+
+        # Маршрут регистрируется по DB_ASYNC_ENABLED при импорте - async вариант подключается явно
+        async_app = FastAPI()
+        async_app.add_api_route("/api/v1/surveys", get_surveys_feed_async, methods=["GET"])
+        async_app.dependency_overrides[get_async_db] = override_get_async_db
+        async_app.dependency_overrides[get_db] = sync_db_not_used
+
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(seeded['respondent_id'])})}"}
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            with TestClient(app) as client:
+                sync_feed = client.get("/api/v1/surveys", headers=headers)
+            principal_cache.clear()  # промах кэша - пользователь читается через AsyncSession
+            with TestClient(async_app) as client:
+                async_feed = client.get("/api/v1/surveys", headers=headers)
+        finally:
+            app.dependency_overrides.clear()
+
+        assert sync_feed.status_code == 200
+        assert async_feed.status_code == 200
+        assert async_feed.json() == sync_feed.json()
+        by_id = {item["id"]: item for item in async_feed.json()}
+        assert by_id[seeded["survey_ids"][0]]["my_responses_count"] == 1
+        assert by_id[seeded["survey_ids"][0]]["can_participate"] is False
+        assert by_id[seeded["survey_ids"][1]]["can_participate"] is True
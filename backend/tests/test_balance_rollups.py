@@ -0,0 +1,150 @@
+"""
+Тесты месячных итогов журнала транзакций (balance_rollups) и сводки баланса
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.models import BalanceRollup, BalanceRollupCutoff, BalanceTransaction, TransactionType
+from app.repositories.balance_rollup_repository import balance_rollup_repository, month_start
+
+
+def backfill(db) -> int:
+    cutoff = balance_rollup_repository.backfill(db.connection())
+    db.commit()
+    return cutoff
+
+
+def add_history(db, user_id: int) -> None:
+    db.add_all([
+        BalanceTransaction(
+            user_id=user_id, transaction_type=TransactionType.BONUS, amount=100, balance_after=100,
+            created_at=datetime(2025, 1, 31, 23, 59, tzinfo=timezone.utc),
+        ),
+        BalanceTransaction(
+            user_id=user_id, transaction_type=TransactionType.EARNED, amount=5, balance_after=105,
+            created_at=datetime(2025, 2, 1, tzinfo=timezone.utc),
+        ),
+    ])
+    db.commit()
+
+
+def add_current(db, user_id: int) -> None:
+    db.add_all([
+        BalanceTransaction(user_id=user_id, transaction_type=TransactionType.EARNED, amount=5, balance_after=110),
+        BalanceTransaction(user_id=user_id, transaction_type=TransactionType.SPENT, amount=-20, balance_after=90),
+    ])
+    db.commit()
+
+
+@pytest.fixture
+def ledger(db_session, test_user):
+    """
+    Транзакции за два месяца: история учтена заполнением, последние две (в
+    текущем месяце, без явного created_at) - событием после него
+    """
+    add_history(db_session, test_user.id)
+    backfill(db_session)
+    add_current(db_session, test_user.id)
+
+
+class TestBalanceRollups:
+    """Тесты ведения итогов и чтения сводки"""
+
+    def test_rollups_follow_ledger_inserts(self, db_session, test_user, ledger):
+        """Тест: итоги совпадают с агрегатом по журналу транзакций"""
+        rollups = {
+            (r.month, r.transaction_type): (r.transactions_count, r.amount_total)
+            for r in db_session.query(BalanceRollup).filter(BalanceRollup.user_id == test_user.id)
+        }
+        current = month_start(datetime.now(timezone.utc))
+
+        assert rollups == {
+            (date(2025, 1, 1), TransactionType.BONUS): (1, 100),
+            (date(2025, 2, 1), TransactionType.EARNED): (1, 5),
+            (current, TransactionType.EARNED): (1, 5),
+            (current, TransactionType.SPENT): (1, -20),
+        }
+        ledger_total = db_session.execute(
+            select(func.count(), func.sum(BalanceTransaction.amount)).where(BalanceTransaction.user_id == test_user.id)
+        ).one()
+        assert tuple(ledger_total) == (
+            sum(count for count, _ in rollups.values()),
+            sum(amount for _, amount in rollups.values()),
+        )
+
+    def test_backfill_owns_history_up_to_cutoff(self, db_session, test_user, ledger):
+        """Тест: граница - последний id истории, повторное заполнение ничего не делает"""
+        history_ids = [t.id for t in db_session.query(BalanceTransaction).order_by(BalanceTransaction.id)][:2]
+
+        assert db_session.query(BalanceRollupCutoff.transaction_id).scalar() == history_ids[-1]
+        assert backfill(db_session) is None
+        assert db_session.query(func.sum(BalanceRollup.transactions_count)).scalar() == 4
+
+    def test_created_at_is_set_by_application(self, db_session, test_user, ledger):
+        """Тест: месяц итога берется из created_at строки журнала, а не из времени flush"""
+        transaction = BalanceTransaction(
+            user_id=test_user.id, transaction_type=TransactionType.EARNED, amount=5, balance_after=95,
+        )
+        db_session.add(transaction)
+        db_session.commit()
+
+        assert transaction.created_at is not None
+        current = db_session.get(BalanceRollup, (test_user.id, month_start(transaction.created_at), TransactionType.EARNED))
+        assert current.transactions_count == 2
+
+    def test_rollback_discards_rollup(self, db_session, test_user, ledger):
+        """Тест: итоги пишутся в той же транзакции БД, что и журнал"""
+        db_session.add(BalanceTransaction(
+            user_id=test_user.id, transaction_type=TransactionType.EARNED, amount=5, balance_after=95,
+        ))
+        db_session.flush()
+        db_session.rollback()
+
+        current = db_session.get(
+            BalanceRollup, (test_user.id, month_start(datetime.now(timezone.utc)), TransactionType.EARNED)
+        )
+        assert current.transactions_count == 1
+
+    def test_summary_reads_rollups_only(self, client: TestClient, auth_headers, ledger, db_statement_counts):
+        """Тест: сводка баланса не сканирует balance_transactions"""
+        client.get("/api/v1/users/me", headers=auth_headers)  # прогрев кэша пользователя
+        response = client.get("/api/v1/users/me/balance", headers=auth_headers)
+
+        data = response.json()
+        assert response.status_code == 200
+        assert (data["total_earned"], data["total_spent"], data["total_bonus"]) == (10, -20, 100)
+        assert (data["total_earned_transactions"], data["total_spent_transactions"]) == (2, 1)
+        _, statements = db_statement_counts()
+        assert statements == 2  # пользователь + итоги
+
+    def test_reads_fall_back_to_ledger_before_backfill(self, client: TestClient, auth_headers, db_session, test_user):
+        """Тест: до заполнения итоги не ведутся, сводка и история считаются по журналу"""
+        add_history(db_session, test_user.id)
+        add_current(db_session, test_user.id)
+
+        assert db_session.query(BalanceRollup).count() == 0
+        summary = client.get("/api/v1/users/me/balance", headers=auth_headers).json()
+        history = client.get("/api/v1/users/me/balance/history", params={"months": 120}, headers=auth_headers).json()
+
+        assert (summary["total_earned"], summary["total_spent"], summary["total_bonus"]) == (10, -20, 100)
+        assert [(item["month"], item["transaction_type"]) for item in history][-2:] == [
+            ("2025-02-01", "earned"), ("2025-01-01", "bonus"),
+        ]
+        assert len(history) == 4
+
+    def test_monthly_history_window(self, client: TestClient, auth_headers, ledger):
+        """Тест: история за последние N месяцев, новые месяцы первыми"""
+        response = client.get("/api/v1/users/me/balance/history", params={"months": 1}, headers=auth_headers)
+
+        assert response.status_code == 200
+        current = month_start(datetime.now(timezone.utc)).isoformat()
+        assert [(item["month"], item["transaction_type"], item["amount"]) for item in response.json()] == [
+            (current, "earned", 5),
+            (current, "spent", -20),
+        ]
+
+        response = client.get("/api/v1/users/me/balance/history", params={"months": 120}, headers=auth_headers)
+        assert [item["month"] for item in response.json()][-2:] == ["2025-02-01", "2025-01-01"]
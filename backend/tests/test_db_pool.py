@@ -0,0 +1,127 @@
+"""
+Тесты настроек пула соединений и метрик пула
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.core.db_pool import (
+    InstrumentedQueuePool,
+    PoolMetrics,
+    configure_pool,
+    engine_options,
+)
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestEngineOptions:
+    """Тесты параметров create_engine из Settings"""
+
+    def test_postgres_options(self):
+        """Тест: размер пула, таймауты и statement_timeout берутся из Settings"""
+        with patch.object(settings, "DB_POOL_SIZE", 20), \
+                patch.object(settings, "DB_MAX_OVERFLOW", 0), \
+                patch.object(settings, "DB_STATEMENT_TIMEOUT_MS", 5000):
+            sync_options = engine_options("postgresql://u:p@host/db")
+            async_options = engine_options("postgresql+asyncpg://u:p@host/db", is_async=True)
+
+        assert sync_options["pool_size"] == 20
+        assert sync_options["max_overflow"] == 0
+        assert sync_options["poolclass"] is InstrumentedQueuePool
+        assert sync_options["connect_args"] == {"options": "-c statement_timeout=5000"}
+        assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+    def test_idle_pre_ping_replaces_builtin(self):
+        """Тест: при DB_POOL_PRE_PING_IDLE_SECONDS встроенный pre-ping выключен"""
+        with patch.object(settings, "DB_POOL_PRE_PING_IDLE_SECONDS", 30):
+            options = engine_options("sqlite:///db.sqlite")
+
+        assert options["pool_pre_ping"] is False
+        assert "pool_size" not in options
+
+
+class TestPoolMetrics:
+    """Тесты метрик пула"""
+
+    def test_checkout_metrics(self, pool_engine):
+        """Тест: учитываются выданные соединения, ожидание и таймауты"""
+        metrics = PoolMetrics("test")
+        configure_pool(pool_engine, metrics)
+
+        with pool_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            busy = metrics.stats()
+            with pytest.raises(exc.TimeoutError):
+                pool_engine.connect()
+        idle = metrics.stats()
+
+        assert busy["checked_out"] == 1
+        assert busy["pool_size"] == 1
+        assert idle["checked_out"] == 0
+        assert idle["checkouts"] == 1
+        assert idle["connects"] == 1
+        assert idle["checkout_timeouts"] == 1
+        assert idle["checkout_wait_seconds_max"] >= 0.1
+
+    def test_invalidation_metrics(self, pool_engine):
+        """Тест: инвалидированные соединения учитываются и заменяются новыми"""
+        metrics = PoolMetrics("test")
+        configure_pool(pool_engine, metrics)
+
+        with pool_engine.connect() as conn:
+            conn.invalidate()
+        with pool_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        stats = metrics.stats()
+        assert stats["invalidations"] == 1
+        assert stats["connects"] == 2
+
+    def test_idle_connections_are_pinged(self, pool_engine):
+        """Тест: мертвое соединение, простоявшее дольше порога, заменяется при checkout"""
+        metrics = PoolMetrics("test")
+        with patch.object(settings, "DB_POOL_PRE_PING_IDLE_SECONDS", 60):
+            configure_pool(pool_engine, metrics)
+
+        with pool_engine.connect() as conn:
+            raw = conn.connection.dbapi_connection
+            record = conn.connection._connection_record
+        # Соединение "умерло", пока простаивало в пуле
+        raw.close()
+        record.info["checked_in_at"] = time.monotonic() - 120
+
+        with pool_engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+        stats = metrics.stats()
+        assert stats["connects"] == 2
+        assert stats["checkouts"] == 2
+
+
+class TestHealthPoolStats:
+    """Тест: метрики пула доступны в /health/details"""
+
+    def test_health_details_include_pool_stats(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "test-metrics-token")
+
+        response = client.get("/health/details", headers={"Authorization": "Bearer test-metrics-token"})
+
+        assert response.status_code == 200
+        assert "checked_out" in response.json()["db_pool"]["sync"]
@@ -0,0 +1,201 @@
+"""
+Тесты очереди исходящих писем и доставки через локальный SMTP сервер
+"""
+import base64
+import socketserver
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import EmailOutbox, EmailOutboxStatus
+from app.repositories.email_outbox_repository import email_outbox_repository
+from app.services.email_delivery_service import EmailDeliveryService, SMTPConnection
+from app.services.email_service import email_service
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Минимальный SMTP сервер для тестов
+
+    Адреса, начинающиеся с "reject", отклоняются с 550, с "defer" - с 451.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPSinkHandler)
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self) -> None:
+        self.server.connections += 1
+        self.reply("220 sink ready")
+        recipients, data_lines, in_data = [], [], False
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    self.server.messages.append({"to": recipients, "data": "\n".join(data_lines)})
+                    recipients, data_lines, in_data = [], [], False
+                    self.reply("250 queued")
+                else:
+                    data_lines.append(line[1:] if line.startswith("..") else line)
+                continue
+
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-sink")
+                self.reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                credentials = base64.b64decode(line.split()[-1]).split(b"\0")
+                if credentials[1:] == [b"mailer", b"secret"]:
+                    self.server.logins += 1
+                    self.reply("235 authenticated")
+                else:
+                    self.reply("535 bad credentials")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip("<> ")
+                if address.startswith("reject"):
+                    self.reply("550 no such user")
+                elif address.startswith("defer"):
+                    self.reply("451 try again later")
+                else:
+                    recipients.append(address)
+                    self.reply("250 ok")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 go ahead")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # HELO, MAIL, RSET, NOOP
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_sink():
+    sink = SMTPSink()
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+
+@pytest.fixture
+def smtp_connection(smtp_sink):
+    connection = SMTPConnection(
+        host="127.0.0.1",
+        port=smtp_sink.port,
+        user="mailer",
+        password="secret",
+        use_tls=False,
+        timeout=5,
+    )
+    yield connection
+    connection.close()
+
+
+def enqueue(db, recipient: str) -> EmailOutbox:
+    return email_outbox_repository.enqueue(db, recipient, "Subject", "Text body", "<p>HTML body</p>")
+
+
+class TestEmailEnqueue:
+    """Тесты постановки писем в очередь из API"""
+
+    def test_request_returns_after_enqueue(self, client: TestClient, db_session, test_user):
+        """Тест: forgot-password кладет письмо в очередь, не подключаясь к SMTP"""
+        with patch.object(email_service, "smtp_user", "mailer"), \
+                patch.object(email_service, "smtp_password", "secret"), \
+                patch("smtplib.SMTP") as smtp:
+            response = client.post("/api/v1/auth/forgot-password", json={"email": test_user.email})
+
+        assert response.status_code == 200
+        smtp.assert_not_called()
+        queued = db_session.query(EmailOutbox).all()
+        assert len(queued) == 1
+        assert queued[0].recipient == test_user.email
+        assert queued[0].status == EmailOutboxStatus.pending
+        assert "121212" in queued[0].body_text
+
+
+class TestEmailDelivery:
+    """Тесты доставки писем воркером"""
+
+    def test_batch_uses_single_connection(self, db_session, smtp_sink, smtp_connection):
+        """Тест: пачка писем отправляется через одно соединение и один login"""
+        for i in range(5):
+            enqueue(db_session, f"user{i}@example.com")
+
+        stats = EmailDeliveryService(db_session, smtp_connection).deliver_pending()
+        stats_next = EmailDeliveryService(db_session, smtp_connection).deliver_pending()
+        enqueue(db_session, "late@example.com")
+        EmailDeliveryService(db_session, smtp_connection).deliver_pending()
+
+        assert stats == {"sent": 5, "retried": 0, "failed": 0}
+        assert stats_next["sent"] == 0
+        assert len(smtp_sink.messages) == 6
+        assert smtp_sink.connections == 1
+        assert smtp_sink.logins == 1
+        assert "HTML body" in smtp_sink.messages[0]["data"]
+        statuses = {m.status for m in db_session.query(EmailOutbox).all()}
+        assert statuses == {EmailOutboxStatus.sent}
+        bodies = {(m.body_text, m.body_html) for m in db_session.query(EmailOutbox).all()}
+        assert bodies == {("", None)}
+
+    def test_failures_are_retried_with_backoff(self, db_session, smtp_sink, smtp_connection):
+        """Тест: временная ошибка откладывает письмо, постоянная - завершает попытки"""
+        enqueue(db_session, "defer@example.com")
+        enqueue(db_session, "reject@example.com")
+        enqueue(db_session, "ok@example.com")
+
+        stats = EmailDeliveryService(db_session, smtp_connection).deliver_pending()
+
+        assert stats == {"sent": 1, "retried": 1, "failed": 1}
+        db_session.expire_all()
+        by_recipient = {m.recipient: m for m in db_session.query(EmailOutbox).all()}
+        deferred = by_recipient["defer@example.com"]
+        assert deferred.status == EmailOutboxStatus.pending
+        assert deferred.attempts == 1
+        assert deferred.body_text == "Text body"
+        next_attempt = deferred.next_attempt_at.replace(tzinfo=deferred.next_attempt_at.tzinfo or timezone.utc)
+        assert next_attempt > datetime.now(timezone.utc) + timedelta(seconds=20)
+        assert by_recipient["reject@example.com"].status == EmailOutboxStatus.failed
+        assert "550" in by_recipient["reject@example.com"].last_error
+        assert (by_recipient["reject@example.com"].body_text, by_recipient["reject@example.com"].body_html) == ("", None)
+
+        # До истечения backoff письмо не выбирается повторно
+        assert EmailDeliveryService(db_session, smtp_connection).deliver_pending()["retried"] == 0
+
+    def test_server_unavailable_defers_batch(self, db_session):
+        """Тест: при недоступном сервере вся пачка откладывается"""
+        enqueue(db_session, "a@example.com")
+        enqueue(db_session, "b@example.com")
+        connection = SMTPConnection(host="127.0.0.1", port=1, user=None, password=None, use_tls=False, timeout=1)
+
+        stats = EmailDeliveryService(db_session, connection).deliver_pending(max_attempts=1)
+
+        assert stats == {"sent": 0, "retried": 0, "failed": 2}
+
+    def test_backoff_grows_exponentially(self):
+        """Тест: задержка растет экспоненциально и ограничена сверху"""
+        first = EmailDeliveryService.backoff_seconds(1)
+        third = EmailDeliveryService.backoff_seconds(3)
+        huge = EmailDeliveryService.backoff_seconds(30)
+
+        assert 30 <= first <= 36
+        assert 120 <= third <= 144
+        assert huge <= 3600 * 1.2
@@ -0,0 +1,105 @@
+"""
+Тесты кэша JSON фрагментов опросов ленты
+"""
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.fragment_cache import survey_fragment_cache
+from app.models import Category, GoogleAccount, Survey, SurveyStatus
+from app.repositories.survey_repository import survey_repository
+from app.schemas import CategoryResponse, SurveyListItem
+
+
+@pytest.fixture
+def feed_surveys(db_session, second_test_user):
+    """Активные опросы второго пользователя с категорией"""
+    account = GoogleAccount(
+        user_id=second_test_user.id, google_id="author-google", email="author@gmail.com",
+        name="Survey Author", access_token="token", is_primary=True,
+    )
+    category = Category(name="Science", description="Научные опросы")
+    db_session.add_all([account, category])
+    db_session.flush()
+    surveys = [
+        Survey(
+            title=f"Survey {i}", description="Описание" if i % 2 else None, google_account_id=account.id,
+            google_form_id=f"form-{i}", google_form_url="https://docs.google.com/forms/d/x/viewform",
+            questions_count=3, reward_per_response=5, responses_needed=10, status=SurveyStatus.ACTIVE,
+            categories=[category] if i % 2 else [],
+            created_at=datetime.now(timezone.utc) - timedelta(minutes=i),
+            # Строки записаны раньше теста: now() СУБД в пределах секунды не меняет версию
+            updated_at=datetime.now(timezone.utc) - timedelta(minutes=i),
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(surveys)
+    db_session.commit()
+    return surveys
+
+
+def expected_item(survey: Survey) -> dict:
+    item = SurveyListItem(
+        id=survey.id, title=survey.title, description=survey.description,
+        author_name=survey.google_account.name, reward_per_response=survey.reward_per_response,
+        total_responses=survey.total_responses, responses_needed=survey.responses_needed,
+        questions_count=survey.questions_count, can_participate=True, my_responses_count=0,
+        categories=[CategoryResponse.model_validate(cat, from_attributes=True) for cat in survey.categories],
+    )
+    return json.loads(item.model_dump_json())
+
+
+class TestSurveyFragmentCache:
+    """Тесты склейки ленты и инвалидации"""
+
+    def test_feed_matches_pydantic_items(self, client: TestClient, auth_headers, feed_surveys):
+        """Тест: склеенная лента равна сериализации SurveyListItem"""
+        response = client.get("/api/v1/surveys", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == [expected_item(s) for s in feed_surveys]
+
+    def test_repeated_feed_hits_cache(self, client: TestClient, feed_surveys, caplog):
+        """Тест: повторная лента берет фрагменты из кэша без загрузки авторов и категорий"""
+        with caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            client.get("/api/v1/surveys")
+            hits = survey_fragment_cache.stats()["hits"]
+            response = client.get("/api/v1/surveys")
+
+        first, second = [r.db_statements for r in caplog.records if getattr(r, "event", None) == "request_completed"]
+        assert survey_fragment_cache.stats()["hits"] == hits + len(feed_surveys)
+        assert second == 1  # только запрос ленты
+        assert first > second
+        assert [item["title"] for item in response.json()] == ["Survey 0", "Survey 1", "Survey 2"]
+
+    def test_orm_changes_invalidate(self, client: TestClient, db_session, feed_surveys):
+        """Тест: изменение опроса, его категорий и имени автора сбрасывает фрагменты"""
+        client.get("/api/v1/surveys")
+        survey = feed_surveys[0]
+        survey.title = "Renamed"
+        survey.categories = [feed_surveys[1].categories[0]]
+        db_session.commit()
+        item = client.get("/api/v1/surveys").json()[0]
+
+        assert item["title"] == "Renamed"
+        assert [c["name"] for c in item["categories"]] == ["Science"]
+
+        # Строка опроса не меняется - сброс только по событию сессии
+        survey.google_account.name = "New Author"
+        db_session.commit()
+        items = client.get("/api/v1/surveys").json()
+
+        assert {item["author_name"] for item in items} == {"New Author"}
+
+    def test_updated_at_change_from_other_process(self, client: TestClient, db_session, feed_surveys):
+        """Тест: UPDATE мимо сессии этого процесса меняет updated_at - фрагмент перестраивается"""
+        client.get("/api/v1/surveys")
+        survey_repository.increment_response_count(db_session, feed_surveys[0].id)
+        db_session.commit()
+        db_session.expire_all()
+
+        assert client.get("/api/v1/surveys").json()[0]["total_responses"] == 1
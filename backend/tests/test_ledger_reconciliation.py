@@ -0,0 +1,101 @@
+"""
+Тесты потоковой сверки балансов с журналом транзакций
+"""
+import random
+
+import pytest
+
+from app.models import BalanceTransaction, TransactionType, User
+from app.services.ledger_reconciliation import LedgerReconciler
+
+
+def add_user(db, index: int, amounts, balance=None, corrupt_at=None) -> User:
+    """Пользователь с цепочкой транзакций; corrupt_at - индекс транзакции с неверным balance_after"""
+    running = 0
+    user = User(email=f"ledger{index}@example.com", full_name=f"Ledger {index}", respondent_code=f"L{index:05d}")
+    db.add(user)
+    db.flush()
+    for i, amount in enumerate(amounts):
+        running += amount
+        db.add(BalanceTransaction(
+            user_id=user.id, transaction_type=TransactionType.EARNED if amount > 0 else TransactionType.SPENT,
+            amount=amount, balance_after=running + (1 if i == corrupt_at else 0),
+        ))
+    user.balance = running if balance is None else balance
+    db.flush()
+    return user
+
+
+def reference_drifts(db) -> dict:
+    """Построчная сверка на Python для сравнения"""
+    drifts = {}
+    for user in db.query(User).order_by(User.id):
+        transactions = (
+            db.query(BalanceTransaction).filter(BalanceTransaction.user_id == user.id)
+            .order_by(BalanceTransaction.id).all()
+        )
+        previous, breaks = 0, []
+        for t in transactions:
+            if t.balance_after != previous + t.amount:
+                breaks.append(t.id)
+            previous = t.balance_after
+        total = sum(t.amount for t in transactions)
+        last = transactions[-1].balance_after if transactions else None
+        if breaks or total != user.balance or (transactions and last != user.balance):
+            drifts[user.id] = (total, len(breaks), breaks[0] if breaks else None)
+    return drifts
+
+
+class TestLedgerReconciler:
+    """Тесты пакетной проверки журнала"""
+
+    def test_consistent_ledger_across_batches(self, db_session):
+        """Тест: корректный журнал, пользователи разрезаны границами пачек"""
+        for i in range(4):
+            add_user(db_session, i, [5] * (i + 2) + [-3])
+
+        report = LedgerReconciler(db_session.connection(), batch_size=3).run()
+
+        assert report.drifted_users == 0
+        assert (report.rows, report.users) == (3 + 4 + 5 + 6, 4)
+        assert report.batches == 6
+
+    def test_detects_drift_kinds(self, db_session):
+        """Тест: разрыв цепочки на границе пачки, расхождение суммы и баланс без транзакций"""
+        clean = add_user(db_session, 0, [10, -2])
+        broken = add_user(db_session, 1, [5, 5, 5, 5], corrupt_at=2)
+        skewed = add_user(db_session, 2, [7], balance=9)
+        orphan = add_user(db_session, 3, [], balance=50)
+
+        drifts = {d.user_id: d for d in LedgerReconciler(db_session.connection(), batch_size=3).run().drifts}
+
+        assert clean.id not in drifts
+        # balance_after третьей транзакции завышен: ломаются третья и четвертая ссылки цепочки
+        assert drifts[broken.id].chain_breaks == 2
+        assert drifts[broken.id].first_break_id == broken_transaction_id(db_session, broken, 2)
+        assert drifts[skewed.id].sum_drift == 2
+        assert drifts[orphan.id].transactions == 0 and drifts[orphan.id].balance == 50
+
+    @pytest.mark.parametrize("batch_size", [1, 7, 1000])
+    def test_matches_row_by_row_reference(self, db_session, batch_size):
+        """Тест: векторная сверка совпадает с построчной при любом размере пачки"""
+        rng = random.Random(42)
+        for i in range(30):
+            amounts = [rng.choice([5, 10, -5, -20]) for _ in range(rng.randint(0, 12))]
+            corrupt_at = rng.randrange(len(amounts)) if amounts and rng.random() < 0.3 else None
+            balance = None if rng.random() < 0.8 else rng.randint(-10, 100)
+            add_user(db_session, i, amounts, balance=balance, corrupt_at=corrupt_at)
+
+        report = LedgerReconciler(db_session.connection(), batch_size=batch_size).run(max_report=1000)
+
+        assert {d.user_id: (d.ledger_sum, d.chain_breaks, d.first_break_id) for d in report.drifts} == (
+            reference_drifts(db_session)
+        )
+
+
+def broken_transaction_id(db, user: User, index: int) -> int:
+    transactions = (
+        db.query(BalanceTransaction.id).filter(BalanceTransaction.user_id == user.id)
+        .order_by(BalanceTransaction.id).all()
+    )
+    return transactions[index].id
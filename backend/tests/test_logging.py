@@ -0,0 +1,117 @@
+"""
+Тесты конвейера логирования (очередь, JSON, сэмплирование, request id)
+"""
+import io
+import json
+import logging
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.logging_config import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    LoggingPipeline,
+    SamplingFilter,
+    parse_sampling,
+)
+from app.core.middleware import REQUEST_ID_HEADER, RequestContextMiddleware
+
+
+def make_record(name: str = "app.test", level: int = logging.INFO, msg: str = "hello", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def dropped(reason: str) -> float:
+    return REGISTRY.get_sample_value("log_records_dropped_total", {"reason": reason}) or 0.0
+
+
+@pytest.fixture
+def pipeline():
+    """Отдельный конвейер, пишущий JSON в буфер"""
+    root = logging.getLogger()
+    level = root.level
+    stream = io.StringIO()
+    pipeline = LoggingPipeline()
+    pipeline.setup(level="INFO", json_format=True, queue_size=100, sampling={}, stream=stream)
+    yield pipeline, stream
+    pipeline.stop()
+    root.removeHandler(pipeline.handler)
+    root.setLevel(level)
+
+
+class TestLoggingComponents:
+    """Тесты форматтера, фильтров и очереди"""
+
+    def test_json_format(self):
+        """Тест: запись - одна JSON строка с extra полями и request id"""
+        line = JsonFormatter().format(make_record(request_id="r-1", status_code=200, event="request_completed"))
+
+        payload = json.loads(line)
+        assert payload["severity"] == "INFO"
+        assert payload["message"] == "hello"
+        assert payload["request_id"] == "r-1"
+        assert payload["status_code"] == 200
+        assert payload["event"] == "request_completed"
+
+    def test_sampling_by_logger_prefix(self):
+        """Тест: сэмплируются INFO записи логгера и потомков, WARNING проходят"""
+        sampling = SamplingFilter(parse_sampling("httpx=0, app.core.middleware=1"))
+        before = dropped("sampled")
+
+        assert not sampling.filter(make_record("httpx._client"))
+        assert sampling.filter(make_record("httpx", level=logging.WARNING))
+        assert sampling.filter(make_record("app.core.middleware"))
+        assert sampling.filter(make_record("httpxyz"))
+        assert dropped("sampled") == before + 1
+
+    def test_full_queue_drops_records(self):
+        """Тест: при переполнении очереди записи отбрасываются и учитываются"""
+        handler = BoundedQueueHandler(maxsize=2)
+        before = dropped("queue_full")
+
+        for _ in range(5):
+            handler.handle(make_record())
+
+        assert handler.stats() == {"queued": 2, "capacity": 2, "dropped": 3}
+        assert dropped("queue_full") == before + 3
+
+    def test_exception_is_kept_as_text(self):
+        """Тест: traceback сохраняется при передаче записи в поток"""
+        handler = BoundedQueueHandler(maxsize=2)
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            logger = logging.getLogger("app.test.exc")
+            record = logger.makeRecord(logger.name, logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+
+        payload = json.loads(JsonFormatter().format(handler.prepare(record)))
+        assert "ValueError: broken" in payload["exception"]
+
+
+class TestLoggingPipeline:
+    """Тесты конвейера целиком"""
+
+    def test_request_id_propagates_to_sync_code(self, pipeline):
+        """Тест: записи из синхронного обработчика (пул потоков) получают request id"""
+        pipeline, stream = pipeline
+        app = FastAPI()
+
+        @app.get("/work")
+        def work():
+            logging.getLogger("app.test.work").info("working on %s", "it")
+            return {"ok": True}
+
+        app.add_middleware(RequestContextMiddleware)
+        response = TestClient(app).get("/work")
+        pipeline.stop()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        work_records = [r for r in records if r["logger"] == "app.test.work"]
+        assert work_records[0]["message"] == "working on it"
+        assert work_records[0]["request_id"] == response.headers[REQUEST_ID_HEADER]
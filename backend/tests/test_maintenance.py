@@ -0,0 +1,120 @@
+"""
+Тесты фоновой очистки истекших OAuth токенов, верификаций и писем
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.background_jobs import PeriodicJob
+from app.models import EmailOutbox, EmailOutboxStatus, EmailVerification, OAuthTemporaryToken, VerificationType
+from app.services.maintenance_service import MaintenanceService
+
+
+def add_token(db, user_id: int, token: str, expires_in: timedelta, is_used: bool = False):
+    db.add(OAuthTemporaryToken(
+        token=token,
+        user_id=user_id,
+        is_used=is_used,
+        expires_at=datetime.now(timezone.utc) + expires_in,
+    ))
+
+
+def add_verification(db, token: str, expires_in: timedelta, is_used: bool = False, age: timedelta = timedelta()):
+    db.add(EmailVerification(
+        verification_type=VerificationType.email_verification,
+        verification_token=token,
+        token_expires_at=datetime.now(timezone.utc) + expires_in,
+        is_used=is_used,
+        attempts=0,
+        created_at=datetime.now(timezone.utc) - age,
+    ))
+
+
+def add_outbox(db, recipient: str, status: EmailOutboxStatus, age: timedelta):
+    db.add(EmailOutbox(
+        recipient=recipient,
+        subject="Subject",
+        body_text="",
+        status=status,
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+        created_at=datetime.now(timezone.utc) - age,
+    ))
+
+
+class TestMaintenanceService:
+    """Тесты MaintenanceService.purge_expired"""
+
+    def test_purges_expired_oauth_tokens(self, db_session, test_user):
+        """Тест: удаляются только истекшие токены"""
+        for i in range(5):
+            add_token(db_session, test_user.id, f"expired-{i}", timedelta(minutes=-10), is_used=i % 2 == 0)
+        add_token(db_session, test_user.id, "valid", timedelta(minutes=5))
+        db_session.commit()
+
+        purged = MaintenanceService(db_session).purge_expired(batch_size=2, max_batches=10)
+
+        assert purged["oauth_temporary_tokens"] == 5
+        remaining = [t.token for t in db_session.query(OAuthTemporaryToken).all()]
+        assert remaining == ["valid"]
+
+    def test_purges_expired_and_used_verifications(self, db_session):
+        """Тест: удаляются истекшие и давно использованные верификации"""
+        add_verification(db_session, "expired", timedelta(hours=-1))
+        add_verification(db_session, "used-old", timedelta(hours=1), is_used=True, age=timedelta(hours=2))
+        add_verification(db_session, "used-recent", timedelta(hours=1), is_used=True)
+        add_verification(db_session, "active", timedelta(hours=1))
+        db_session.commit()
+
+        purged = MaintenanceService(db_session).purge_expired()
+
+        assert purged["email_verifications_expired"] == 1
+        assert purged["email_verifications_used"] == 1
+        remaining = {v.verification_token for v in db_session.query(EmailVerification).all()}
+        assert remaining == {"used-recent", "active"}
+
+    def test_purges_sent_and_failed_emails_after_code_lifetime(self, db_session):
+        """Тест: отправленные и неудачные письма удаляются через 15 минут, ожидающие остаются"""
+        add_outbox(db_session, "sent-old", EmailOutboxStatus.sent, timedelta(minutes=20))
+        add_outbox(db_session, "failed-old", EmailOutboxStatus.failed, timedelta(minutes=20))
+        add_outbox(db_session, "sent-recent", EmailOutboxStatus.sent, timedelta(minutes=5))
+        add_outbox(db_session, "pending-old", EmailOutboxStatus.pending, timedelta(minutes=20))
+        db_session.commit()
+
+        purged = MaintenanceService(db_session).purge_expired()
+
+        assert purged["email_outbox_finished"] == 2
+        remaining = {m.recipient for m in db_session.query(EmailOutbox).all()}
+        assert remaining == {"sent-recent", "pending-old"}
+
+    def test_run_is_bounded(self, db_session, test_user):
+        """Тест: за запуск удаляется не больше batch_size * max_batches строк"""
+        for i in range(5):
+            add_token(db_session, test_user.id, f"expired-{i}", timedelta(minutes=-10))
+        db_session.commit()
+
+        service = MaintenanceService(db_session)
+
+        assert service.purge_expired(batch_size=2, max_batches=1)["oauth_temporary_tokens"] == 2
+        assert service.purge_expired(batch_size=2, max_batches=10)["oauth_temporary_tokens"] == 3
+
+
+class TestPeriodicJob:
+    """Тесты PeriodicJob"""
+
+    def test_run_once_reports_result(self, db_session, test_user):
+        """Тест: задача выполняется в своей сессии и сохраняет результат запуска"""
+        add_token(db_session, test_user.id, "expired", timedelta(minutes=-10))
+        db_session.commit()
+
+        job = PeriodicJob(
+            name="maintenance_purge",
+            func=lambda db: MaintenanceService(db).purge_expired(),
+            interval_seconds=60,
+            session_factory=sessionmaker(bind=db_session.get_bind()),
+        )
+        job.run_once()
+
+        assert job.runs == 1
+        assert job.last_result["oauth_temporary_tokens"] == 1
+        assert job.last_duration_seconds is not None
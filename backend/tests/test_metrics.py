@@ -0,0 +1,125 @@
+"""
+Тесты метрик Prometheus и эндпоинта /metrics
+"""
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, PoolMetrics
+from app.core.metrics import render_metrics, track_google_api
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def metrics_headers(monkeypatch):
+    """Включить служебные эндпоинты с токеном"""
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "test-metrics-token")
+    return {"Authorization": "Bearer test-metrics-token"}
+
+
+class TestMetricsAccess:
+    """Тесты доступа к служебным эндпоинтам"""
+
+    def test_disabled_by_default(self, client: TestClient):
+        """Тест: по умолчанию /metrics и /health/details не отдаются"""
+        assert client.get("/metrics").status_code == 404
+        assert client.get("/health/details").status_code == 404
+
+    def test_token_required(self, client: TestClient, metrics_headers):
+        """Тест: без токена или с чужим токеном - 401"""
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get("/health/details").status_code == 401
+
+    def test_public_health_is_minimal(self, client: TestClient):
+        """Тест: публичный /health не раскрывает пулы, реплики и логирование"""
+        response = client.get("/health")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"status", "timestamp"}
+
+
+class TestMetricsEndpoint:
+    """Тесты эндпоинта /metrics"""
+
+    def test_latency_by_route_template_and_status(self, client: TestClient, db_session, metrics_headers):
+        """Тест: латентность учитывается по шаблону маршрута и статусу"""
+        labels = {"method": "GET", "route": "/api/v1/surveys/{survey_id}", "status": "404"}
+        before = sample("http_request_duration_seconds_count", labels)
+
+        client.get("/api/v1/surveys/999999")
+        response = client.get("/metrics", headers=metrics_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/v1/surveys/{survey_id}"' in response.text
+        assert "http_requests_in_progress" in response.text
+        assert sample("http_request_duration_seconds_count", labels) == before + 1
+
+    def test_cache_hits_and_misses(self, client: TestClient, auth_headers):
+        """Тест: обращения к principal cache учитываются как hit/miss"""
+        misses = sample("cache_requests_total", {"cache": "principal", "result": "miss"})
+        hits = sample("cache_requests_total", {"cache": "principal", "result": "hit"})
+
+        client.get("/api/v1/users/me", headers=auth_headers)
+        client.get("/api/v1/users/me", headers=auth_headers)
+
+        assert sample("cache_requests_total", {"cache": "principal", "result": "miss"}) == misses + 1
+        assert sample("cache_requests_total", {"cache": "principal", "result": "hit"}) == hits + 1
+
+
+class TestComponentMetrics:
+    """Тесты метрик пула соединений и Google API"""
+
+    def test_pool_gauges(self, tmp_path):
+        """Тест: gauge пула отражают выданные соединения"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=2)
+        metrics = PoolMetrics("test_gauges")
+        metrics.instrument(engine)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                assert sample("db_pool_checked_out_connections", {"pool": "test_gauges"}) == 1
+                assert sample("db_pool_size", {"pool": "test_gauges"}) == 2
+        finally:
+            engine.dispose()
+
+        assert sample("db_pool_checked_out_connections", {"pool": "test_gauges"}) == 0
+        assert sample("db_pool_events_total", {"pool": "test_gauges", "event": "checkout"}) == 1
+        assert sample("db_pool_checkout_wait_seconds_count", {"pool": "test_gauges"}) == 1
+
+    def test_google_api_outcomes(self):
+        """Тест: вызовы Google API учитываются с исходом и временем"""
+        with track_google_api("test.op"):
+            pass
+        with pytest.raises(RuntimeError):
+            with track_google_api("test.op"):
+                raise RuntimeError("quota exceeded")
+
+        assert sample("google_api_calls_total", {"operation": "test.op", "outcome": "success"}) == 1
+        assert sample("google_api_calls_total", {"operation": "test.op", "outcome": "error"}) == 1
+        assert sample("google_api_call_duration_seconds_count", {"operation": "test.op"}) == 2
+
+    def test_multiprocess_aggregation(self, tmp_path, monkeypatch):
+        """Тест: в multiprocess режиме /metrics суммирует значения всех воркеров"""
+        worker = (
+            "from prometheus_client import Counter; "
+            "Counter('worker_jobs', 'jobs').inc(3)"
+        )
+        env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        output = render_metrics().decode()
+
+        assert "worker_jobs_total 6.0" in output
@@ -0,0 +1,109 @@
+"""
+Тесты ASGI middleware запроса (request id, логирование, перехват ошибок)
+"""
+import logging
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.middleware import REQUEST_ID_HEADER, RequestContextMiddleware
+
+
+@pytest.fixture
+def context_client():
+    """Мини-приложение с RequestContextMiddleware"""
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int, request: Request):
+        return {"item_id": item_id, "request_id": request.state.request_id}
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="not found")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestContextMiddleware)
+    return TestClient(app)
+
+
+def middleware_records(caplog):
+    return [r for r in caplog.records if r.name == "app.core.middleware"]
+
+
+def completed_records(caplog):
+    return [r for r in middleware_records(caplog) if r.event == "request_completed"]
+
+
+class TestRequestId:
+    """Тесты request id"""
+
+    def test_generated_and_returned(self, context_client):
+        """Тест: request id генерируется, доступен обработчику и возвращается в ответе"""
+        response = context_client.get("/items/1")
+
+        assert response.status_code == 200
+        assert response.headers[REQUEST_ID_HEADER] == response.json()["request_id"]
+
+    def test_incoming_id_is_reused(self, context_client):
+        """Тест: X-Request-ID от прокси сохраняется"""
+        response = context_client.get("/items/1", headers={REQUEST_ID_HEADER: "edge-123"})
+
+        assert response.headers[REQUEST_ID_HEADER] == "edge-123"
+
+
+class TestRequestLogging:
+    """Тесты логирования и сэмплирования"""
+
+    def test_single_record_per_request(self, context_client, caplog):
+        """Тест: одна запись на запрос с шаблоном пути и параметрами"""
+        with caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            context_client.get("/items/7?verbose=1")
+
+        assert len(middleware_records(caplog)) == 1
+        record = completed_records(caplog)[0]
+        assert record.status_code == 200
+        assert record.path == "/items/7"
+        assert record.query_params == {"verbose": "1"}
+
+    def test_2xx_sampled_errors_always_logged(self, context_client, caplog):
+        """Тест: при нулевой доле 2xx не логируются, 4xx логируются"""
+        with patch.object(settings, "REQUEST_LOG_SAMPLE_RATE_2XX", 0.0), \
+                caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            context_client.get("/items/1")
+            context_client.get("/missing")
+
+        assert [r.status_code for r in completed_records(caplog)] == [404]
+
+    def test_slow_requests_always_logged(self, context_client, caplog):
+        """Тест: медленные 2xx запросы логируются несмотря на сэмплирование"""
+        with patch.object(settings, "REQUEST_LOG_SAMPLE_RATE_2XX", 0.0), \
+                patch.object(settings, "REQUEST_LOG_SLOW_SECONDS", 0.0), \
+                caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            context_client.get("/items/1")
+
+        assert len(completed_records(caplog)) == 1
+
+
+class TestUnhandledErrors:
+    """Тесты перехвата неожиданных исключений"""
+
+    def test_unhandled_exception_returns_500(self, context_client, caplog):
+        """Тест: исключение превращается в 500 с request id, детали скрыты в prod"""
+        with patch.object(settings, "DEBUG", False), \
+                caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            response = context_client.get("/boom")
+
+        assert response.status_code == 500
+        error = response.json()["error"]
+        assert error["code"] == "INTERNAL_ERROR"
+        assert error["message"] == "Internal server error"
+        assert error["details"]["request_id"] == response.headers[REQUEST_ID_HEADER]
+        events = [r.event for r in middleware_records(caplog)]
+        assert events == ["unhandled_exception", "request_completed"]
@@ -0,0 +1,73 @@
+"""
+Тесты списка моих ответов (GET /surveys/my-responses)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.models import SurveyResponse
+
+
+@pytest.fixture
+def my_responses(db_session, test_user, second_test_user, make_survey):
+    """5 ответов пользователя на опросы второго пользователя, два - с одинаковым started_at"""
+    surveys = [make_survey(second_test_user, title=f"Survey {i}", reward_per_response=5 + i) for i in range(5)]
+    now = datetime.now(timezone.utc)
+    responses = [
+        SurveyResponse(
+            survey_id=survey.id, respondent_id=test_user.id, started_at=now - timedelta(minutes=i // 2),
+            is_verified=i % 2 == 0, reward_paid=i % 2 == 0,
+        )
+        for i, survey in enumerate(surveys)
+    ]
+    db_session.add_all(responses)
+    db_session.commit()
+    return sorted(responses, key=lambda r: (r.started_at, r.id), reverse=True)
+
+
+class TestMyResponses:
+    """Тесты keyset пагинации и total"""
+
+    def test_cursor_pages_with_survey_data(self, client: TestClient, auth_headers, my_responses):
+        """Тест: страницы по курсору без повторов, опрос и награда из того же запроса"""
+        ids, cursor = [], None
+        while True:
+            params = {"per_page": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/surveys/my-responses", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()["data"]
+            assert (data["total"], data["total_exact"]) == (5, True)
+            ids += [item["id"] for item in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert ids == [r.id for r in my_responses]
+        first = client.get("/api/v1/surveys/my-responses", headers=auth_headers).json()["data"]["items"][0]
+        assert first["survey"]["title"] == my_responses[0].survey.title
+        assert first["reward_earned"] == (my_responses[0].survey.reward_per_response if my_responses[0].reward_paid else 0)
+
+    def test_statement_count_does_not_grow(self, client: TestClient, auth_headers, my_responses, db_statement_counts):
+        """Тест: страница - запрос строк и запрос total, без загрузки опросов по одному"""
+        client.get("/api/v1/users/me", headers=auth_headers)  # прогрев кэша пользователя
+        client.get("/api/v1/surveys/my-responses", params={"per_page": 1}, headers=auth_headers)
+        client.get("/api/v1/surveys/my-responses", params={"per_page": 5}, headers=auth_headers)
+
+        _, small, large = db_statement_counts()
+        assert small == large == 2
+
+    def test_total_beyond_exact_limit(self, client: TestClient, auth_headers, my_responses, monkeypatch):
+        """Тест: сверх лимита точного подсчета SQLite досчитывает полным COUNT"""
+        monkeypatch.setattr(settings, "MY_RESPONSES_EXACT_COUNT_LIMIT", 2)
+
+        data = client.get("/api/v1/surveys/my-responses", headers=auth_headers).json()["data"]
+
+        assert (data["total"], data["total_exact"]) == (5, True)
+
+    def test_invalid_cursor(self, client: TestClient, auth_headers):
+        """Тест: чужая строка в качестве курсора - ошибка валидации"""
+        response = client.get("/api/v1/surveys/my-responses", params={"cursor": "abc"}, headers=auth_headers)
+
+        assert response.status_code == 422
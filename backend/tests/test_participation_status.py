@@ -0,0 +1,72 @@
+"""
+Тесты статусов участия (GET /surveys/{id}/my-status и POST /surveys/my-status:batch)
+"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import SurveyResponse, SurveyStatus
+
+
+@pytest.fixture
+def status_surveys(db_session, test_user, second_test_user, make_survey):
+    """Опросы во всех состояниях участия для test_user"""
+    def survey(name, owner=second_test_user, status=SurveyStatus.ACTIVE):
+        return make_survey(owner, title=name, reward_per_response=7, status=status)
+
+    surveys = {
+        "open": survey("open"),
+        "own": survey("own", test_user),
+        "paused": survey("paused", status=SurveyStatus.PAUSED),
+        "in_progress": survey("in_progress"),
+        "completed": survey("completed"),
+    }
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        SurveyResponse(survey_id=surveys["in_progress"].id, respondent_id=test_user.id, started_at=now),
+        SurveyResponse(
+            survey_id=surveys["completed"].id, respondent_id=test_user.id, started_at=now,
+            completed_at=now, is_verified=True, reward_paid=True,
+        ),
+    ])
+    db_session.commit()
+    return {name: s.id for name, s in surveys.items()}
+
+
+class TestParticipationStatusBatch:
+    """Тесты пакетного статуса участия"""
+
+    def test_batch_matches_single_status(self, client: TestClient, auth_headers, status_surveys):
+        """Тест: пакетный ответ совпадает с поштучными запросами, включая неизвестный опрос"""
+        ids = list(status_surveys.values()) + [999999]
+        response = client.post("/api/v1/surveys/my-status:batch", json={"survey_ids": ids}, headers=auth_headers)
+
+        assert response.status_code == 200
+        batch = response.json()["data"]
+        for survey_id in ids:
+            single = client.get(f"/api/v1/surveys/{survey_id}/my-status", headers=auth_headers).json()["data"]
+            assert batch[str(survey_id)] == single
+
+        by_name = {name: batch[str(survey_id)] for name, survey_id in status_surveys.items()}
+        assert [name for name, s in by_name.items() if s["can_participate"]] == ["open"]
+        assert by_name["in_progress"]["status"] == "in_progress"
+        assert (by_name["completed"]["status"], by_name["completed"]["reward_earned"]) == ("completed", 7)
+        assert batch["999999"]["status"] == "not_started"
+
+    def test_query_count_is_constant(self, client: TestClient, auth_headers, status_surveys, db_statement_counts):
+        """Тест: число запросов не зависит от числа опросов"""
+        client.post("/api/v1/surveys/my-status:batch", json={"survey_ids": [status_surveys["open"]]}, headers=auth_headers)
+        client.post(
+            "/api/v1/surveys/my-status:batch", json={"survey_ids": list(status_surveys.values())}, headers=auth_headers
+        )
+
+        one, many = db_statement_counts()
+        # POST не берет пользователя из principal cache: users + опросы + ответы
+        assert one == many == 3
+
+    def test_batch_size_limits(self, client: TestClient, auth_headers):
+        """Тест: пустой список и больше 100 опросов отклоняются"""
+        for survey_ids in ([], list(range(1, 102))):
+            response = client.post("/api/v1/surveys/my-status:batch", json={"survey_ids": survey_ids}, headers=auth_headers)
+            assert response.status_code == 422
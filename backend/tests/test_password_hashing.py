@@ -0,0 +1,95 @@
+"""
+Тесты пула процессов для хеширования паролей
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.exceptions import ServiceOverloadedException
+from app.core.password_hashing import PasswordHasher
+
+
+@pytest.fixture
+def process_hasher():
+    """Пул из одного процесса"""
+    hasher = PasswordHasher(max_workers=1, max_queue=2, name="test")
+    yield hasher
+    hasher.shutdown()
+
+
+class TestPasswordHasher:
+    """Тесты PasswordHasher"""
+
+    async def test_hash_and_verify_in_process_pool(self, process_hasher):
+        """Тест: хеш из пула процессов проверяется корректно"""
+        hashed = await process_hasher.hash("secret_password")
+
+        assert hashed.startswith("$2b$")
+        assert await process_hasher.verify("secret_password", hashed) is True
+        assert await process_hasher.verify("wrong_password", hashed) is False
+
+        stats = process_hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["in_flight"] == 0
+
+    async def test_event_loop_not_blocked(self, process_hasher):
+        """Тест: во время хеширования event loop продолжает работать"""
+        await process_hasher.hash("warmup")  # запуск процесса не учитываем
+
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await process_hasher.hash("secret_password")
+        elapsed = time.perf_counter() - started
+        task.cancel()
+
+        # За время bcrypt (~сотни мс) heartbeat должен успеть отработать много раз
+        assert ticks >= int(elapsed / 0.01) // 2
+
+    async def test_queue_overflow_rejected(self, process_hasher):
+        """Тест: при переполнении очереди возвращается 503"""
+        await process_hasher.hash("warmup")
+
+        tasks = [asyncio.create_task(process_hasher.hash(f"pw{i}")) for i in range(6)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        rejected = [r for r in results if isinstance(r, ServiceOverloadedException)]
+        # 1 выполняется + 2 в очереди, остальные отклонены
+        assert len(rejected) == 3
+        assert rejected[0].status_code == 503
+        assert process_hasher.stats()["rejected"] == 3
+        assert process_hasher.stats()["max_queue_depth"] == 2
+        labels = {"pool": "test"}
+        assert REGISTRY.get_sample_value("password_hash_rejected_total", labels) >= 3
+        assert REGISTRY.get_sample_value("password_hash_max_queue_depth", labels) == 2
+        assert REGISTRY.get_sample_value("password_hash_in_flight", labels) == 0
+        assert REGISTRY.get_sample_value("password_hash_queue_depth", labels) == 0
+
+    async def test_inline_mode(self):
+        """Тест: при 0 воркерах хеширование выполняется в текущем процессе"""
+        hasher = PasswordHasher(max_workers=0, max_queue=0)
+        hashed = await hasher.hash("secret_password")
+
+        assert await hasher.verify("secret_password", hashed) is True
+        assert hasher.stats()["completed"] == 0  # inline-вызовы не проходят через пул
+
+    def test_health_details_include_pool_stats(self, client: TestClient, monkeypatch):
+        """Тест: состояние пула bcrypt доступно в /health/details"""
+        monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "test-metrics-token")
+
+        response = client.get("/health/details", headers={"Authorization": "Bearer test-metrics-token"})
+
+        stats = response.json()["password_hashing"]
+        assert {"in_flight", "queue_depth", "max_queue_depth", "rejected"} <= set(stats)
@@ -0,0 +1,134 @@
+"""
+Тесты кэша аутентифицированных пользователей
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text, update
+
+from app.core.principal_cache import PrincipalCache, principal_cache
+from app.models import User
+
+
+def count_user_selects(statements):
+    return sum(1 for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM users" in s)
+
+
+class TestPrincipalCache:
+    """Тесты principal cache в get_current_user"""
+
+    def test_cache_hit_skips_user_query(self, client: TestClient, auth_headers, test_user, db_session):
+        """Тест: повторный запрос с тем же токеном не читает таблицу users"""
+        engine = db_session.get_bind()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            first = client.get("/api/v1/users/me", headers=auth_headers)
+            after_first = count_user_selects(statements)
+            second = client.get("/api/v1/users/me", headers=auth_headers)
+            after_second = count_user_selects(statements)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert after_first > 0
+        assert second.json() == first.json()
+        assert after_second == after_first
+        assert principal_cache.hits >= 1
+
+    def test_profile_update_invalidates_cache(self, client: TestClient, auth_headers, test_user):
+        """Тест: после изменения профиля отдается свежий снимок"""
+        client.get("/api/v1/users/me", headers=auth_headers)
+
+        response = client.put("/api/v1/users/me", json={"full_name": "Renamed User"}, headers=auth_headers)
+        assert response.status_code == 200
+
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        assert response.json()["full_name"] == "Renamed User"
+
+    def test_balance_change_invalidates_cache(self, client: TestClient, auth_headers, test_user, db_session):
+        """Тест: изменение баланса сбрасывает запись кэша"""
+        client.get("/api/v1/users/me", headers=auth_headers)
+
+        test_user.balance += 25
+        db_session.commit()
+
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        assert response.json()["balance"] == test_user.balance
+
+    def test_deactivated_user_rejected(self, client: TestClient, auth_headers, test_user, db_session):
+        """Тест: деактивированный пользователь не проходит по закэшированному токену"""
+        assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+
+        test_user.is_active = False
+        db_session.commit()
+
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        assert response.status_code in [401, 403]
+
+    def test_snapshot_cached_between_flush_and_commit_is_dropped(self, test_user, db_session):
+        """Тест: параллельный запрос закэшировал старую строку после flush - commit ее сбрасывает"""
+        stale = User(**{field: getattr(test_user, field) for field in ("id", "email", "full_name", "balance", "respondent_code")})
+        stale.is_active = True
+
+        test_user.is_active = False
+        db_session.flush()
+        # Другой запрос не видит незакоммиченную деактивацию и кэширует старую строку
+        principal_cache.put("concurrent-token", {"sub": str(test_user.id)}, stale)
+        assert principal_cache.get("concurrent-token") is not None
+
+        db_session.commit()
+
+        assert principal_cache.get("concurrent-token") is None
+
+    def test_writes_recheck_user_missed_by_invalidation(self, client: TestClient, auth_headers, test_user, db_session):
+        """Тест: деактивация в обход сессии (как в другом инстансе) видна сразу только запросам на изменение"""
+        assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+
+        db_session.execute(text("UPDATE users SET is_active = false WHERE id = :id"), {"id": test_user.id})
+        db_session.commit()
+
+        # Чтение - устаревший снимок в пределах TTL
+        assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+        db_session.expire_all()  # в приложении у каждого запроса своя сессия
+        response = client.put("/api/v1/users/me", json={"full_name": "Blocked"}, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_bulk_user_update_clears_cache(self, client: TestClient, auth_headers, test_user, db_session):
+        """Тест: update(User) через сессию не проходит через after_flush, но сбрасывает кэш"""
+        client.get("/api/v1/users/me", headers=auth_headers)
+
+        db_session.execute(update(User).where(User.id == test_user.id).values(full_name="Bulk Renamed"))
+        db_session.commit()
+
+        assert client.get("/api/v1/users/me", headers=auth_headers).json()["full_name"] == "Bulk Renamed"
+
+    def test_entries_expire_and_are_bounded(self):
+        """Тест: TTL и ограничение размера"""
+        class FakeUser:
+            def __init__(self, user_id):
+                self.id = user_id
+                self.email = f"u{user_id}@example.com"
+                self.full_name = "User"
+                self.balance = 0
+                self.respondent_code = f"RESP_{user_id}"
+                self.is_active = True
+                self.created_at = None
+                self.updated_at = None
+
+        cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+        for i in range(3):
+            cache.put(f"token-{i}", {"sub": str(i)}, FakeUser(i))
+
+        assert cache.get("token-0") is None
+        assert cache.get("token-2").user_id == 2
+
+        # Токен уже истек - в кэш не попадает
+        cache.put("expired", {"sub": "5", "exp": 1}, FakeUser(5))
+        assert cache.get("expired") is None
+
+        cache.invalidate_user(2)
+        assert cache.get("token-2") is None
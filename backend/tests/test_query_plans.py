@@ -0,0 +1,171 @@
+"""
+Регрессионные тесты планов запросов горячих путей
+
+Каждый репозиторный запрос выполняется на заполненной базе, перехваченный SQL
+прогоняется через EXPLAIN QUERY PLAN (SQLite). Тест падает, если в плане есть
+полное сканирование таблицы (SCAN без USING INDEX) - значит, запрос перестал
+попадать в индекс или индекс пропал из моделей.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, text
+
+from app.core.pagination import encode_cursor
+from app.models import (
+    BalanceTransaction,
+    GoogleAccount,
+    Survey,
+    SurveyResponse,
+    SurveyStatus,
+    TransactionType,
+    User,
+)
+from app.repositories.balance_rollup_repository import balance_rollup_repository
+from app.repositories.google_account_repository import google_account_repository
+from app.repositories.survey_repository import survey_repository
+from app.repositories.survey_response_repository import survey_response_repository
+from app.repositories.synced_form_response_repository import synced_form_response_repository
+from app.services.user_service import UserService
+
+USERS = 40
+SURVEYS_PER_AUTHOR = 5
+RESPONSES_PER_USER = 10
+
+# "SCAN surveys" - полный проход; "SCAN surveys USING INDEX ..." - проход по индексу;
+# "SCAN anon_1" - проход по результату подзапроса, а не по таблице
+FULL_SCAN = re.compile(r"^SCAN (?!anon_)(\w+)(?!.*USING)")
+
+
+@pytest.fixture
+def seeded_db(db_session):
+    """База с пользователями, опросами, ответами и транзакциями + статистика ANALYZE"""
+    now = datetime.now(timezone.utc)
+    users = [
+        User(email=f"user{i}@example.com", full_name=f"User {i}", balance=100, respondent_code=f"R{i:05d}")
+        for i in range(USERS)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+
+    accounts = [
+        GoogleAccount(
+            user_id=user.id, google_id=f"g{user.id}", email=f"g{user.id}@gmail.com",
+            name=user.full_name, access_token="token", is_primary=True,
+        )
+        for user in users
+    ]
+    db_session.add_all(accounts)
+    db_session.flush()
+
+    surveys = []
+    for account in accounts:
+        for j in range(SURVEYS_PER_AUTHOR):
+            surveys.append(Survey(
+                title=f"Survey {account.id}-{j}", google_account_id=account.id,
+                google_form_id=f"form-{account.id}-{j}", google_form_url="https://docs.google.com/forms/d/x/viewform",
+                questions_count=5, reward_per_response=5,
+                status=SurveyStatus.ACTIVE if j % 2 == 0 else SurveyStatus.COMPLETED,
+                created_at=now - timedelta(minutes=len(surveys)),
+            ))
+    db_session.add_all(surveys)
+    db_session.flush()
+
+    for i, user in enumerate(users):
+        for k in range(RESPONSES_PER_USER):
+            survey = surveys[(i * 7 + k * 13) % len(surveys)]
+            db_session.add(SurveyResponse(survey_id=survey.id, respondent_id=user.id, started_at=now))
+            db_session.add(BalanceTransaction(
+                user_id=user.id, transaction_type=TransactionType.EARNED, amount=5,
+                balance_after=100 + 5 * k, related_survey_id=survey.id, created_at=now - timedelta(minutes=k),
+            ))
+    db_session.flush()
+    balance_rollup_repository.backfill(db_session.connection())
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    return {"user_id": users[3].id, "account_id": accounts[3].id, "survey_id": surveys[10].id}
+
+
+@contextmanager
+def captured_statements(db):
+    """Перехватить SQL, выполненный через сессию"""
+    statements = []
+    engine = db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(db, statements):
+    """Таблицы, которые читаются полным сканированием, по каждому запросу"""
+    connection = db.connection().connection.dbapi_connection
+    problems = []
+    for statement, parameters in statements:
+        plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        details = [row[-1] for row in plan]
+        scanned = [m.group(1) for m in map(FULL_SCAN.match, details) if m]
+        if scanned:
+            problems.append((scanned, statement, details))
+    return problems
+
+
+HOT_QUERIES = {
+    "feed": lambda db, ids: survey_repository.get_active_surveys(db, 0, 50),
+    "my_surveys": lambda db, ids: survey_repository.get_user_surveys(db, ids["account_id"]),
+    "participation_count": lambda db, ids: survey_repository.get_user_participation_count(
+        db, ids["survey_id"], ids["user_id"]
+    ),
+    "can_participate": lambda db, ids: survey_repository.can_user_participate(db, ids["survey_id"], ids["user_id"]),
+    "participation_rules": lambda db, ids: survey_repository.get_participation_rules(
+        db, [ids["survey_id"] + i for i in range(20)]
+    ),
+    "responses_for_surveys": lambda db, ids: survey_response_repository.get_user_responses_for_surveys(
+        db, ids["user_id"], [ids["survey_id"] + i for i in range(20)]
+    ),
+    "response_by_survey_and_respondent": lambda db, ids: survey_response_repository.get_by_survey_and_respondent(
+        db, ids["survey_id"], ids["user_id"]
+    ),
+    "my_responses": lambda db, ids: survey_response_repository.get_user_responses_page(db, ids["user_id"], 21),
+    "my_responses_after_cursor": lambda db, ids: survey_response_repository.get_user_responses_page(
+        db, ids["user_id"], 21, after=(datetime.now(timezone.utc), 10**9)
+    ),
+    "my_responses_total": lambda db, ids: survey_response_repository.count_user_responses(db, ids["user_id"], 1000),
+    "synced_response_lookup": lambda db, ids: synced_form_response_repository.find_unclaimed(
+        db, ids["survey_id"], ["user3@example.com", "g3@gmail.com"], "RESP_000000003"
+    ),
+    "responses_count": lambda db, ids: survey_response_repository.count_responses_by_survey(db, ids["survey_id"]),
+    "google_accounts": lambda db, ids: google_account_repository.get_by_user_id(db, ids["user_id"]),
+    "primary_google_account": lambda db, ids: google_account_repository.get_primary_for_user(db, ids["user_id"]),
+    "balance_summary": lambda db, ids: balance_rollup_repository.get_totals(db, ids["user_id"]),
+    "transactions": lambda db, ids: UserService(db).get_transactions(db.get(User, ids["user_id"])),
+    "transactions_by_type_after_cursor": lambda db, ids: UserService(db).get_transactions(
+        db.get(User, ids["user_id"]),
+        cursor=encode_cursor(datetime.now(timezone.utc) - timedelta(minutes=3), 10**9),
+        transaction_type=TransactionType.EARNED,
+    ),
+}
+
+
+class TestHotQueryPlans:
+    """Горячие запросы не должны читать таблицы полным сканированием"""
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_no_full_table_scans(self, db_session, seeded_db, name):
+        db_session.expire_all()
+        with captured_statements(db_session) as statements:
+            HOT_QUERIES[name](db_session, seeded_db)
+
+        assert statements, "запрос не выполнил ни одного SELECT"
+        problems = full_scans(db_session, statements)
+        assert not problems, "\n\n".join(
+            f"Full scan of {tables}:\n{statement}\nplan: {details}" for tables, statement, details in problems
+        )
@@ -0,0 +1,79 @@
+"""
+Тесты учета SQL запросов на HTTP запрос
+"""
+import logging
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.query_stats import current_query_stats, track_queries
+
+
+def histogram_count(name: str, route: str) -> float:
+    return REGISTRY.get_sample_value(f"{name}_count", {"method": "GET", "route": route}) or 0.0
+
+
+class TestQueryStats:
+    """Тесты счетчика запросов"""
+
+    def test_counts_only_inside_tracking_block(self, db_session):
+        """Тест: запросы считаются только внутри track_queries"""
+        db_session.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            db_session.execute(text("SELECT 1"))
+            db_session.execute(text("SELECT 2"))
+
+        assert current_query_stats() is None
+        assert stats.statements == 2
+        assert stats.duration_seconds > 0
+
+    def test_failed_statement_is_counted(self, db_session):
+        """Тест: запрос с ошибкой тоже учитывается"""
+        with track_queries() as stats:
+            try:
+                db_session.execute(text("SELECT * FROM missing_table"))
+            except Exception:
+                db_session.rollback()
+
+        assert stats.statements == 1
+
+
+class TestRequestInstrumentation:
+    """Тесты инструментирования HTTP запросов"""
+
+    def test_request_log_and_histograms(self, client: TestClient, test_user, auth_headers, caplog):
+        """Тест: число запросов и время БД попадают в лог и гистограммы маршрута"""
+        route = "/api/v1/users/me/transactions"
+        before_statements = histogram_count("http_request_db_statements", route)
+        before_seconds = histogram_count("http_request_db_seconds", route)
+
+        with caplog.at_level(logging.INFO, logger="app.core.middleware"):
+            response = client.get(route, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+        completed = [r for r in caplog.records if getattr(r, "event", None) == "request_completed"]
+        assert completed[-1].db_statements >= 1
+        assert completed[-1].db_time > 0
+        assert histogram_count("http_request_db_statements", route) == before_statements + 1
+        assert histogram_count("http_request_db_seconds", route) == before_seconds + 1
+
+    def test_server_timing_header(self, client: TestClient, db_session):
+        """Тест: Server-Timing добавляется, если включен"""
+        with patch.object(settings, "SERVER_TIMING_ENABLED", True):
+            response = client.get("/api/v1/categories")
+
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="1 queries"' in response.headers["Server-Timing"]
+
+    def test_unmatched_route_label(self, client: TestClient):
+        """Тест: запросы мимо маршрутов группируются под одной меткой"""
+        before = histogram_count("http_request_db_statements", "unmatched")
+
+        client.get("/no/such/path")
+
+        assert histogram_count("http_request_db_statements", "unmatched") == before + 1
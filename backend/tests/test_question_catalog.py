@@ -0,0 +1,171 @@
+"""
+Тесты каталога вопросов формы и закодированных ответов
+"""
+import pytest
+
+from app.models import GoogleAccount, QuestionKind, Survey, SurveyAnswer, SurveyQuestion, SurveyStatus, SyncedFormResponse
+from app.services.question_catalog import OTHER_CHOICE, catalog_from_items, question_types
+from app.services.survey_sync_service import survey_sync_service
+
+FORM_ITEMS = [
+    {"itemId": "h", "title": "Intro", "textItem": {}},
+    {"itemId": "1", "title": "Color", "questionItem": {"question": {
+        "questionId": "color", "required": True,
+        "choiceQuestion": {"type": "RADIO", "options": [{"value": "Red"}, {"value": "Blue"}, {"isOther": True}]},
+    }}},
+    {"itemId": "2", "title": "Pets", "questionItem": {"question": {
+        "questionId": "pets", "choiceQuestion": {"type": "CHECKBOX", "options": [{"value": "Cat"}, {"value": "Dog"}]},
+    }}},
+    {"itemId": "3", "title": "Score", "questionItem": {"question": {"questionId": "score", "scaleQuestion": {"low": 1, "high": 5}}}},
+    {"itemId": "4", "title": "Rate", "questionGroupItem": {
+        "grid": {"columns": {"type": "RADIO", "options": [{"value": "Bad"}, {"value": "Good"}]}},
+        "questions": [
+            {"questionId": "rate-ui", "rowQuestion": {"title": "UI"}},
+            {"questionId": "rate-speed", "rowQuestion": {"title": "Speed"}},
+        ],
+    }},
+    {"itemId": "5", "title": "Born", "questionItem": {"question": {"questionId": "born", "dateQuestion": {}}}},
+    {"itemId": "6", "title": "Comment", "questionItem": {"question": {"questionId": "comment", "textQuestion": {}}}},
+]
+
+
+def answers(**values) -> dict:
+    return {question_id: {"textAnswers": {"answers": [{"value": v} for v in vs]}} for question_id, vs in values.items()}
+
+
+def google_response(response_id: str, **values) -> dict:
+    return {"responseId": response_id, "lastSubmittedTime": "2026-01-01T10:00:00Z", "answers": answers(**values)}
+
+
+@pytest.fixture
+def catalog_survey(db_session, test_user):
+    account = GoogleAccount(
+        user_id=test_user.id, google_id="catalog-author", email="catalog-author@gmail.com",
+        name="Author", access_token="token", is_primary=True,
+    )
+    db_session.add(account)
+    db_session.flush()
+    survey = Survey(
+        title="Catalog", google_account_id=account.id, google_form_id="catalog-form",
+        google_form_url="https://docs.google.com/forms/d/x/viewform", questions_count=len(FORM_ITEMS),
+        reward_per_response=5, status=SurveyStatus.ACTIVE,
+    )
+    db_session.add(survey)
+    db_session.commit()
+    return survey
+
+
+def stored_answers(db, survey_id: int) -> dict:
+    """google_question_id -> [(choice, number, text)] в порядке вставки"""
+    rows = (
+        db.query(SurveyQuestion.google_question_id, SurveyAnswer.choice, SurveyAnswer.number, SurveyAnswer.text)
+        .join(SurveyQuestion, SurveyQuestion.id == SurveyAnswer.question_id)
+        .filter(SurveyAnswer.survey_id == survey_id)
+        .order_by(SurveyAnswer.id)
+        .all()
+    )
+    result = {}
+    for question_id, *values in rows:
+        result.setdefault(question_id, []).append(tuple(values))
+    return result
+
+
+class TestCatalogFromItems:
+    """Тесты разбора вопросов формы"""
+
+    def test_question_kinds_and_grid_rows(self):
+        """Тест: элементы без вопросов пропускаются, строки сетки - отдельные вопросы"""
+        catalog = catalog_from_items(FORM_ITEMS)
+
+        assert [(q["google_question_id"], q["kind"], q["position"]) for q in catalog] == [
+            ("color", QuestionKind.choice, 0),
+            ("pets", QuestionKind.checkbox, 1),
+            ("score", QuestionKind.scale, 2),
+            ("rate-ui", QuestionKind.choice, 3),
+            ("rate-speed", QuestionKind.choice, 4),
+            ("born", QuestionKind.date, 5),
+            ("comment", QuestionKind.text, 6),
+        ]
+        color, grid_row = catalog[0], catalog[4]
+        assert (color["options"], color["has_other"], color["required"]) == (["Red", "Blue"], True, True)
+        assert (grid_row["title"], grid_row["options"]) == ("Rate: Speed", ["Bad", "Good"])
+        assert question_types(catalog)["questions"][1] == {"type": "checkbox", "required": False, "options": ["Cat", "Dog"]}
+
+
+class TestSyncedAnswers:
+    """Тесты сохранения ответов при синхронизации"""
+
+    async def test_answers_are_integer_coded(self, db_session, catalog_survey, fake_forms):
+        """Тест: варианты - индексы, "Другое" - -1 с текстом, шкала и дата - числа"""
+        google = fake_forms([
+            google_response(
+                "r1", color=["Blue"], pets=["Cat", "Dog"], score=["4"], born=["1970-01-11"], comment=["nice"],
+                **{"rate-speed": ["Good"]},
+            ),
+            google_response("r2", color=["Green"], pets=["Dog"]),
+        ], items=FORM_ITEMS)
+
+        await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id)
+
+        assert google.form_reads == 1
+        assert stored_answers(db_session, catalog_survey.id) == {
+            "color": [(1, None, None), (OTHER_CHOICE, None, "Green")],
+            "pets": [(0, None, None), (1, None, None), (1, None, None)],
+            "score": [(None, 4.0, None)],
+            "rate-speed": [(1, None, None)],
+            "born": [(None, 10.0, "1970-01-11")],
+            "comment": [(None, None, "nice")],
+        }
+
+    async def test_new_option_extends_catalog_with_stable_codes(self, db_session, catalog_survey, fake_forms):
+        """Тест: вариант, добавленный в форму позже, получает следующий код, старые коды не меняются"""
+        fake_forms([google_response("r1", pets=["Dog"])], items=FORM_ITEMS)
+        await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id, force_full_sync=True)
+
+        edited = [dict(item) for item in FORM_ITEMS]
+        edited[2] = {"itemId": "2", "title": "Pets", "questionItem": {"question": {
+            "questionId": "pets",
+            "choiceQuestion": {"type": "CHECKBOX", "options": [{"value": "Fish"}, {"value": "Cat"}, {"value": "Dog"}]},
+        }}}
+        google = fake_forms([google_response("r2", pets=["Fish", "Dog"])], items=edited)
+        await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id, force_full_sync=True)
+
+        pets = db_session.query(SurveyQuestion).filter(SurveyQuestion.google_question_id == "pets").one()
+        assert google.form_reads == 1
+        assert pets.options == ["Cat", "Dog", "Fish"]
+        assert stored_answers(db_session, catalog_survey.id)["pets"] == [(1, None, None), (2, None, None), (1, None, None)]
+
+    async def test_known_responses_are_not_encoded_twice(self, db_session, catalog_survey, fake_forms):
+        """Тест: повторная полная синхронизация не дублирует ответы"""
+        fake_forms([google_response("r1", color=["Red"])], items=FORM_ITEMS)
+        for _ in range(2):
+            await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id, force_full_sync=True)
+
+        assert stored_answers(db_session, catalog_survey.id) == {"color": [(0, None, None)]}
+
+    async def test_edited_response_is_re_encoded(self, db_session, catalog_survey, fake_forms):
+        """Тест: у отредактированного ответа обновляется время отправки, а ответы перекодируются"""
+        fake_forms([google_response("r1", color=["Red"], pets=["Cat"])], items=FORM_ITEMS)
+        await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id)
+
+        edited = {**google_response("r1", color=["Blue"]), "lastSubmittedTime": "2026-01-02T10:00:00Z"}
+        fake_forms([edited], items=FORM_ITEMS)
+        result = await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id)
+
+        synced = db_session.query(SyncedFormResponse).one()
+        assert result.new_responses == 0
+        assert (synced.submitted_at.day, synced.submitted_at.hour) == (2, 10)
+        assert stored_answers(db_session, catalog_survey.id) == {"color": [(1, None, None)]}
+
+    async def test_form_is_read_at_most_once_per_sync(self, db_session, catalog_survey, fake_forms):
+        """Тест: каталог перечитывается один раз, даже если неизвестные ответы на нескольких страницах"""
+        google = fake_forms(
+            [google_response("r1", color=["Red"], extra=["x"])],
+            [google_response("r2", extra=["y"])],
+            items=FORM_ITEMS,
+        )
+
+        await survey_sync_service.sync_survey_responses(db_session, catalog_survey.id)
+
+        assert google.form_reads == 1
+        assert stored_answers(db_session, catalog_survey.id) == {"color": [(0, None, None)]}
@@ -0,0 +1,210 @@
+"""
+Тесты rate limiting (GCRA, middleware и backends)
+"""
+import re
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.client_ip import client_ip
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RedisRateLimitBackend,
+)
+
+
+def make_policy(name: str, limit: int, window: int, pattern: str) -> RateLimitPolicy:
+    return RateLimitPolicy(name=name, limit=limit, window=window, pattern=re.compile(pattern))
+
+
+@pytest.fixture
+def limited_client():
+    return make_limited_client()
+
+
+def make_limited_client(trusted_proxy_hops: int = 0) -> TestClient:
+    """Мини-приложение со строгими политиками"""
+    app = FastAPI()
+
+    @app.get("/api/v1/auth/login")
+    async def login():
+        return {"ok": True}
+
+    @app.get("/api/v1/items")
+    async def items():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=InMemoryRateLimitBackend(),
+        policies=[
+            make_policy("auth", 3, 60, r"^/api/v1/auth/"),
+            make_policy("default", 100, 60, r"^/api/"),
+        ],
+        trusted_proxy_hops=trusted_proxy_hops,
+    )
+    return TestClient(app)
+
+
+def scope_with(forwarded_for: Optional[str] = None, client=("10.0.0.1", 5000)) -> dict:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for is not None else []
+    return {"type": "http", "headers": headers, "client": client}
+
+
+class TestClientIp:
+    """Тесты определения адреса клиента за прокси"""
+
+    def test_without_trusted_proxies_forwarded_for_is_ignored(self):
+        """Тест: hops=0 - адрес соединения, подделанный заголовок не влияет"""
+        assert client_ip(scope_with("1.2.3.4"), trusted_hops=0) == "10.0.0.1"
+
+    def test_takes_address_appended_by_trusted_proxy(self):
+        """Тест: берется hops-й адрес с конца, подставленные клиентом левые адреса игнорируются"""
+        assert client_ip(scope_with("6.6.6.6, 203.0.113.7"), trusted_hops=1) == "203.0.113.7"
+        assert client_ip(scope_with("6.6.6.6, 203.0.113.7, 35.191.0.1"), trusted_hops=2) == "203.0.113.7"
+
+    def test_short_or_missing_header(self):
+        """Тест: записей меньше hops - самая левая, заголовка нет - адрес соединения"""
+        assert client_ip(scope_with("203.0.113.7"), trusted_hops=2) == "203.0.113.7"
+        assert client_ip(scope_with(), trusted_hops=1) == "10.0.0.1"
+
+
+class TestRateLimitMiddleware:
+    """Тесты middleware"""
+
+    def test_limit_exceeded_returns_429(self, limited_client):
+        """Тест: после limit запросов возвращается 429 с Retry-After"""
+        for _ in range(3):
+            assert limited_client.get("/api/v1/auth/login").status_code == 200
+
+        response = limited_client.get("/api/v1/auth/login")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "20"
+        assert response.headers["X-RateLimit-Limit"] == "3"
+        error = response.json()["error"]
+        assert error["code"] == "GENERAL005"
+        assert error["details"]["policy"] == "auth"
+
+    def test_policies_are_independent(self, limited_client):
+        """Тест: исчерпанный лимит /auth не влияет на остальные пути"""
+        for _ in range(4):
+            limited_client.get("/api/v1/auth/login")
+
+        assert limited_client.get("/api/v1/items").status_code == 200
+
+    def test_preflight_not_limited(self, limited_client):
+        """Тест: OPTIONS запросы не учитываются"""
+        for _ in range(5):
+            limited_client.options("/api/v1/auth/login")
+
+        assert limited_client.get("/api/v1/auth/login").status_code == 200
+
+    def test_clients_behind_proxy_have_separate_limits(self):
+        """Тест: за прокси лимит считается по X-Forwarded-For, а не по адресу прокси"""
+        proxied = make_limited_client(trusted_proxy_hops=1)
+        for _ in range(3):
+            assert proxied.get("/api/v1/auth/login", headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 200
+
+        spoofed = proxied.get("/api/v1/auth/login", headers={"X-Forwarded-For": "1.1.1.1, 203.0.113.7"})
+        other = proxied.get("/api/v1/auth/login", headers={"X-Forwarded-For": "198.51.100.2"})
+
+        assert spoofed.status_code == 429
+        assert other.status_code == 200
+
+    def test_verify_endpoint_limited_in_app(self, client: TestClient):
+        """Тест: подтверждение участия ограничено строже общего лимита"""
+        limit = rate_limit.settings.RATE_LIMIT_VERIFY_REQUESTS
+        for _ in range(limit):
+            assert client.post("/api/v1/surveys/1/verify").status_code != 429
+
+        response = client.post("/api/v1/surveys/1/verify")
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+
+        # Общий лимит не затронут
+        assert client.get("/health").status_code == 200
+
+
+class TestBackendInterface:
+    """Тесты базового класса хранилища"""
+
+    def test_backend_requires_hit(self):
+        """Тест: хранилище без hit нельзя создать"""
+        class Incomplete(RateLimitBackend):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestInMemoryBackend:
+    """Тесты GCRA в памяти"""
+
+    async def test_tokens_recover_over_time(self, monkeypatch):
+        """Тест: лимит восстанавливается равномерно, а не окном целиком"""
+        now = [1000.0]
+        monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+        backend = InMemoryRateLimitBackend()
+        policy = make_policy("p", 2, 10, r".*")
+
+        assert (await backend.hit("k", policy.interval, policy.tolerance)).remaining == 1
+        assert (await backend.hit("k", policy.interval, policy.tolerance)).remaining == 0
+        rejected = await backend.hit("k", policy.interval, policy.tolerance)
+        assert rejected.allowed is False
+        assert rejected.retry_after == pytest.approx(5.0)
+
+        now[0] += 5.0
+        assert (await backend.hit("k", policy.interval, policy.tolerance)).allowed is True
+        assert (await backend.hit("k", policy.interval, policy.tolerance)).allowed is False
+
+    async def test_eviction_keeps_size_bounded(self):
+        """Тест: число ключей ограничено"""
+        backend = InMemoryRateLimitBackend(max_keys=10)
+        for i in range(50):
+            await backend.hit(f"k{i}", 1.0, 59.0)
+
+        assert len(backend._tats) <= 10
+
+
+class TestRedisBackend:
+    """Тесты общего backend на локальной замене Redis (fakeredis)"""
+
+    async def test_shared_limit(self):
+        """Тест: два воркера с одним Redis делят общий лимит"""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        server = fakeredis.FakeServer()
+        worker_a = RedisRateLimitBackend(fakeredis.aioredis.FakeRedis(server=server))
+        worker_b = RedisRateLimitBackend(fakeredis.aioredis.FakeRedis(server=server))
+        policy = make_policy("p", 3, 60, r".*")
+
+        results = [
+            await worker_a.hit("ip", policy.interval, policy.tolerance),
+            await worker_b.hit("ip", policy.interval, policy.tolerance),
+            await worker_a.hit("ip", policy.interval, policy.tolerance),
+            await worker_b.hit("ip", policy.interval, policy.tolerance),
+        ]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after == pytest.approx(20.0, abs=0.5)
+
+    async def test_backend_failure_allows_request(self):
+        """Тест: при недоступном Redis запрос пропускается"""
+        class BrokenRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    raise ConnectionError("redis is down")
+                return run
+
+        backend = RedisRateLimitBackend(BrokenRedis())
+        result = await backend.hit("ip", 1.0, 1.0)
+
+        assert result.allowed is True
@@ -0,0 +1,141 @@
+"""
+Тесты маршрутизации чтений на реплики (вторая SQLite база вместо реплики)
+"""
+import time
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.replica_router import PIN_HEADER, ReplicaRouter, RequestPin, request_pin
+from app.models import Category
+
+
+def create_replica_db(path, category_name: str) -> str:
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Category(name=category_name))
+    db.commit()
+    db.close()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def router(tmp_path):
+    urls = [
+        create_replica_db(tmp_path / "replica0.db", "Replica 0"),
+        create_replica_db(tmp_path / "replica1.db", "Replica 1"),
+    ]
+    router = ReplicaRouter(urls, max_lag_seconds=30, pin_seconds=60)
+    yield router
+    router.dispose()
+
+
+def read_category(router: ReplicaRouter, pin: Optional[RequestPin] = None):
+    token = request_pin.set(pin)
+    try:
+        db = router.read_session()
+    finally:
+        request_pin.reset(token)
+    if db is None:
+        return None
+    try:
+        return db.query(Category.name).scalar()
+    finally:
+        db.close()
+
+
+class TestReplicaRouter:
+    """Тесты выбора реплики"""
+
+    def test_round_robin(self, router):
+        """Тест: чтения распределяются по репликам по кругу"""
+        names = [read_category(router) for _ in range(4)]
+
+        assert names == ["Replica 0", "Replica 1", "Replica 0", "Replica 1"]
+
+    def test_unhealthy_replica_is_skipped(self, router, tmp_path):
+        """Тест: недоступная реплика исключается health check'ом и возвращается после восстановления"""
+        broken = ReplicaRouter(
+            [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"], max_lag_seconds=30, pin_seconds=60
+        )
+        try:
+            assert broken.check_health() == {"replica0": False}
+            assert broken.read_session() is None
+            assert broken.stats()["primary_fallbacks"] == 1
+        finally:
+            broken.dispose()
+
+        router._mark_unhealthy(router.replicas[0], "test")
+        assert {read_category(router) for _ in range(3)} == {"Replica 1"}
+        assert router.check_health() == {"replica0": True, "replica1": True}
+
+    def test_pinned_client_reads_primary(self, router):
+        """Тест: клиент с действующим сроком из заголовка читает из primary"""
+        now = time.time()
+
+        assert read_category(router, RequestPin(requested_until=now + 30)) is None
+        assert read_category(router, RequestPin(requested_until=now - 1)) is not None
+        assert read_category(router, RequestPin()) is not None
+        assert router.stats()["pinned_reads"] == 1
+
+    def test_pin_from_the_future_is_ignored(self, router):
+        """Тест: срок дальше, чем выдает сервер, не закрепляет клиента"""
+        assert read_category(router, RequestPin(requested_until=time.time() + 3600)) is not None
+
+    def test_write_pins_rest_of_request(self, router):
+        """Тест: после записи в запросе его чтения идут в primary, срок уходит клиенту"""
+        pin = RequestPin()
+        token = request_pin.set(pin)
+        try:
+            router.pin_primary()
+        finally:
+            request_pin.reset(token)
+
+        assert pin.written_until == pytest.approx(time.time() + 60, abs=1)
+        assert read_category(router, pin) is None
+
+    def test_disabled_without_replicas(self):
+        """Тест: без реплик все чтения идут в primary"""
+        router = ReplicaRouter([], max_lag_seconds=30, pin_seconds=60)
+
+        assert router.enabled is False
+        assert router.read_session() is None
+
+
+class TestReadEndpoints:
+    """Тесты read-only эндпоинтов с репликой"""
+
+    def test_reads_go_to_replica_until_client_writes(
+        self, client: TestClient, db_session, test_user, auth_headers, tmp_path
+    ):
+        """Тест: категории читаются с реплики; клиент, повторивший срок после записи, - из primary"""
+        db_session.add(Category(name="Primary"))
+        db_session.commit()
+        replica_url = create_replica_db(tmp_path / "replica.db", "Replica")
+        router = ReplicaRouter([replica_url], max_lag_seconds=30, pin_seconds=60)
+
+        try:
+            with patch("app.api.deps.replica_router", router), \
+                    patch("app.core.replica_router.replica_router", router):
+                before = client.get("/api/v1/categories", headers=auth_headers)
+                update = client.put("/api/v1/users/me", json={"full_name": "Renamed"}, headers=auth_headers)
+                pinned = {**auth_headers, PIN_HEADER: update.headers[PIN_HEADER]}
+                after = client.get("/api/v1/categories", headers=pinned)
+                without_pin = client.get("/api/v1/categories", headers=auth_headers)
+        finally:
+            router.dispose()
+
+        assert update.status_code == 200
+        assert float(update.headers[PIN_HEADER]) == pytest.approx(time.time() + 60, abs=5)
+        assert PIN_HEADER not in before.headers
+        assert [c["name"] for c in before.json()["categories"]] == ["Replica"]
+        assert [c["name"] for c in after.json()["categories"]] == ["Primary"]
+        assert [c["name"] for c in without_pin.json()["categories"]] == ["Replica"]
@@ -0,0 +1,71 @@
+"""
+Тесты быстрой сериализации ответов (orjson)
+"""
+import json
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import BaseModel, Field, computed_field
+
+from app.core.responses import FastJSONResponse, dumps
+from app.models import SurveyStatus, TransactionType, User
+from app.schemas import MySurveyDetail, SurveyListItem, TransactionItem
+
+
+CREATED_AT = datetime(2026, 10, 19, 12, 30, 15, 123456, tzinfo=timezone.utc)
+CATEGORY = dict(id=1, name="Science", description=None, is_active=True, created_at=CREATED_AT)
+
+ROWS = {
+    "feed": (SurveyListItem, dict(
+        id=1, title="Sleep", description=None, author_name="Ann", reward_per_response=5,
+        total_responses=3, responses_needed=None, questions_count=7, can_participate=True,
+        my_responses_count=0, categories=[CATEGORY],
+    )),
+    "my_surveys": (MySurveyDetail, dict(
+        id=2, title="Кофе", description="Опрос", status=SurveyStatus.ACTIVE,
+        google_form_url="https://docs.google.com/forms/d/x/viewform", reward_per_response=5,
+        responses_needed=10, max_responses_per_user=1, total_responses=3, total_spent=15,
+        questions_count=4, collects_emails=True, created_at=datetime(2026, 10, 19, 12, 0), categories=[],
+    )),
+    "transactions": (TransactionItem, dict(
+        id=3, transaction_type=TransactionType.EARNED, amount=5, balance_after=105,
+        description=None, created_at=CREATED_AT, related_survey={"id": 2, "title": "Кофе"},
+    )),
+}
+
+
+class TestFastJSONResponse:
+    """Ответ на orjson совпадает с сериализацией Pydantic"""
+
+    @pytest.mark.parametrize("name", sorted(ROWS))
+    def test_matches_pydantic_json(self, name):
+        """Тест: JSON ответа равен model_dump_json (даты, enum, вложенные модели)"""
+        model, row = ROWS[name]
+        item = model.model_validate(row)
+
+        body = FastJSONResponse([item]).body
+
+        assert json.loads(body) == [json.loads(item.model_dump_json())]
+
+    def test_model_with_alias_and_computed_field(self):
+        """Тест: модели с алиасами и вычисляемыми полями сериализуются через model_dump"""
+        class Aliased(BaseModel):
+            user_id: int = Field(serialization_alias="userId")
+
+            @computed_field
+            @property
+            def double(self) -> int:
+                return self.user_id * 2
+
+        assert json.loads(dumps(Aliased(user_id=2))) == {"userId": 2, "double": 4}
+
+    def test_arbitrary_objects_are_rejected(self):
+        """Тест: ORM объект не сериализуется по __dict__ - TypeError"""
+        class Holder(BaseModel):
+            model_config = {"arbitrary_types_allowed": True}
+            user: User
+
+        with pytest.raises(TypeError):
+            dumps(User(email="orm@example.com"))
+        with pytest.raises(TypeError):
+            dumps(Holder(user=User(email="orm@example.com")))
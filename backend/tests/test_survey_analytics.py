@@ -0,0 +1,184 @@
+"""
+Тесты аналитики ответов опроса для автора
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import GoogleAccount, Survey, SurveyQuestion, SurveyResponse, SurveyStatus
+from app.services.survey_analytics import cross_tab, histograms, survey_analytics_cache
+from app.services.survey_sync_service import survey_sync_service
+
+FORM_ITEMS = [
+    {"itemId": "1", "title": "Color", "questionItem": {"question": {
+        "questionId": "color", "choiceQuestion": {"type": "RADIO", "options": [{"value": "Red"}, {"value": "Blue"}, {"isOther": True}]},
+    }}},
+    {"itemId": "2", "title": "Pets", "questionItem": {"question": {
+        "questionId": "pets", "choiceQuestion": {"type": "CHECKBOX", "options": [{"value": "Cat"}, {"value": "Dog"}]},
+    }}},
+    {"itemId": "3", "title": "Score", "questionItem": {"question": {"questionId": "score", "scaleQuestion": {"low": 1, "high": 5}}}},
+    {"itemId": "4", "title": "Comment", "questionItem": {"question": {"questionId": "comment", "textQuestion": {}}}},
+]
+
+
+def google_response(response_id: str, **values) -> dict:
+    return {
+        "responseId": response_id,
+        "lastSubmittedTime": "2026-01-01T10:00:00Z",
+        "answers": {
+            question_id: {"textAnswers": {"answers": [{"value": v} for v in vs]}}
+            for question_id, vs in values.items()
+        },
+    }
+
+
+RESPONSES = [
+    google_response("r1", color=["Red"], pets=["Cat", "Dog"], score=["5"], comment=["ok"]),
+    google_response("r2", color=["Blue"], pets=["Dog"], score=["3"]),
+    google_response("r3", color=["Green"], score=["4"]),
+    google_response("r4", color=["Red"], pets=["Cat"]),
+]
+
+
+@pytest.fixture
+def analytics_survey(db_session, test_user):
+    account = GoogleAccount(
+        user_id=test_user.id, google_id="analytics-author", email="analytics-author@gmail.com",
+        name="Author", access_token="token", is_primary=True,
+    )
+    db_session.add(account)
+    db_session.flush()
+    survey = Survey(
+        title="Analytics", google_account_id=account.id, google_form_id="analytics-form",
+        google_form_url="https://docs.google.com/forms/d/x/viewform", questions_count=len(FORM_ITEMS),
+        reward_per_response=5, status=SurveyStatus.ACTIVE,
+    )
+    db_session.add(survey)
+    db_session.commit()
+    return survey
+
+
+@pytest.fixture
+async def synced_survey(db_session, analytics_survey, fake_forms):
+    """Опрос с синхронизированными RESPONSES"""
+    fake_forms(RESPONSES, items=FORM_ITEMS)
+    await survey_sync_service.sync_survey_responses(db_session, analytics_survey.id)
+    return analytics_survey
+
+
+def question_id(db, google_question_id: str) -> int:
+    return db.query(SurveyQuestion.id).filter(SurveyQuestion.google_question_id == google_question_id).scalar()
+
+
+def analytics_url(survey: Survey) -> str:
+    return f"/api/v1/surveys/my/{survey.id}/analytics"
+
+
+class TestAnalyticsKernels:
+    """Тесты векторных гистограмм и перекрестных таблиц"""
+
+    def test_histograms_map_other_to_last_column(self):
+        """Тест: "Другое" - последний столбец, ответы неизвестных вопросов пропускаются"""
+        choices = np.array([[1, 10, 0], [1, 11, -1], [3, 10, 1], [3, 11, 1], [5, 10, 0]], dtype=np.int64)
+
+        first, second = histograms(choices, np.array([1, 3]), np.array([3, 2]))
+
+        assert first.tolist() == [1, 0, 1]
+        assert second.tolist() == [0, 2]
+
+    def test_cross_tab_counts_checkbox_pairs(self):
+        """Тест: у вопроса с флажками каждая отмеченная пара считается отдельно"""
+        choices = np.array(
+            [[1, 10, 0], [1, 11, 1], [1, 12, 0], [2, 10, 0], [2, 10, 1], [2, 11, 1], [2, 13, 0]], dtype=np.int64
+        )
+
+        matrix = cross_tab(choices, 1, 3, 2, 3)
+
+        assert matrix.tolist() == [[1, 1, 0], [0, 1, 0], [0, 0, 0]]
+
+
+class TestSurveyAnalyticsEndpoint:
+    """Тесты GET /surveys/my/{id}/analytics"""
+
+    def test_histograms_and_numeric_summary(self, client: TestClient, auth_headers, synced_survey):
+        """Тест: распределения вариантов, сводка шкалы и число ответивших"""
+        response = client.get(analytics_url(synced_survey), headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["responses"] == 4
+        assert data["completion_time"] is None
+        assert data["cross_tab"] is None
+        color, pets, score, comment = data["questions"]
+        assert (color["options"], color["counts"], color["answered"]) == (["Red", "Blue"], [2, 1, 1], 4)
+        assert (pets["counts"], pets["answered"]) == ([2, 2, 0], 3)
+        assert score["counts"] is None
+        assert score["summary"] == {"count": 3, "mean": 4.0, "min": 3.0, "p25": 3.5, "median": 4.0, "p75": 4.5, "max": 5.0}
+        assert (comment["kind"], comment["answered"], comment["summary"]) == ("text", 1, None)
+
+    def test_cross_tab(self, client: TestClient, auth_headers, db_session, synced_survey):
+        """Тест: перекрестная таблица двух вопросов с вариантами"""
+        color, pets = question_id(db_session, "color"), question_id(db_session, "pets")
+
+        response = client.get(
+            analytics_url(synced_survey), headers=auth_headers,
+            params={"row_question_id": color, "column_question_id": pets},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["cross_tab"] == {
+            "row_question_id": color,
+            "column_question_id": pets,
+            "counts": [[2, 1, 0], [0, 1, 0], [0, 0, 0]],
+        }
+
+    def test_cross_tab_requires_two_choice_questions(self, client: TestClient, auth_headers, db_session, synced_survey):
+        """Тест: один вопрос или вопрос без вариантов - ошибка валидации"""
+        color, score = question_id(db_session, "color"), question_id(db_session, "score")
+
+        only_row = client.get(analytics_url(synced_survey), headers=auth_headers, params={"row_question_id": color})
+        numeric = client.get(
+            analytics_url(synced_survey), headers=auth_headers,
+            params={"row_question_id": color, "column_question_id": score},
+        )
+
+        assert only_row.status_code == 422
+        assert numeric.status_code == 422
+
+    def test_completion_time_percentiles(self, client: TestClient, auth_headers, db_session, synced_survey, second_test_user):
+        """Тест: перцентили времени прохождения по подтвержденным ответам"""
+        started = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+        for index, minutes in enumerate([1, 2, 3]):
+            db_session.add(SurveyResponse(
+                survey_id=synced_survey.id, respondent_id=second_test_user.id, google_response_id=f"r{index + 1}",
+                is_verified=True, started_at=started, google_timestamp=started + timedelta(minutes=minutes),
+            ))
+        db_session.add(SurveyResponse(survey_id=synced_survey.id, respondent_id=second_test_user.id, started_at=started))
+        db_session.commit()
+
+        response = client.get(analytics_url(synced_survey), headers=auth_headers)
+
+        assert response.json()["completion_time"] == pytest.approx({"count": 3, "p50": 120.0, "p90": 168.0, "p99": 178.8})
+
+    def test_only_author_has_access(self, client: TestClient, synced_survey, second_auth_headers):
+        """Тест: чужой опрос - 403, несуществующий - 404"""
+        assert client.get(analytics_url(synced_survey), headers=second_auth_headers).status_code == 403
+        assert client.get("/api/v1/surveys/my/999999/analytics", headers=second_auth_headers).status_code == 404
+
+    async def test_cache_is_keyed_by_last_synced_at(self, client: TestClient, auth_headers, db_session, synced_survey, fake_forms):
+        """Тест: повторный запрос - из кэша, новая синхронизация отдает свежие данные"""
+        first = client.get(analytics_url(synced_survey), headers=auth_headers)
+        hits = survey_analytics_cache.stats()["hits"]
+        cached = client.get(analytics_url(synced_survey), headers=auth_headers)
+
+        assert survey_analytics_cache.stats()["hits"] == hits + 1
+        assert cached.content == first.content
+
+        fake_forms([google_response("r5", color=["Blue"])], items=FORM_ITEMS)
+        await survey_sync_service.sync_survey_responses(db_session, synced_survey.id, force_full_sync=True)
+        fresh = client.get(analytics_url(synced_survey), headers=auth_headers).json()
+
+        assert fresh["responses"] == 5
+        assert fresh["questions"][0]["counts"] == [2, 2, 1]
@@ -0,0 +1,129 @@
+"""
+Тесты атомарного учета ответов и завершения опроса (verify_and_reward)
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.exceptions import SurveyValidationException
+from app.models import (
+    BalanceTransaction,
+    Survey,
+    SurveyResponse,
+    SurveyStatus,
+    SyncedFormResponse,
+    TransactionType,
+    User,
+)
+from app.services.participation_service import ParticipationService
+
+REWARD = 5
+NEEDED = 4
+PARTICIPANTS = 12
+
+
+def seed_survey(db, make_survey) -> tuple:
+    """Автор с балансом, опрос на NEEDED ответов и PARTICIPANTS начатых и синхронизированных ответов"""
+    author = User(email="author@example.com", full_name="Author", balance=1000, respondent_code="A00001")
+    participants = [
+        User(email=f"p{i}@example.com", full_name=f"P {i}", respondent_code=f"P{i:05d}")
+        for i in range(PARTICIPANTS)
+    ]
+    db.add_all([author, *participants])
+    db.flush()
+    survey = make_survey(author, db, title="Limited", reward_per_response=REWARD, responses_needed=NEEDED)
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        SurveyResponse(survey_id=survey.id, respondent_id=p.id, started_at=now)
+        for p in participants
+    ])
+    db.add_all([
+        SyncedFormResponse(
+            survey_id=survey.id, google_response_id=f"completion-{p.id}",
+            respondent_code=p.respondent_code, submitted_at=now,
+        )
+        for p in participants
+    ])
+    db.commit()
+    return survey.id, author.id, [p.id for p in participants]
+
+
+def assert_target_respected(db, survey_id: int, author_id: int, paid: int) -> None:
+    survey = db.get(Survey, survey_id)
+    verified = db.query(SurveyResponse).filter(
+        SurveyResponse.survey_id == survey_id, SurveyResponse.reward_paid == True
+    ).count()
+    spent = db.query(func.sum(BalanceTransaction.amount)).filter(
+        BalanceTransaction.user_id == author_id, BalanceTransaction.transaction_type == TransactionType.SPENT
+    ).scalar()
+
+    assert survey.total_responses == verified == paid == NEEDED
+    assert survey.status == SurveyStatus.COMPLETED
+    assert db.get(User, author_id).balance == 1000 - NEEDED * REWARD
+    assert spent == -NEEDED * REWARD
+
+
+class TestSurveyCompletion:
+    """Тесты лимита responses_needed"""
+
+    async def test_stale_survey_object_does_not_overfill(self, db_session, make_survey):
+        """Тест: устаревший счетчик в сессии не позволяет превысить цель"""
+        survey_id, author_id, participant_ids = seed_survey(db_session, make_survey)
+        service = ParticipationService(db_session)
+        for user_id in participant_ids[:NEEDED - 1]:
+            await service.verify_and_reward(survey_id, db_session.get(User, user_id))
+
+        survey = db_session.get(Survey, survey_id)
+        assert survey.total_responses == NEEDED - 1
+        # Другой воркер засчитал последний ответ: объект опроса в этой сессии не знает об этом
+        db_session.execute(
+            update(Survey).where(Survey.id == survey_id)
+            .values(total_responses=NEEDED, status=SurveyStatus.COMPLETED)
+            .execution_options(synchronize_session=False)
+        )
+        db_session.commit()
+
+        with pytest.raises(SurveyValidationException):
+            await service.verify_and_reward(survey_id, db_session.get(User, participant_ids[-1]))
+        assert db_session.get(Survey, survey_id).total_responses == NEEDED
+
+    def test_concurrent_verifications_stop_at_target(self, tmp_path, make_survey):
+        """Стресс-тест: параллельные подтверждения засчитывают ровно responses_needed ответов"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'stress.db'}", connect_args={"timeout": 30})
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            survey_id, author_id, participant_ids = seed_survey(db, make_survey)
+
+        barrier = threading.Barrier(PARTICIPANTS)
+        outcomes = []
+
+        def participant(user_id: int) -> None:
+            barrier.wait()
+            while True:
+                with Session() as db:
+                    try:
+                        asyncio.run(ParticipationService(db).verify_and_reward(survey_id, db.get(User, user_id)))
+                        outcomes.append("paid")
+                    except SurveyValidationException:
+                        outcomes.append("rejected")
+                    except OperationalError:
+                        continue  # SQLite: база занята другим писателем - повторить
+                return
+
+        threads = [threading.Thread(target=participant, args=(user_id,)) for user_id in participant_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(outcomes) == ["paid"] * NEEDED + ["rejected"] * (PARTICIPANTS - NEEDED)
+        with Session() as db:
+            assert_target_respected(db, survey_id, author_id, outcomes.count("paid"))
+        engine.dispose()
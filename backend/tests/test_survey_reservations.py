@@ -0,0 +1,115 @@
+"""
+Тесты резервирования слотов опроса при старте участия
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.core.exceptions import SurveyValidationException
+from app.models import SurveyResponse, SurveyStatus, SyncedFormResponse, User
+from app.services.participation_service import ParticipationService
+
+NEEDED = 2
+
+
+@pytest.fixture
+def limited_survey(db_session, make_survey):
+    """Опрос на NEEDED ответов и четыре участника, чьи ответы уже синхронизированы"""
+    author = User(email="slots-author@example.com", full_name="Author", balance=1000, respondent_code="S00000")
+    participants = [
+        User(email=f"slots{i}@example.com", full_name=f"P {i}", respondent_code=f"S{i + 1:05d}")
+        for i in range(4)
+    ]
+    db_session.add_all([author, *participants])
+    db_session.flush()
+    survey = make_survey(author, title="Slots", responses_needed=NEEDED)
+    db_session.add_all([
+        SyncedFormResponse(
+            survey_id=survey.id, google_response_id=f"slots-{p.id}", respondent_email=p.email,
+            submitted_at=datetime.now(timezone.utc),
+        )
+        for p in participants
+    ])
+    db_session.commit()
+    return survey, participants
+
+
+def expire_reservations(db, survey_id: int) -> None:
+    db.execute(
+        update(SurveyResponse).where(SurveyResponse.survey_id == survey_id)
+        .values(reserved_until=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    db.commit()
+
+
+class TestSurveyReservations:
+    """Тесты жизненного цикла слота: старт, подтверждение, возврат"""
+
+    def test_start_is_bounded_by_capacity(self, db_session, limited_survey):
+        """Тест: стартов не больше свободных слотов, повторный старт не занимает второй слот"""
+        survey, participants = limited_survey
+        service = ParticipationService(db_session)
+
+        first = service.start_participation(survey.id, participants[0])
+        service.start_participation(survey.id, participants[0])
+        service.start_participation(survey.id, participants[1])
+        with pytest.raises(SurveyValidationException):
+            service.start_participation(survey.id, participants[2])
+
+        assert first.reserved_until > datetime.now(timezone.utc)
+        db_session.refresh(survey)
+        assert survey.reserved_slots == NEEDED
+        assert db_session.query(SurveyResponse).filter(SurveyResponse.survey_id == survey.id).count() == NEEDED
+
+    async def test_verification_consumes_slot(self, db_session, limited_survey):
+        """Тест: подтверждение переводит слот в засчитанный ответ, опрос завершается по цели"""
+        survey, participants = limited_survey
+        service = ParticipationService(db_session)
+        for user in participants[:NEEDED]:
+            service.start_participation(survey.id, user)
+
+        for user in participants[:NEEDED]:
+            await service.verify_and_reward(survey.id, user)
+
+        db_session.refresh(survey)
+        assert (survey.total_responses, survey.reserved_slots, survey.status) == (NEEDED, 0, SurveyStatus.COMPLETED)
+        assert db_session.query(SurveyResponse).filter(SurveyResponse.reserved_until.is_not(None)).count() == 0
+
+    def test_sweeper_returns_expired_slots(self, db_session, limited_survey):
+        """Тест: истекшие слоты возвращаются пачками, потерявший слот занимает его заново"""
+        survey, participants = limited_survey
+        service = ParticipationService(db_session)
+        for user in participants[:NEEDED]:
+            service.start_participation(survey.id, user)
+        expire_reservations(db_session, survey.id)
+
+        assert service.release_expired_reservations(batch_size=1) == NEEDED
+        assert service.release_expired_reservations() == 0
+        db_session.refresh(survey)
+        assert survey.reserved_slots == 0
+
+        # Освободившееся место занимает новый участник, прежний продолжает со своим ответом
+        service.start_participation(survey.id, participants[2])
+        service.start_participation(survey.id, participants[0])
+        with pytest.raises(SurveyValidationException):
+            service.start_participation(survey.id, participants[1])
+        db_session.refresh(survey)
+        assert survey.reserved_slots == NEEDED
+
+    async def test_verification_without_slot_needs_free_room(self, db_session, limited_survey):
+        """Тест: ответ, чей слот вернули, не засчитывается поверх чужих живых резервов"""
+        survey, participants = limited_survey
+        service = ParticipationService(db_session)
+        service.start_participation(survey.id, participants[0])
+        expire_reservations(db_session, survey.id)
+        service.release_expired_reservations()
+        for user in participants[1:NEEDED + 1]:
+            service.start_participation(survey.id, user)
+
+        with pytest.raises(SurveyValidationException):
+            await service.verify_and_reward(survey.id, participants[0])
+        await service.verify_and_reward(survey.id, participants[1])
+
+        db_session.refresh(survey)
+        assert (survey.total_responses, survey.reserved_slots) == (1, 1)
@@ -1,9 +1,11 @@
 """
 Тесты для пользовательских endpoints (профиль, баланс, транзакции)
 """
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi.testclient import TestClient
-from app.models import User
+from app.models import BalanceTransaction, TransactionType, User
 
 
 class TestUsersPublicEndpoints:
@@ -104,9 +106,14 @@ class TestUsersPrivateEndpoints:
         data = response.json()
         assert isinstance(data, list)
 
-    @pytest.mark.skip(reason="FIXME: User service get_transactions method implementation needed")
-    def test_get_transactions_with_data(self, client: TestClient, auth_headers, mock_transaction):
+    def test_get_transactions_with_data(self, client: TestClient, auth_headers, db_session, test_user):
         """Тест получения транзакций с данными"""
+        db_session.add(BalanceTransaction(
+            user_id=test_user.id, transaction_type=TransactionType.BONUS, amount=10,
+            balance_after=test_user.balance + 10, description="Welcome bonus",
+        ))
+        db_session.commit()
+
         response = client.get("/api/v1/users/me/transactions", headers=auth_headers)
         
         assert response.status_code == 200
@@ -120,6 +127,72 @@ class TestUsersPrivateEndpoints:
         assert "balance_after" in transaction
         assert "description" in transaction
         assert "created_at" in transaction
+        assert transaction["transaction_type"] == "bonus"
+        assert transaction["related_survey"] is None
+
+
+class TestTransactionHistory:
+    """Тесты keyset пагинации истории транзакций"""
+
+    @pytest.fixture
+    def history(self, db_session, test_user, make_survey):
+        """7 транзакций с общим временем у пары строк; нечетные - за участие в опросе"""
+        survey = make_survey(test_user, title="Paid survey")
+        now = datetime.now(timezone.utc)
+        transactions = [
+            BalanceTransaction(
+                user_id=test_user.id,
+                transaction_type=TransactionType.EARNED if i % 2 else TransactionType.BONUS,
+                amount=5, balance_after=5 * (i + 1),
+                related_survey_id=survey.id if i % 2 else None,
+                created_at=now - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ]
+        db_session.add_all(transactions)
+        db_session.commit()
+        return sorted(transactions, key=lambda t: (t.created_at, t.id), reverse=True)
+
+    def test_cursor_walks_all_pages(self, client: TestClient, auth_headers, history):
+        """Тест: страницы по курсору покрывают историю без повторов и пропусков"""
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/users/me/transactions", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            ids += [item["id"] for item in response.json()]
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert ids == [t.id for t in history]
+        assert pages == 3
+
+    def test_filter_by_type_with_survey_titles(self, client: TestClient, auth_headers, history):
+        """Тест: фильтр по типу, названия опросов приходят из того же запроса"""
+        response = client.get(
+            "/api/v1/users/me/transactions", params={"transaction_type": "earned"}, headers=auth_headers
+        )
+
+        data = response.json()
+        assert [item["id"] for item in data] == [t.id for t in history if t.transaction_type == TransactionType.EARNED]
+        assert {item["related_survey"]["title"] for item in data} == {"Paid survey"}
+
+    def test_single_query_per_page(self, client: TestClient, auth_headers, history, db_statement_counts):
+        """Тест: страница - один запрос независимо от числа связанных опросов"""
+        client.get("/api/v1/users/me", headers=auth_headers)  # прогрев кэша пользователя
+        client.get("/api/v1/users/me/transactions", params={"limit": 2}, headers=auth_headers)
+        client.get("/api/v1/users/me/transactions", params={"limit": 7}, headers=auth_headers)
+
+        _, small, large = db_statement_counts()
+        assert small == large
+
+    def test_invalid_cursor(self, client: TestClient, auth_headers):
+        """Тест: чужая строка в качестве курсора - ошибка валидации"""
+        response = client.get("/api/v1/users/me/transactions", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+
+        assert response.status_code == 422
 
 
 class TestUsersValidation:
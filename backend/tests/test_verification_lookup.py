@@ -0,0 +1,124 @@
+"""
+Тесты подтверждения участия по индексу синхронизированных ответов Google Forms
+"""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.exceptions import GoogleAPIException, ValidationException
+from app.models import Survey, SurveyResponse, SyncedFormResponse, User
+from app.services.survey_sync_service import survey_sync_service
+from app.services.participation_service import ParticipationService
+
+
+def google_response(response_id: str, submitted: str, email=None, code=None) -> dict:
+    answers = {"q1": {"textAnswers": {"answers": [{"value": f" {code.lower()} "}]}}} if code else {}
+    return {
+        "responseId": response_id,
+        "lastSubmittedTime": submitted,
+        **({"respondentEmail": email.upper()} if email else {}),
+        "answers": answers,
+    }
+
+
+@pytest.fixture
+def started_survey(db_session, test_user, second_test_user, make_survey):
+    """Опрос второго пользователя, test_user начал участие"""
+    second_test_user.balance = 100
+    survey = make_survey(second_test_user, title="Lookup")
+    db_session.add(SurveyResponse(survey_id=survey.id, respondent_id=test_user.id, started_at=datetime.now(timezone.utc)))
+    db_session.commit()
+    return survey
+
+
+class TestVerificationLookup:
+    """Тесты поиска ответа участника"""
+
+    async def test_index_hit_does_not_call_google(self, db_session, test_user, started_survey, fake_forms):
+        """Тест: ответ уже в индексе - подтверждение без обращения к Google"""
+        google = fake_forms([])
+        db_session.add(SyncedFormResponse(
+            survey_id=started_survey.id, google_response_id="hit", respondent_code=test_user.respondent_code,
+            submitted_at=datetime.now(timezone.utc),
+        ))
+        db_session.commit()
+
+        result = await ParticipationService(db_session).verify_and_reward(started_survey.id, test_user)
+
+        assert result.verified and google.calls == []
+        response = db_session.query(SurveyResponse).filter(SurveyResponse.survey_id == started_survey.id).one()
+        assert response.google_response_id == "hit"
+
+    async def test_miss_triggers_incremental_sync(self, db_session, test_user, started_survey, fake_forms):
+        """Тест: промах - синхронизация страниц опроса, следующая синхронизация от watermark"""
+        google = fake_forms(
+            [google_response("other", "2026-01-01T10:00:00.123456789Z", email="someone@example.com")],
+            [google_response("mine", "2026-01-01T11:00:00Z", code=test_user.respondent_code)],
+        )
+
+        result = await ParticipationService(db_session).verify_and_reward(started_survey.id, test_user)
+
+        assert result.verified
+        assert [page for page, _ in google.calls] == [None, "1"]
+        survey = db_session.get(Survey, started_survey.id)
+        assert survey.last_synced_at is not None
+        assert db_session.query(SyncedFormResponse).filter(SyncedFormResponse.survey_id == survey.id).count() == 2
+
+        google.calls.clear()
+        await survey_sync_service.sync_survey_responses(db_session, survey.id)
+        assert google.calls[0][1] == datetime(2026, 1, 1, 11, 0, tzinfo=timezone.utc)
+        assert db_session.query(SyncedFormResponse).filter(SyncedFormResponse.survey_id == survey.id).count() == 2
+
+    async def test_missing_response_is_rejected_and_sync_throttled(
+        self, db_session, test_user, second_test_user, started_survey, fake_forms
+    ):
+        """Тест: ответа нет - отказ без выплаты, повторный промах не синхронизирует сразу же"""
+        google = fake_forms([google_response("email-match", "2026-01-01T10:00:00Z", email="stranger@example.com")])
+        service = ParticipationService(db_session)
+        balance = test_user.balance
+
+        for _ in range(2):
+            with pytest.raises(ValidationException):
+                await service.verify_and_reward(started_survey.id, test_user)
+
+        assert len(google.calls) == 1
+        assert db_session.get(User, test_user.id).balance == balance
+        assert db_session.get(User, second_test_user.id).balance == 100
+
+    async def test_failed_sync_is_throttled(self, db_session, test_user, started_survey, fake_forms):
+        """Тест: неудачная синхронизация тоже ограничена по частоте"""
+        google = fake_forms([])
+        google.get_form_responses = AsyncMock(side_effect=GoogleAPIException("Forms API unavailable"))
+        service = ParticipationService(db_session)
+
+        for _ in range(2):
+            with pytest.raises(ValidationException):
+                await service.verify_and_reward(started_survey.id, test_user)
+
+        assert google.get_form_responses.await_count == 1
+        survey = db_session.get(Survey, started_survey.id)
+        assert survey.last_sync_attempt_at is not None
+        assert survey.last_synced_at is None
+
+    async def test_sync_keeps_updated_at(self, db_session, started_survey, fake_forms):
+        """Тест: синхронизация не меняет updated_at опроса (кэш фрагментов ленты не сбрасывается)"""
+        fake_forms([google_response("r1", "2026-01-01T10:00:00Z", email="someone@example.com")])
+        updated_at = started_survey.updated_at
+
+        await survey_sync_service.sync_if_stale(db_session, started_survey)
+
+        survey = db_session.get(Survey, started_survey.id)
+        assert survey.last_synced_at is not None
+        assert survey.sync_watermark is not None
+        assert survey.updated_at == updated_at
+
+    async def test_response_matched_by_email_is_claimed_once(self, db_session, test_user, started_survey, fake_forms):
+        """Тест: ответ по email засчитывается один раз"""
+        fake_forms([google_response("by-email", "2026-01-01T10:00:00Z", email=test_user.email)])
+        service = ParticipationService(db_session)
+        await service.verify_and_reward(started_survey.id, test_user)
+
+        assert service.synced_repo.find_unclaimed(
+            db_session, started_survey.id, [test_user.email], test_user.respondent_code
+        ) is None
@@ -38,6 +38,11 @@ const devLog = (type: 'request' | 'response' | 'error', message: string, data?:
   }
 };
 
+// Read-your-writes: после записи backend отдает срок (unix-время), до которого
+// чтения клиента идут в primary БД, а не в реплику. Повторяем его в запросах
+const DB_PIN_HEADER = 'X-DB-Pin-Until';
+let dbPinUntil = 0;
+
 // Создаем instance axios
 const apiClient: AxiosInstance = axios.create({
   baseURL: API_BASE_URL,
@@ -57,6 +62,10 @@ apiClient.interceptors.request.use(
       config.headers.Authorization = `Bearer ${accessToken}`;
     }
 
+    if (dbPinUntil > Date.now() / 1000 && config.headers) {
+      config.headers[DB_PIN_HEADER] = String(dbPinUntil);
+    }
+
     // Dev logging
     devLog('request', `${config.method?.toUpperCase()} ${config.url}`, {
       headers: config.headers,
@@ -75,6 +84,11 @@ apiClient.interceptors.request.use(
 // Response interceptor - обработка ошибок и refresh token
 apiClient.interceptors.response.use(
   (response) => {
+    const pinUntil = Number(response.headers[DB_PIN_HEADER.toLowerCase()]);
+    if (pinUntil > dbPinUntil) {
+      dbPinUntil = pinUntil;
+    }
+
     // Dev logging
     devLog('response', `${response.status} ${response.config.url}`, {
       data: response.data,